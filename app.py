@@ -1,15 +1,35 @@
+import os
+
 import streamlit as st
 import pandas as pd
 
-# Charger les données
-df = pd.read_csv("hotel_data_extended.csv")
+import storage
+from hotel_kpi import sketches
+
+DATA_PATH = "hotel_data_extended.csv"
+
+# Charger les données (uniquement les colonnes utilisées, depuis le stockage colonnaire), une fois par
+# version du CSV et partagées entre reruns et sessions : le frame est en lecture seule
+@st.cache_resource(max_entries=2)
+def load_kpi_frame(csv_path, csv_mtime):
+    return storage.load_table(csv_path, columns=['revenue', 'cost', 'profit_margin', 'occupancy_rate'])
+
+df = load_kpi_frame(DATA_PATH, os.path.getmtime(DATA_PATH))
+
+# Sketches de quantiles journaliers (par département, service et bâtiment), calculés une fois puis fusionnés
+@st.cache_data
+def load_daily_sketches():
+    ops = storage.load_table(DATA_PATH,
+                             columns=['date', 'department', 'shift', 'building'] + sketches.SERVICE_METRICS)
+    return sketches.build_sketch(ops, ['date', 'department', 'shift', 'building'])
 
 # Titre
 st.title("🏨 Tableau de bord global")
 
 # Calcul des KPI
-revenu_total = df['revenue'].sum()
-cout_total = df['cost'].sum()
+# Montants float32 du schéma cumulés sur 64 bits
+revenu_total = df['revenue'].astype('float64').sum()
+cout_total = df['cost'].astype('float64').sum()
 marge_globale = df['profit_margin'].mean()
 taux_occ = df['occupancy_rate'].mean()
 
@@ -45,3 +65,13 @@ with col4:
     else:
         occ_color = "#C0392B"
     kpi_card("🛎️ Taux d’occupation", f"{taux_occ:.1f} %", occ_color)
+
+# Percentiles des métriques de service (p50 / p90 / p99)
+st.markdown("### ⏱️ Percentiles des métriques de service")
+dimensions = {"Département": 'department', "Service": 'shift', "Bâtiment": 'building'}
+dim_label = st.selectbox("Regrouper par", list(dimensions))
+quantiles = sketches.sketch_quantiles(load_daily_sketches(), [dimensions[dim_label]])
+table = quantiles.pivot(index=dimensions[dim_label], columns='metric', values=['p50', 'p90', 'p99'])
+table.columns = [f"{metric} {q}" for q, metric in table.columns]
+st.dataframe(table[sorted(table.columns)].style.format('{:.1f}'))
+st.caption(f"Valeurs approchées à ±{sketches.DEFAULT_ALPHA:.0%} près (sketches journaliers fusionnés).")
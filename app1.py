@@ -1,48 +1,58 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sklearn.linear_model import LinearRegression
-import numpy as np
 from io import BytesIO
 from reportlab.pdfgen import canvas
 
+import downsample
+import hotel_kpi
+import ingestion
+import kpi_cache
+import rollup
+import storage
+
 # Titre de l'application
 st.title("Application de Gestion Hôtelière avec Indicateurs de Performance")
 
 # Chargement des données depuis un fichier CSV
-@st.cache_data
+@st.cache_resource
+def get_loader(file_path):
+    # Chargeur partagé : à chaque rerun, seules les lignes ajoutées au CSV sont parsées
+    return ingestion.IncrementalCsvLoader(file_path, initial_loader=storage.load_table_with_watermark)
+
+@st.cache_resource
+def get_cube(file_path):
+    # Cube d'agrégats abonné au chargeur : les lignes ajoutées au CSV y sont fusionnées à l'ingestion
+    cube = rollup.RollupCube()
+    get_loader(file_path).subscribe(cube.on_ingest, replay=True)
+    return cube
+
 def load_data():
     file_path = 'hotel_data.csv'  # Remplacez par le chemin de votre fichier CSV
-    data = pd.read_csv(file_path)
-    
-    # Vérifier si la colonne 'Date' existe
-    if 'Date' in data.columns:
-        data['Date'] = pd.to_datetime(data['Date'])  # Convertir en datetime si la colonne existe
-    else:
-        st.warning("La colonne 'Date' est manquante dans le fichier CSV.")
-    
-    return data
-
-data = load_data()
+    # Frame partagé en lecture seule (dates déjà parsées par le chargeur), version pour les clés de cache
+    data, data_version = get_loader(file_path).snapshot()
+    return data, data_version
+
+data, data_version = load_data()
 
 # Sidebar pour les filtres
 st.sidebar.header("Filtres")
-selected_department = st.sidebar.selectbox("Département", data['Department'].unique())
+selected_department = st.sidebar.selectbox("Département", data['Department'].unique()) if 'Department' in data.columns else None
 selected_period = st.sidebar.selectbox("Période", ["Jour", "Semaine", "Mois", "Année"])
 
 # Filtrage des données
-filtered_data = data[data["Department"] == selected_department]
-
-# Calcul des KPI
-total_rooms = data['RoomCount'].sum()  # Exemple : total de chambres, à ajuster selon votre CSV
-occupied_rooms = data['OccupiedRooms'].sum()  # Exemple : chambres occupées
-revenue = data['Revenue'].sum()  # Total des revenus
-cost = data['Cost'].sum()  # Total des coûts
-occupancy_rate = (occupied_rooms / total_rooms) * 100 if total_rooms > 0 else 0
-adr = revenue / occupied_rooms if occupied_rooms > 0 else 0
-revpar = revenue / total_rooms if total_rooms > 0 else 0
-trevpar = revenue / total_rooms if total_rooms > 0 else 0 
-copar = cost / total_rooms if total_rooms > 0 else 0 
+filtered_data = data[data["Department"] == selected_department] if selected_department is not None else data
+
+# Calcul des KPI à partir des sommes du cube (colonnes du CSV généré : capacity, occupied, room_revenue...)
+totals = get_cube('hotel_data.csv').query('year', by=())
+kpis = hotel_kpi.totals_kpis(totals['capacity'], totals['occupied'], totals['room_revenue'],
+                             total_revenue=totals['total_revenue'], total_cost=totals['total_cost'])
+cost = kpis['cost']  # Total des coûts
+occupancy_rate = kpis['occupancy_rate'] * 100
+adr = kpis['adr']
+revpar = kpis['revpar']
+trevpar = kpis['trevpar']
+copar = kpis['copar']
 
 # Affichage des KPI
 st.header("Indicateurs de Performance Clés")
@@ -59,53 +69,80 @@ st.write(f"${copar:.2f}")
 
 # Analyse des KPI Financiers
 st.header("Analyse des KPI Financiers")
-if 'Date' in data.columns:
-    revenue_fig = px.line(data, x="Date", y="Revenue", title="Revenus Mensuels")
-    st.plotly_chart(revenue_fig)
-    st.write("Tableau des Revenus Mensuels")
-    st.dataframe(data[["Date", "Revenue"]].groupby("Date").sum().reset_index())
-else:
-    st.warning("Impossible d'afficher les revenus mensuels sans colonne 'Date'.")
-
-# Analyse des Points de Vente
+# Sommes par période lues dans le cube pré-agrégé (pas de ré-agrégation des lignes brutes)
+revenue_by_period = (get_cube('hotel_data.csv').query(rollup.PERIOD_GRAINS[selected_period], by=['date'])
+                     [['date', 'total_revenue']].rename(columns={'date': 'Date', 'total_revenue': 'Revenue'}))
+# Points réduits à la largeur du graphique (pics et creux conservés)
+revenue_fig = px.line(downsample.downsample(revenue_by_period, "Date", "Revenue"), x="Date", y="Revenue",
+                      title=f"Revenus par période ({selected_period})")
+st.plotly_chart(revenue_fig)
+st.write("Tableau des Revenus par période")
+st.dataframe(revenue_by_period)
+
+# Analyse des Points de Vente (colonnes absentes des CSV générés : section ignorée sans elles)
 st.header("Analyse des Points de Vente")
-sales_data = data[data["Type"] == "Point de Vente"]
-sales_fig = px.bar(sales_data, x="Point de Vente", y="Revenues", title="Revenus par Point de Vente")
-st.plotly_chart(sales_fig)
-st.write("Tableau des Revenus par Point de Vente")
-st.dataframe(sales_data[["Point de Vente", "Revenues"]].groupby("Point de Vente").sum().reset_index())
+if {'Type', 'Point de Vente', 'Revenues'} <= set(data.columns):
+    sales_data = data[data["Type"] == "Point de Vente"]
+    sales_fig = px.bar(sales_data, x="Point de Vente", y="Revenues", title="Revenus par Point de Vente")
+    st.plotly_chart(sales_fig)
+    st.write("Tableau des Revenus par Point de Vente")
+    st.dataframe(sales_data[["Point de Vente", "Revenues"]].groupby("Point de Vente").sum().reset_index())
+else:
+    st.warning("Impossible d'afficher les points de vente sans colonnes 'Type', 'Point de Vente' et 'Revenues'.")
 
 # Analyse des Ressources Humaines
 st.header("Analyse des Ressources Humaines")
-hr_data = data[data["Type"] == "Ressources Humaines"]
-hr_fig = px.bar(hr_data, x="Department", y="Cost", title="Coûts de Main-d'œuvre par Département")
-st.plotly_chart(hr_fig)
-st.write("Tableau des Coûts de Main-d'œuvre par Département")
-st.dataframe(hr_data[["Department", "Cost"]].groupby("Department").sum().reset_index())
+if {'Type', 'Department', 'Cost'} <= set(data.columns):
+    hr_data = data[data["Type"] == "Ressources Humaines"]
+    hr_fig = px.bar(hr_data, x="Department", y="Cost", title="Coûts de Main-d'œuvre par Département")
+    st.plotly_chart(hr_fig)
+    st.write("Tableau des Coûts de Main-d'œuvre par Département")
+    st.dataframe(hr_data[["Department", "Cost"]].groupby("Department").sum().reset_index())
+else:
+    st.warning("Impossible d'afficher les coûts de main-d'œuvre sans colonnes 'Type', 'Department' et 'Cost'.")
 
 # Analyse Prédictive Budgétaire
 st.header("Analyse Prédictive Budgétaire")
-if 'Date' in data.columns:
-    # Préparation des données pour la prédiction
-    X = np.array(data['Date'].astype('datetime64[ns]').astype(int)).reshape(-1, 1)
-    y = data['OccupancyRate']
-
-    # Entraînement du modèle
-    model = LinearRegression()
-    model.fit(X, y)
-
-    # Prédiction
-    future_dates = pd.date_range(start=data['Date'].max(), periods=30, freq='D')
-    future_X = np.array(future_dates.astype('datetime64[ns]').astype(int)).reshape(-1, 1)
-    predictions = model.predict(future_X)
-
-    # Affichage des prédictions
-    prediction_fig = px.line(x=future_dates, y=predictions, title="Prévisions de Taux d'Occupation")
+if {'date', 'occupancy_rate'} <= set(data.columns):
+    # Un modèle (tendance + saisonnalités hebdomadaire et annuelle) par série, ajusté en bloc
+    # et mis en cache pour la version courante des données
+    forecast_keys = [c for c in ('hotel', 'room_type', 'channel') if c in data.columns]
+    forecast = kpi_cache.shared_cache().get_or_compute(
+        'forecast', {'keys': forecast_keys, 'horizon': 30}, data_version,
+        lambda: hotel_kpi.forecast_series(data, forecast_keys, horizon=30, clip=(0, 1)), source='hotel_data.csv')
+
+    # Choix de la série affichée
+    series_forecast = forecast
+    for key_col, key in zip(st.columns(len(forecast_keys) or 1), forecast_keys):
+        value = key_col.selectbox(key, forecast[key].unique(), key=f'forecast_{key}')
+        series_forecast = series_forecast[series_forecast[key] == value]
+
+    # Affichage des prédictions et de l'intervalle à 95 %
+    prediction_fig = px.line(series_forecast, x='date', y=['forecast', 'lower', 'upper'],
+                             title="Prévisions de Taux d'Occupation")
+    prediction_fig.update_traces(line_dash='dot', selector=lambda trace: trace.name != 'forecast')
     st.plotly_chart(prediction_fig)
     st.write("Tableau des Prévisions de Taux d'Occupation")
-    st.dataframe(pd.DataFrame({"Date": future_dates, "Taux d'Occupation Prévu": predictions}))
+    st.dataframe(series_forecast[['date', 'forecast', 'lower', 'upper']])
+
+    # Qualité de la prévision : erreurs mesurées sur des origines glissantes de l'historique
+    if st.checkbox("Évaluer la prévision (backtest)"):
+        try:
+            quality = kpi_cache.shared_cache().get_or_compute(
+                'forecast_backtest', {'keys': forecast_keys, 'horizon': 30}, data_version,
+                lambda: hotel_kpi.rolling_backtest(data, forecast_keys, horizon=30, clip=(0, 1)), source='hotel_data.csv')
+        except ValueError as e:
+            st.warning(str(e))
+        else:
+            st.caption(f"{quality['folds']} origines de prévision")
+            quality_fig = px.line(quality['horizon'], x='horizon', y='mape', title="MAPE (%) par horizon (jours)")
+            st.plotly_chart(quality_fig)
+            st.write("Erreurs par horizon")
+            st.dataframe(quality['horizon'])
+            st.write("Erreurs par série")
+            st.dataframe(quality['series'].sort_values('mape', ascending=False))
 else:
-    st.warning("Impossible de faire des prévisions sans colonne 'Date'.")
+    st.warning("Impossible de faire des prévisions sans colonnes 'date' et 'occupancy_rate'.")
 
 # Exportation des Rapports
 st.header("Exportation des Rapports")
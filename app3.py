@@ -1,27 +1,43 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sklearn.linear_model import LinearRegression
-import numpy as np
+
+import downsample
+import hotel_kpi
+import ingestion
+import kpi_cache
+import rollup
+import storage
 
 # Titre de l'application
 st.title("Application Complète de Gestion Hôtelière")
 
 # Chargement des données
-@st.cache
+@st.cache_resource
+def get_loader():
+    # Chargeur partagé : à chaque rerun, seules les lignes ajoutées au CSV sont parsées
+    return ingestion.IncrementalCsvLoader("hotel_data_extended.csv", initial_loader=storage.load_table_with_watermark)
+
+@st.cache_resource
+def get_cube():
+    # Cube d'agrégats abonné au chargeur : les lignes ajoutées au CSV y sont fusionnées à l'ingestion
+    cube = rollup.RollupCube(keys=['date', 'department'], measures=['revenue', 'cost'])
+    get_loader().subscribe(cube.on_ingest, replay=True)
+    return cube
+
 def load_data():
-    data = pd.read_csv("hotel_data_extended.csv")
-    return data
+    # Frame et version lus ensemble : la version sert de clé de cache des prévisions
+    return get_loader().snapshot()
 
-data = load_data()
+data, data_version = load_data()
 
 # Sidebar pour les filtres
 st.sidebar.header("Filtres")
 selected_department = st.sidebar.selectbox("Département", ["Réception", "Restauration", "Housekeeping", "Maintenance", "Spa", "Boutique"])
 selected_period = st.sidebar.selectbox("Période", ["Jour", "Semaine", "Mois", "Année"])
 
-# Filtrage des données
-filtered_data = data[data["Department"] == selected_department]
+# Filtrage des données (les CSV générés n'ont pas de colonne 'Department' : pas de filtre)
+filtered_data = data[data["Department"] == selected_department] if "Department" in data.columns else data
 
 # KPI Globaux
 st.header("KPI Globaux")
@@ -32,38 +48,91 @@ col3.metric("Revenu total", "$1,200,000", "$50,000")
 
 # Analyse des Centres de Coûts
 st.header("Analyse des Centres de Coûts")
-cost_fig = px.bar(data, x="Department", y="Cost", title="Coûts par Département")
-st.plotly_chart(cost_fig)
-st.write("Tableau des Coûts par Département")
-st.dataframe(data[["Department", "Cost"]].groupby("Department").sum().reset_index())
+if {'Department', 'Cost'} <= set(data.columns):
+    cost_fig = px.bar(data, x="Department", y="Cost", title="Coûts par Département")
+    st.plotly_chart(cost_fig)
+    st.write("Tableau des Coûts par Département")
+    st.dataframe(data[["Department", "Cost"]].groupby("Department").sum().reset_index())
+else:
+    st.warning("Impossible d'afficher les coûts par département sans colonnes 'Department' et 'Cost'.")
 
 # Analyse des KPI Financiers
 st.header("Analyse des KPI Financiers")
-revenue_fig = px.line(data, x="Date", y="Revenue", title="Revenus Mensuels")
+# Sommes par période lues dans le cube pré-agrégé (pas de ré-agrégation des lignes brutes)
+revenue_by_period = (get_cube().query(rollup.PERIOD_GRAINS[selected_period], by=['date'])
+                     [['date', 'revenue']].rename(columns={'date': 'Date', 'revenue': 'Revenue'}))
+# Points réduits à la largeur du graphique (pics et creux conservés)
+revenue_fig = px.line(downsample.downsample(revenue_by_period, "Date", "Revenue"), x="Date", y="Revenue",
+                      title=f"Revenus par période ({selected_period})")
 st.plotly_chart(revenue_fig)
-st.write("Tableau des Revenus Mensuels")
-st.dataframe(data[["Date", "Revenue"]].groupby("Date").sum().reset_index())
+st.write("Tableau des Revenus par période")
+st.dataframe(revenue_by_period)
 
-# Analyse des Points de Vente
+# Analyse des Points de Vente (colonnes absentes des CSV générés : section ignorée sans elles)
 st.header("Analyse des Points de Vente")
-sales_data = data[data["Type"] == "Point de Vente"]
-sales_fig = px.bar(sales_data, x="Point de Vente", y="Revenus", title="Revenus par Point de Vente")
-st.plotly_chart(sales_fig)
-st.write("Tableau des Revenus par Point de Vente")
-st.dataframe(sales_data[["Point de Vente", "Revenus"]].groupby("Point de Vente").sum().reset_index())
+if {'Type', 'Point de Vente', 'Revenus'} <= set(data.columns):
+    sales_data = data[data["Type"] == "Point de Vente"]
+    sales_fig = px.bar(sales_data, x="Point de Vente", y="Revenus", title="Revenus par Point de Vente")
+    st.plotly_chart(sales_fig)
+    st.write("Tableau des Revenus par Point de Vente")
+    st.dataframe(sales_data[["Point de Vente", "Revenus"]].groupby("Point de Vente").sum().reset_index())
+else:
+    st.warning("Impossible d'afficher les points de vente sans colonnes 'Type', 'Point de Vente' et 'Revenus'.")
 
 # Analyse des Ressources Humaines
 st.header("Analyse des Ressources Humaines")
-hr_data = data[data["Type"] == "Ressources Humaines"]
-hr_fig = px.bar(hr_data, x="Department", y="Cost", title="Coûts de Main-d'œuvre par Département")
-st.plotly_chart(hr_fig)
-st.write("Tableau des Coûts de Main-d'œuvre par Département")
-st.dataframe(hr_data[["Department", "Cost"]].groupby("Department").sum().reset_index())
+if {'Type', 'Department', 'Cost'} <= set(data.columns):
+    hr_data = data[data["Type"] == "Ressources Humaines"]
+    hr_fig = px.bar(hr_data, x="Department", y="Cost", title="Coûts de Main-d'œuvre par Département")
+    st.plotly_chart(hr_fig)
+    st.write("Tableau des Coûts de Main-d'œuvre par Département")
+    st.dataframe(hr_data[["Department", "Cost"]].groupby("Department").sum().reset_index())
+else:
+    st.warning("Impossible d'afficher les coûts de main-d'œuvre sans colonnes 'Type', 'Department' et 'Cost'.")
 
 # Analyse Prédictive Budgétaire
 st.header("Analyse Prédictive Budgétaire")
-# Préparation des données pour la prédiction
-X = np.array(data['Date'].astype('datetime64[ns]').astype(int)).reshape(-1, 1)
-y = data['OccupancyRate']
+if {'date', 'occupancy_rate'} <= set(data.columns):
+    # Un modèle (tendance + saisonnalités hebdomadaire et annuelle) par série, ajusté en bloc
+    # et mis en cache pour la version courante des données
+    forecast_keys = [c for c in ('hotel', 'room_type', 'channel') if c in data.columns]
+    # hotel_data_extended.csv exprime l'occupation en pourcentage (0-100), hotel_data.csv en fraction
+    occupancy_clip = (0, 100) if data['occupancy_rate'].max() > 1 else (0, 1)
+    forecast = kpi_cache.shared_cache().get_or_compute(
+        'forecast', {'keys': forecast_keys, 'horizon': 30, 'clip': occupancy_clip}, data_version,
+        lambda: hotel_kpi.forecast_series(data, forecast_keys, horizon=30, clip=occupancy_clip),
+        source='hotel_data_extended.csv')
+
+    # Choix de la série affichée
+    series_forecast = forecast
+    for key_col, key in zip(st.columns(len(forecast_keys) or 1), forecast_keys):
+        value = key_col.selectbox(key, forecast[key].unique(), key=f'forecast_{key}')
+        series_forecast = series_forecast[series_forecast[key] == value]
+
+    # Affichage des prédictions et de l'intervalle à 95 %
+    prediction_fig = px.line(series_forecast, x='date', y=['forecast', 'lower', 'upper'],
+                             title="Prévisions de Taux d'Occupation")
+    prediction_fig.update_traces(line_dash='dot', selector=lambda trace: trace.name != 'forecast')
+    st.plotly_chart(prediction_fig)
+    st.write("Tableau des Prévisions de Taux d'Occupation")
+    st.dataframe(series_forecast[['date', 'forecast', 'lower', 'upper']])
 
-# Entraînement du
+    # Qualité de la prévision : erreurs mesurées sur des origines glissantes de l'historique
+    if st.checkbox("Évaluer la prévision (backtest)"):
+        try:
+            quality = kpi_cache.shared_cache().get_or_compute(
+                'forecast_backtest', {'keys': forecast_keys, 'horizon': 30, 'clip': occupancy_clip}, data_version,
+                lambda: hotel_kpi.rolling_backtest(data, forecast_keys, horizon=30, clip=occupancy_clip),
+                source='hotel_data_extended.csv')
+        except ValueError as e:
+            st.warning(str(e))
+        else:
+            st.caption(f"{quality['folds']} origines de prévision")
+            quality_fig = px.line(quality['horizon'], x='horizon', y='mape', title="MAPE (%) par horizon (jours)")
+            st.plotly_chart(quality_fig)
+            st.write("Erreurs par horizon")
+            st.dataframe(quality['horizon'])
+            st.write("Erreurs par série")
+            st.dataframe(quality['series'].sort_values('mape', ascending=False))
+else:
+    st.warning("Impossible de faire des prévisions sans colonnes 'date' et 'occupancy_rate'.")
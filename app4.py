@@ -3,95 +3,109 @@
 # Description: Application Streamlit pour suivre les KPI hôteliers (occupancy, ADR, RevPAR, GOPPAR, revenus par département, coûts, etc.).
 # Correction intégrée : utilisation de "with pd.ExcelWriter" au lieu de writer.save()
 
+import hashlib
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from io import BytesIO
 from datetime import datetime, timedelta
 
+import artifact_cache
+import data_generator
+import data_grid
+import downsample
+import exports
+import figure_cache
+import filter_index
+import hotel_kpi
+import kpi_cache
+import profiling
+import rollup
+import schema
+import upload_parser
+
 st.set_page_config(page_title="Hotel KPI Dashboard", layout="wide")
 
+# Profil du rerun courant (temps, lignes, mémoire par étape), affiché dans la sidebar et journalisé
+PROFILE = profiling.Profiler('app4')
+
+# Cache disque des artefacts coûteux (jeux générés, exports), partagé entre processus
+ARTIFACTS = artifact_cache.ArtifactCache()
+
 # ----------------------
 # Utils : génération et chargement des données
 # ----------------------
 @st.cache_data
 def generate_synthetic_hotel_data(start_date='2024-01-01', end_date=None, hotel_name='Hôtel des Îles'):
+    # Génération vectorisée (voir data_generator.py), réutilisée entre processus via le cache disque
     if end_date is None:
         end_date = datetime.today().strftime('%Y-%m-%d')
-    start = pd.to_datetime(start_date)
-    end = pd.to_datetime(end_date)
-    dates = pd.date_range(start, end, freq='D')
-
-    room_types = ['Single', 'Double', 'Deluxe', 'Suite']
-    channels = ['Direct', 'OTA', 'Corporate', 'Agency']
-
-    rows = []
-    np.random.seed(42)
-    for d in dates:
-        for rt in room_types:
-            capacity = {'Single':10, 'Double':30, 'Deluxe':15, 'Suite':5}[rt]
-            occupied = np.random.binomial(capacity, p=0.6 + 0.15 * np.sin((d.timetuple().tm_yday/365.0)*2*np.pi))
-            adr = round({
-                'Single': 60 + 10*np.random.randn(),
-                'Double': 90 + 12*np.random.randn(),
-                'Deluxe': 140 + 20*np.random.randn(),
-                'Suite': 260 + 40*np.random.randn()
-            }[rt], 2)
-            room_revenue = occupied * adr
-            fnb_revenue = round(room_revenue * np.random.uniform(0.05, 0.25), 2)
-            spa_revenue = round(room_revenue * np.random.uniform(0.0, 0.08), 2)
-            other_revenue = round(np.random.uniform(50, 250), 2)
-            total_revenue = room_revenue + fnb_revenue + spa_revenue + other_revenue
-
-            # Costs (approximation)
-            rooms_cost = round(room_revenue * np.random.uniform(0.15, 0.30), 2)
-            fnb_cost = round(fnb_revenue * np.random.uniform(0.25, 0.45), 2)
-            spa_cost = round(spa_revenue * np.random.uniform(0.2, 0.4), 2)
-            other_cost = round(other_revenue * np.random.uniform(0.3, 0.6), 2)
-            total_cost = rooms_cost + fnb_cost + spa_cost + other_cost
-
-            channel = np.random.choice(channels, p=[0.35, 0.4, 0.15, 0.1])
-
-            rows.append({
-                'hotel': hotel_name,
-                'date': d,
-                'room_type': rt,
-                'capacity': capacity,
-                'occupied': int(occupied),
-                'adr': float(max(20, adr)),
-                'room_revenue': round(room_revenue, 2),
-                'fnb_revenue': fnb_revenue,
-                'spa_revenue': spa_revenue,
-                'other_revenue': other_revenue,
-                'total_revenue': round(total_revenue, 2),
-                'rooms_cost': rooms_cost,
-                'fnb_cost': fnb_cost,
-                'spa_cost': spa_cost,
-                'other_cost': other_cost,
-                'total_cost': round(total_cost, 2),
-                'channel': channel
-            })
-
-    df = pd.DataFrame(rows)
-    # Calculs dérivés
-    df['occupancy_rate'] = df['occupied'] / df['capacity']
-    df['revpar'] = df['room_revenue'] / df['capacity']
-    df['gop'] = df['total_revenue'] - df['total_cost']
-    df['goppar'] = df['gop'] / df['capacity']
-    return df
-
-@st.cache_data
-def load_data(uploaded_file):
-    if uploaded_file is None:
-        return None
+    key = artifact_cache.artifact_key('synthetic_hotel_data', start_date=start_date, end_date=end_date,
+                                      hotel_name=hotel_name, seed=42)
+    return ARTIFACTS.get_or_create_frame(key, lambda: data_generator.generate_synthetic_hotel_data(
+        start_date=start_date, end_date=end_date, hotel_name=hotel_name, seed=42))
+
+@st.cache_resource(max_entries=4)
+def load_data(_uploaded_file, upload_hash):
+    # Lecture par blocs validée : (DataFrame compact, rapport d'erreurs, nombre de lignes invalides),
+    # une fois par contenu téléversé et partagée sans copie entre reruns et sessions : en lecture seule
+    _uploaded_file.seek(0)
+    return upload_parser.parse_upload(_uploaded_file)
+
+def read_upload(uploaded_file):
+    # (résultat de load_data ou None en cas d'erreur, empreinte du contenu)
+    upload_hash = hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
     try:
-        df = pd.read_csv(uploaded_file, parse_dates=['date'])
-        return df
+        return load_data(uploaded_file, upload_hash), upload_hash
+    except upload_parser.SchemaError as e:
+        st.error(f"Fichier non conforme: {e}")
     except Exception as e:
         st.error(f"Erreur lecture fichier: {e}")
-        return None
+    return None, upload_hash
+
+@st.cache_resource(max_entries=4)
+def build_rollup_cube(_df, data_key):
+    # Cube matérialisé une fois par jeu de données (data_key), partagé entre les reruns
+    return rollup.RollupCube(_df)
+
+@st.cache_resource(max_entries=4)
+def build_filter_index(_df, data_key):
+    # Données triées par (hotel, date) + bitmaps room_type/channel, construits une fois par jeu
+    return filter_index.FilterIndex(_df)
+
+@st.cache_resource(max_entries=4)
+def build_data_grid(_dff, data_key, selection):
+    # Grille paginée d'une sélection : tris par colonne et vues filtrées calculés une fois, partagés entre les reruns
+    return data_grid.PagedGrid(_dff)
+
+# Cache KPI partagé par toutes les sessions du processus (persistance disque si KPI_CACHE_DIR est défini)
+KPI_CACHE = kpi_cache.shared_cache(persist_dir=os.environ.get('KPI_CACHE_DIR'))
+
+def cached_kpi(name, data_key, compute, **selection):
+    # data_key = (source, version) : un changement de version invalide les résultats de la source
+    source, version = data_key
+    return KPI_CACHE.get_or_compute(name, selection, version, compute, source=source)
+
+# Figures mémorisées (JSON) par section, jeu de données et sélection : un rerun dont seuls d'autres
+# widgets ont changé ne reconstruit aucune figure
+FIGURES = figure_cache.shared_cache()
+
+def cached_figure(name, data_key, build, **selection):
+    source, version = data_key
+    return FIGURES.get_or_build(name, version, selection, build, source=source)
+
+# Fragments : un widget interne (zoom, tri, simulateur...) ne relance que son fragment, avec les
+# entrées passées en argument lors du dernier rerun complet ; les filtres du haut relancent tout le script
+def fragment_profiler(name):
+    # Rerun du fragment seul : le profil du rerun complet est déjà clos, le fragment a le sien
+    return profiling.Profiler(f'app4:{name}') if PROFILE.finished else PROFILE
+
+def finish_fragment(profile):
+    if profile is not PROFILE:
+        summary = profile.finish()
+        st.caption(f"Section recalculée seule en {summary.loc['TOTAL', 'seconds'] * 1000:.0f} ms")
 
 # ----------------------
 # Sidebar : paramètres global
@@ -99,16 +113,27 @@ def load_data(uploaded_file):
 st.sidebar.header("Paramètres")
 use_sample = st.sidebar.checkbox('Utiliser jeu de données fictif (hotel_data.csv généré)', value=True)
 uploaded = st.sidebar.file_uploader('Ou téléversez votre propre CSV', type=['csv'])
-
-if use_sample and uploaded is None:
-    df = generate_synthetic_hotel_data(start_date=(datetime.today()-timedelta(days=365)).strftime('%Y-%m-%d'))
-    try:
-        df.to_csv('hotel_data.csv', index=False)
-    except Exception:
-        pass
-else:
-    df_upload = load_data(uploaded) if uploaded is not None else None
-    df = df_upload if df_upload is not None else generate_synthetic_hotel_data(start_date=(datetime.today()-timedelta(days=365)).strftime('%Y-%m-%d'))
+show_portfolio = st.sidebar.checkbox('Vue portefeuille (tous les hôtels)', value=False)
+
+sample_start = (datetime.today()-timedelta(days=365)).strftime('%Y-%m-%d')
+with PROFILE.stage('load') as stage:
+    if use_sample and uploaded is None:
+        df = generate_synthetic_hotel_data(start_date=sample_start)
+        data_key = ('sample', sample_start)
+        try:
+            df.to_csv('hotel_data.csv', index=False)
+        except Exception:
+            pass
+    else:
+        upload, upload_hash = read_upload(uploaded) if uploaded is not None else (None, None)
+        df_upload = upload[0] if upload is not None else None
+        if upload is not None and upload[2]:
+            st.sidebar.warning(f"{upload[2]:,} ligne(s) invalide(s) ignorée(s)")
+            with st.sidebar.expander("Rapport d'erreurs"):
+                st.dataframe(upload[1])
+        df = df_upload if df_upload is not None else generate_synthetic_hotel_data(start_date=sample_start)
+        data_key = (f'upload:{upload_hash}', upload_hash) if df_upload is not None else ('sample', sample_start)
+    stage.set_rows_out(df)
 
 # ----------------------
 # Top filters in UI
@@ -126,150 +151,315 @@ with col3:
     room_types = ['All'] + sorted(df['room_type'].unique().tolist())
     room_choice = st.selectbox('Type de chambre', room_types, index=0)
 
-channels = ['All'] + sorted(df['channel'].unique().tolist())
-channel_choice = st.multiselect('Canal de vente (filtre multiple)', channels, default=['All'])
+col4, col5 = st.columns([3,1])
+with col4:
+    channels = ['All'] + sorted(df['channel'].unique().tolist())
+    channel_choice = st.multiselect('Canal de vente (filtre multiple)', channels, default=['All'])
+with col5:
+    grain_label = st.selectbox('Granularité', list(rollup.PERIOD_GRAINS), index=0)
+    grain = rollup.PERIOD_GRAINS[grain_label]
 
-# Apply filters
+# Apply filters (index trié : coût proportionnel à la sélection, sans copie)
 start_date, end_date = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
-mask = (df['date'] >= start_date) & (df['date'] <= end_date) & (df['hotel'] == hotel)
-if room_choice != 'All':
-    mask &= (df['room_type'] == room_choice)
-if channel_choice and ('All' not in channel_choice):
-    mask &= df['channel'].isin(channel_choice)
-
-dff = df.loc[mask].copy()
+room_sel = None if room_choice == 'All' else [room_choice]
+channel_sel = None if (not channel_choice or 'All' in channel_choice) else channel_choice
+with PROFILE.stage('filter', rows_in=df) as stage:
+    dff = stage.set_rows_out(build_filter_index(df, data_key).frame(hotel, start_date, end_date, room_sel, channel_sel))
 if dff.empty:
     st.warning('Aucune donnée pour les filtres sélectionnés. Ajustez la période ou les filtres.')
+    PROFILE.finish()
     st.stop()
 
 # ----------------------
 # KPI calculations
 # ----------------------
-agg = dff.groupby('date').agg({
-    'capacity':'sum',
-    'occupied':'sum',
-    'room_revenue':'sum',
-    'total_revenue':'sum',
-    'total_cost':'sum',
-    'gop':'sum'
-}).reset_index()
-agg['occupancy_rate'] = agg['occupied'] / agg['capacity']
-agg['adr'] = agg['room_revenue'] / agg['occupied'].replace(0, np.nan)
-agg['revpar'] = agg['room_revenue'] / agg['capacity']
-agg['goppar'] = agg['gop'] / agg['capacity']
-
+# Sommes additives lues dans le cube pré-agrégé, ratios dérivés à la requête
+with PROFILE.stage('rollup_cube', rows_in=df):
+    cube = build_rollup_cube(df, data_key)
+cube_filters = dict(hotel=hotel, start_date=start_date, end_date=end_date, room_types=room_sel, channels=channel_sel)
+with PROFILE.stage('groupby_daily', rows_in=dff) as stage:
+    agg = stage.set_rows_out(cached_kpi('daily', data_key, lambda: cube.query(grain, **cube_filters),
+                                        grain=grain, **cube_filters))
+
+kpis = hotel_kpi.dashboard_kpis(agg)
 kpi_cols = st.columns(5)
-kpi_cols[0].metric('Occupancy rate (avg)', f"{(agg['occupancy_rate'].mean()*100):.1f}%")
-kpi_cols[1].metric('ADR (avg)', f"€{agg['adr'].mean():.2f}")
-kpi_cols[2].metric('RevPAR (avg)', f"€{agg['revpar'].mean():.2f}")
-kpi_cols[3].metric('GOP (sum)', f"€{agg['gop'].sum():,.2f}")
-kpi_cols[4].metric('GOPPAR (avg)', f"€{agg['goppar'].mean():.2f}")
+kpi_cols[0].metric('Occupancy rate (avg)', f"{(kpis['occupancy_rate']*100):.1f}%")
+kpi_cols[1].metric('ADR (avg)', f"€{kpis['adr']:.2f}")
+kpi_cols[2].metric('RevPAR (avg)', f"€{kpis['revpar']:.2f}")
+kpi_cols[3].metric('GOP (sum)', f"€{kpis['gop']:,.2f}")
+kpi_cols[4].metric('GOPPAR (avg)', f"€{kpis['goppar']:.2f}")
 
 # ----------------------
 # Time series charts
 # ----------------------
-st.markdown('### 📈 Évolution des KPI')
-fig1 = go.Figure()
-fig1.add_trace(go.Scatter(x=agg['date'], y=agg['occupancy_rate'], name='Occupancy Rate', mode='lines+markers'))
-fig1.add_trace(go.Scatter(x=agg['date'], y=agg['adr'], name='ADR', yaxis='y2', mode='lines'))
-fig1.update_layout(
-    xaxis_title='Date',
-    yaxis_title='Occupancy rate',
-    yaxis=dict(tickformat='.0%'),
-    yaxis2=dict(title='ADR (€)', overlaying='y', side='right')
-)
-st.plotly_chart(fig1, use_container_width=True)
-
-fig2 = px.line(agg, x='date', y='revpar', title='RevPAR — évolution')
-st.plotly_chart(fig2, use_container_width=True)
-
-# Revenue breakdown by department
-st.markdown('### 🔍 Répartition des revenus')
-rev_sum = dff[['room_revenue','fnb_revenue','spa_revenue','other_revenue']].sum().reset_index()
-rev_sum.columns = ['department','amount']
-rev_sum['department'] = rev_sum['department'].str.replace('_revenue','').str.upper()
-fig3 = px.pie(rev_sum, names='department', values='amount', title='Répartition des revenus par département')
-st.plotly_chart(fig3, use_container_width=True)
-
-# Revenue & cost over time
-st.markdown('### 💰 Revenus vs Coûts')
-rc = dff.groupby('date').agg({'total_revenue':'sum','total_cost':'sum'}).reset_index()
-fig4 = px.area(rc, x='date', y=['total_revenue','total_cost'], labels={'value':'€','variable':'Ligne'})
-st.plotly_chart(fig4, use_container_width=True)
+@st.fragment
+def kpi_charts(agg, dff, data_key, grain, cube_filters):
+    profile = fragment_profiler('charts')
+    st.markdown('### 📈 Évolution des KPI')
+    # Zoom côté serveur : la fenêtre est relue en détail puis réduite à la largeur des graphiques
+    series, zoom = agg, None
+    if agg['date'].nunique() > 1:
+        first_date, last_date = agg['date'].min().to_pydatetime(), agg['date'].max().to_pydatetime()
+        zoom = st.slider('Fenêtre des graphiques', min_value=first_date, max_value=last_date,
+                         value=(first_date, last_date), format='DD/MM/YYYY')
+        series = downsample.window(agg, 'date', pd.Timestamp(zoom[0]), pd.Timestamp(zoom[1]))
+    series_selection = dict(grain=grain, zoom=zoom, **cube_filters)
+    with profile.stage('figure_kpi', rows_in=series):
+        def build_kpi_figure():
+            kpi_points = downsample.downsample(series, 'date', ['occupancy_rate', 'adr'])
+            fig1 = go.Figure()
+            fig1.add_trace(go.Scatter(x=kpi_points['date'], y=kpi_points['occupancy_rate'], name='Occupancy Rate', mode='lines+markers'))
+            fig1.add_trace(go.Scatter(x=kpi_points['date'], y=kpi_points['adr'], name='ADR', yaxis='y2', mode='lines'))
+            fig1.update_layout(
+                xaxis_title='Date',
+                yaxis_title='Occupancy rate',
+                yaxis=dict(tickformat='.0%'),
+                yaxis2=dict(title='ADR (€)', overlaying='y', side='right')
+            )
+            return fig1
+        fig1 = cached_figure('kpi', data_key, build_kpi_figure, **series_selection)
+        st.plotly_chart(fig1, use_container_width=True)
+
+    with profile.stage('figure_revpar', rows_in=series):
+        fig2 = cached_figure('revpar', data_key, lambda: px.line(downsample.downsample(series, 'date', 'revpar'),
+                                                                 x='date', y='revpar', title='RevPAR — évolution'),
+                             **series_selection)
+        st.plotly_chart(fig2, use_container_width=True)
+
+    # Revenue breakdown by department
+    st.markdown('### 🔍 Répartition des revenus')
+    with profile.stage('revenue_breakdown', rows_in=dff):
+        fig3 = cached_figure('revenue_breakdown', data_key,
+                             lambda: px.pie(hotel_kpi.revenue_breakdown(dff), names='department', values='amount',
+                                            title='Répartition des revenus par département'),
+                             **cube_filters)
+        st.plotly_chart(fig3, use_container_width=True)
+
+    # Revenue & cost over time
+    st.markdown('### 💰 Revenus vs Coûts')
+    with profile.stage('figure_revenue_cost', rows_in=series):
+        def build_revenue_cost_figure():
+            rc = downsample.downsample(series[['date','total_revenue','total_cost']], 'date', ['total_revenue','total_cost'])
+            return px.area(rc, x='date', y=['total_revenue','total_cost'], labels={'value':'€','variable':'Ligne'})
+        fig4 = cached_figure('revenue_cost', data_key, build_revenue_cost_figure, **series_selection)
+        st.plotly_chart(fig4, use_container_width=True)
+    finish_fragment(profile)
+
+kpi_charts(agg, dff, data_key, grain, cube_filters)
 
 # ----------------------
 # Breakdown by room type
 # ----------------------
 st.markdown('### 🛏️ Performance par type de chambre')
-by_room = dff.groupby('room_type').agg({'capacity':'sum','occupied':'sum','room_revenue':'sum','gop':'sum'}).reset_index()
-by_room['occupancy'] = by_room['occupied'] / by_room['capacity']
-by_room['adr'] = by_room['room_revenue'] / by_room['occupied'].replace(0, np.nan)
-by_room['revpar'] = by_room['room_revenue'] / by_room['capacity']
-st.dataframe(by_room.style.format({'adr':'{:.2f}','revpar':'{:.2f}','occupancy':'{:.2%}','gop':'{:.2f}'}))
-
-fig5 = px.bar(by_room, x='room_type', y='revpar', title='RevPAR par type de chambre')
-st.plotly_chart(fig5, use_container_width=True)
+with PROFILE.stage('groupby_room_type', rows_in=dff) as stage:
+    by_room = cached_kpi('by_room', data_key, lambda: cube.query(grain, by=['room_type'], **cube_filters),
+                         grain=grain, **cube_filters).rename(columns={'occupancy_rate':'occupancy'})
+    by_room = stage.set_rows_out(by_room[['room_type','capacity','occupied','room_revenue','gop','occupancy','adr','revpar']])
+with PROFILE.stage('table_room_type', rows_in=by_room):
+    st.dataframe(by_room.style.format({'adr':'{:.2f}','revpar':'{:.2f}','occupancy':'{:.2%}','gop':'{:.2f}'}))
+
+with PROFILE.stage('figure_room_type', rows_in=by_room):
+    fig5 = cached_figure('room_type', data_key,
+                         lambda: px.bar(by_room, x='room_type', y='revpar', title='RevPAR par type de chambre'),
+                         grain=grain, **cube_filters)
+    st.plotly_chart(fig5, use_container_width=True)
 
 # ----------------------
 # Table and download
 # ----------------------
-st.markdown('### 📋 Données détaillées')
-st.dataframe(dff.sort_values('date').reset_index(drop=True))
-
-def to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='data')
-    processed_data = output.getvalue()
-    return processed_data
-
-col_dl1, col_dl2 = st.columns(2)
-with col_dl1:
-    csv = dff.to_csv(index=False).encode('utf-8')
-    st.download_button(label='Télécharger CSV', data=csv, file_name='hotel_data_filtered.csv', mime='text/csv')
-with col_dl2:
-    xlsx_data = to_excel(dff)
-    st.download_button(label='Télécharger Excel', data=xlsx_data, file_name='hotel_data_filtered.xlsx', mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+@st.fragment
+def detail_table(dff, data_key, cube_filters):
+    profile = fragment_profiler('detail_table')
+    st.markdown('### 📋 Données détaillées')
+    grid = build_data_grid(dff, data_key, tuple(cube_filters.items()))
+    grid_col1, grid_col2, grid_col3 = st.columns([2, 2, 1])
+    with grid_col1:
+        sort_by = st.selectbox('Trier par', list(dff.columns), index=list(dff.columns).index('date'))
+        ascending = st.checkbox('Ordre croissant', value=True)
+    with grid_col2:
+        filter_col = st.selectbox('Filtrer la colonne', ['(aucune)'] + [c for c in dff.columns if c != 'date'])
+        grid_filters = {}
+        if filter_col != '(aucune)':
+            if pd.api.types.is_numeric_dtype(dff[filter_col]):
+                col_min, col_max = float(dff[filter_col].min()), float(dff[filter_col].max())
+                grid_filters[filter_col] = st.slider('Valeurs', min_value=col_min, max_value=col_max,
+                                                     value=(col_min, col_max)) if col_max > col_min else (col_min, col_max)
+            else:
+                grid_filters[filter_col] = st.multiselect('Valeurs', grid.values(filter_col), default=grid.values(filter_col))
+    with profile.stage('table_detail', rows_in=dff) as stage:
+        view = grid.view(sort_by, ascending, grid_filters)
+        with grid_col3:
+            page_size = st.selectbox('Lignes par page', data_grid.PAGE_SIZES,
+                                     index=data_grid.PAGE_SIZES.index(data_grid.DEFAULT_PAGE_SIZE))
+            page = st.number_input('Page', min_value=1, max_value=data_grid.page_count(len(view), page_size), value=1) - 1
+        page_rows = stage.set_rows_out(grid.page(view, page, page_size))
+        st.dataframe(page_rows)
+        st.caption(f"Lignes {min(page * page_size + 1, len(view)):,}–{min((page + 1) * page_size, len(view)):,} "
+                   f"sur {len(view):,}")
+
+    # Exports générés uniquement au clic, réutilisés pour une même sélection sur un même jeu de données
+    export_inputs = dict(data=data_key, **cube_filters)
+    col_dl1, col_dl2 = st.columns(2)
+    for col_dl, fmt, label in [(col_dl1, 'csv', 'Télécharger CSV'), (col_dl2, 'xlsx', 'Télécharger Excel')]:
+        with col_dl, profile.stage(f'export_{fmt}', rows_in=dff):
+            export_key = artifact_cache.artifact_key(f'export_{fmt}', **export_inputs)
+            export = exports.LazyExport(dff, fmt, cache=ARTIFACTS, key=export_key)
+            st.download_button(label=label, data=export, file_name=f'hotel_data_filtered.{fmt}', mime=export.mime)
+            timing = exports.last_timing(export_key)
+            if timing:
+                st.caption(f"Généré en {timing['seconds']:.2f} s ({timing['rows']:,} lignes"
+                           f"{', depuis le cache' if timing['cached'] else ''})")
+    finish_fragment(profile)
+
+detail_table(dff, data_key, cube_filters)
 
 # ----------------------
 # Insights & simple actions
 # ----------------------
 st.markdown('### ✅ Insights rapides & recommandations')
-insights = []
-if agg['occupancy_rate'].mean() < 0.55:
-    insights.append('- Occupancy faible: envisager promotions mid-week ou offres packages.')
-if agg['adr'].mean() < 80:
-    insights.append('- ADR relativement bas: revoir segmentation tarifaire et canaux OTA.')
-if (by_room['revpar'].max() - by_room['revpar'].min()) / (by_room['revpar'].max()+1e-9) > 0.4:
-    insights.append('- Grande variance de RevPAR entre types de chambre: optimiser tarif et overbooking par segment.')
-if dff['channel'].value_counts(normalize=True).idxmax() == 'OTA':
-    insights.append('- Forte dépendance aux OTA: renforcer canal direct (promos, fidélité).')
+insights = hotel_kpi.quick_insights(kpis, by_room['revpar'], dff['channel'].value_counts(normalize=True).idxmax())
 
 if not insights:
     st.write('Aucun signal critique détecté sur la période choisie. Continuez la surveillance régulière.')
 else:
     for i in insights:
-        st.write(i)
+        st.write(f'- {i}')
 
 # ----------------------
 # Simple scenario simulator
 # ----------------------
-st.markdown("### 🔮 Simulateur rapide — Impact d'une hausse d'ADR ou d'occupation")
-sim_col1, sim_col2 = st.columns(2)
-with sim_col1:
-    adr_delta = st.slider('Augmenter ADR de (%)', min_value=0, max_value=50, value=0)
-with sim_col2:
-    occ_delta = st.slider('Augmenter Occupancy de (points %)', min_value=0, max_value=30, value=0)
-
-sim_df = dff.copy()
-sim_df['sim_adr'] = sim_df['adr'] * (1 + adr_delta/100)
-sim_df['sim_occupied'] = (sim_df['occupied'] * (1 + occ_delta/100)).round().astype(int)
-sim_df['sim_room_revenue'] = sim_df['sim_adr'] * sim_df['sim_occupied']
-sim_total_revenue = sim_df['sim_room_revenue'].sum() + sim_df['fnb_revenue'].sum() + sim_df['spa_revenue'].sum() + sim_df['other_revenue'].sum()
-orig_total_revenue = dff['total_revenue'].sum()
-st.write(f"Revenu total actuel: €{orig_total_revenue:,.2f}")
-st.write(f"Revenu total simulé: €{sim_total_revenue:,.2f}")
-st.write(f"Delta: €{(sim_total_revenue - orig_total_revenue):,.2f}")
+@st.fragment
+def simulator(dff):
+    profile = fragment_profiler('simulator')
+    st.markdown("### 🔮 Simulateur rapide — Impact d'une hausse d'ADR ou d'occupation")
+    sim_col1, sim_col2 = st.columns(2)
+    with sim_col1:
+        adr_delta = st.slider('Augmenter ADR de (%)', min_value=0, max_value=50, value=0)
+    with sim_col2:
+        occ_delta = st.slider('Augmenter Occupancy de (points %)', min_value=0, max_value=30, value=0)
+
+    with profile.stage('simulator', rows_in=dff):
+        orig_total_revenue, sim_total_revenue = hotel_kpi.simulate_revenue(dff, adr_delta, occ_delta)
+    st.write(f"Revenu total actuel: €{orig_total_revenue:,.2f}")
+    st.write(f"Revenu total simulé: €{sim_total_revenue:,.2f}")
+    st.write(f"Delta: €{(sim_total_revenue - orig_total_revenue):,.2f}")
+    finish_fragment(profile)
+
+simulator(dff)
+
+# Grille de scénarios : toute la surface de réponse ADR x occupation, en un calcul sur la sélection
+@st.fragment
+def scenario_grid_section(dff, data_key, cube_filters):
+    profile = fragment_profiler('scenario_grid')
+    with st.expander("Grille de scénarios (ADR x occupation)"):
+        st.caption("Ajustements additionnels par segment (ADR en %, occupation en points), cumulés à la grille")
+        seg_col1, seg_col2 = st.columns(2)
+        with seg_col1:
+            room_adjust = st.data_editor(pd.DataFrame({'room_type': sorted(dff['room_type'].unique().tolist()),
+                                                       'adr_delta': 0.0, 'occ_points': 0.0}),
+                                         hide_index=True, disabled=['room_type'], key='scenario_room_type')
+        with seg_col2:
+            channel_adjust = st.data_editor(pd.DataFrame({'channel': sorted(dff['channel'].unique().tolist()),
+                                                          'adr_delta': 0.0, 'occ_points': 0.0}),
+                                            hide_index=True, disabled=['channel'], key='scenario_channel')
+        adr_by = {'room_type': dict(zip(room_adjust['room_type'], room_adjust['adr_delta'])),
+                  'channel': dict(zip(channel_adjust['channel'], channel_adjust['adr_delta']))}
+        occ_by = {'room_type': dict(zip(room_adjust['room_type'], room_adjust['occ_points'])),
+                  'channel': dict(zip(channel_adjust['channel'], channel_adjust['occ_points']))}
+
+        with profile.stage('scenario_grid', rows_in=dff) as stage:
+            scenarios = stage.set_rows_out(hotel_kpi.scenario_grid(dff, range(0, 51, 5), range(0, 31, 3),
+                                                                   adr_by=adr_by, occ_by=occ_by))
+        fig_grid = cached_figure('scenario_grid', data_key,
+                                 lambda: px.imshow(scenarios.pivot(index='adr_delta', columns='occ_points', values='delta'),
+                                                   text_auto='.3s', aspect='auto', color_continuous_scale='RdYlGn',
+                                                   labels={'x': 'Occupation (points)', 'y': 'ADR (%)', 'color': 'Delta €'},
+                                                   title='Delta de revenu total par scénario'),
+                                 adr_by=adr_by, occ_by=occ_by, **cube_filters)
+        st.plotly_chart(fig_grid, use_container_width=True)
+        st.dataframe(scenarios.style.format({'total_revenue': '{:,.0f}', 'delta': '{:+,.0f}', 'room_revenue': '{:,.0f}',
+                                             'occupied': '{:,.0f}', 'occupancy_rate': '{:.2%}', 'revpar': '{:.2f}'}))
+    finish_fragment(profile)
+
+scenario_grid_section(dff, data_key, cube_filters)
+
+# ----------------------
+# Risque : simulation Monte Carlo de la période sélectionnée
+# ----------------------
+@st.fragment
+def monte_carlo_section(df, data_key, hotel, start_date, end_date):
+    profile = fragment_profiler('monte_carlo')
+    st.markdown('### 🎲 Risque — simulation Monte Carlo')
+    if st.checkbox("Simuler revenu, coûts et GOP de la période (lois ajustées sur l'historique de l'hôtel)", value=False):
+        mc_col1, mc_col2 = st.columns(2)
+        with mc_col1:
+            n_scenarios = st.select_slider('Scénarios', options=[10_000, 50_000, 100_000, 200_000], value=100_000)
+        with mc_col2:
+            mc_seed = int(st.number_input('Graine', min_value=0, value=42, step=1))
+        period_days = (end_date - start_date).days + 1
+        hotel_history = df[df['hotel'] == hotel]
+        with profile.stage('monte_carlo', rows_in=hotel_history):
+            simulation = cached_kpi('monte_carlo', data_key,
+                                    lambda: hotel_kpi.montecarlo.simulate(hotel_history, period_days, n_scenarios, mc_seed),
+                                    hotel=hotel, days=period_days, scenarios=n_scenarios, seed=mc_seed)
+            risk = hotel_kpi.risk_summary(simulation)
+        gop_risk = risk[(risk['metric'] == 'gop') & (risk['hotel'] == hotel)].iloc[0]
+        st.write(f"GOP attendu sur {period_days} jours : €{gop_risk['mean']:,.0f} — "
+                 f"VaR 95 % : €{gop_risk['var_95']:,.0f} (5 % des scénarios sous €{gop_risk['p5']:,.0f})")
+        def build_monte_carlo_figure():
+            counts, edges = np.histogram(simulation['gop'][:, simulation['hotels'].index(hotel)], bins=60)
+            fig_mc = px.bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, labels={'x': 'GOP (€)', 'y': 'Scénarios'},
+                            title=f'Distribution du GOP — {n_scenarios:,} scénarios')
+            fig_mc.add_vline(x=gop_risk['p5'], line_dash='dash', annotation_text='p5')
+            return fig_mc
+        fig_mc = cached_figure('monte_carlo', data_key, build_monte_carlo_figure,
+                               hotel=hotel, days=period_days, scenarios=n_scenarios, seed=mc_seed)
+        st.plotly_chart(fig_mc, use_container_width=True)
+        st.dataframe(risk.drop(columns='hotel').style.format(
+            {col: '{:,.0f}' for col in risk.columns if col not in ('hotel', 'metric')}))
+    finish_fragment(profile)
+
+monte_carlo_section(df, data_key, hotel, start_date, end_date)
+
+# ----------------------
+# Portfolio view (tous les hôtels, agrégation parallèle)
+# ----------------------
+if show_portfolio:
+    st.markdown('### 🏢 Classement du portefeuille')
+    with PROFILE.stage('portfolio', rows_in=df):
+        portfolio = cached_kpi('portfolio', data_key,
+                               lambda: hotel_kpi.aggregate_portfolio(df, start_date=start_date, end_date=end_date),
+                               start_date=start_date, end_date=end_date)
+    ranking = portfolio['ranking']
+    st.caption(f"{len(ranking):,} hôtel(s) — période du {start_date:%d/%m/%Y} au {end_date:%d/%m/%Y}")
+    st.dataframe(ranking.style.format({'occupancy_rate': '{:.2%}', 'adr': '{:.2f}', 'revpar': '{:.2f}',
+                                       'goppar': '{:.2f}', 'trevpar': '{:.2f}', 'room_revenue': '{:,.0f}',
+                                       'total_revenue': '{:,.0f}', 'total_cost': '{:,.0f}', 'gop': '{:,.0f}'}))
+    fig6 = cached_figure('portfolio', data_key,
+                         lambda: px.bar(ranking.head(20), x='hotel', y='revpar', title='RevPAR — 20 premiers hôtels'),
+                         start_date=start_date, end_date=end_date)
+    st.plotly_chart(fig6, use_container_width=True)
+    with st.expander('Détail par canal'):
+        st.dataframe(portfolio['channel'])
+
+cache_stats = KPI_CACHE.stats()
+st.sidebar.caption(f"Cache KPI : {cache_stats['hits']} hits / {cache_stats['misses']} misses — "
+                   f"{cache_stats['entries']} entrées, {cache_stats['bytes'] / 1e6:.1f} Mo")
+figure_stats = FIGURES.stats()
+st.sidebar.caption(f"Cache figures : {figure_stats['hits']} hits / {figure_stats['misses']} misses — "
+                   f"{figure_stats['entries']} figures, {figure_stats['bytes'] / 1e6:.1f} Mo")
+if st.sidebar.checkbox('Afficher la mémoire des données', value=False):
+    # Référence : les mêmes données relues par un pd.read_csv sans options (calculé une fois par jeu)
+    mem = cached_kpi('memory_report', data_key, lambda: schema.memory_report(df))
+    st.sidebar.caption(f"{mem.loc['TOTAL', 'bytes_after'] / 1e6:.2f} Mo en types compacts "
+                       f"(x{mem.loc['TOTAL', 'ratio']:.1f} vs pd.read_csv par défaut)")
+    with st.sidebar.expander('Détail par colonne'):
+        st.dataframe(mem)
+
+# Profil du rerun (journalisé dans profiling.PROFILE_LOG_PATH)
+profile = PROFILE.finish()
+with st.sidebar.expander(f"Profil du rerun — {profile.loc['TOTAL', 'seconds'] * 1000:.0f} ms"):
+    st.dataframe(profile.style.format({'seconds': '{:.4f}', 'rss_delta_mb': '{:+.1f}'}, na_rep=''))
 
 # ----------------------
 # Footer
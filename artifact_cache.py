@@ -0,0 +1,162 @@
+# Cache disque adressé par contenu pour les artefacts coûteux
+# File: artifact_cache.py
+# Description: Stocke sur disque les jeux générés, les exports xlsx/csv et le JSON des figures,
+# sous une clé dérivée des entrées. Écritures atomiques (fichier temporaire + os.replace),
+# éviction LRU bornée en taille, utilisable par plusieurs processus Streamlit d'un même hôte.
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from io import BytesIO
+
+import pandas as pd
+
+from kpi_cache import canonical_value
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus, les écritures restent atomiques
+    fcntl = None
+
+DEFAULT_ROOT = os.environ.get('ARTIFACT_CACHE_DIR', '.artifact_cache')
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+LOCK_FILE = '.lock'
+
+
+def artifact_key(kind, **inputs):
+    """Clé de contenu : hash des entrées qui déterminent entièrement l'artefact"""
+    payload = json.dumps([kind, canonical_value(inputs)], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key, ext):
+        return os.path.join(self.root, key[:2], f'{key}.{ext}')
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # ----------------------
+    # Lecture / écriture brutes
+    # ----------------------
+    def get_bytes(self, key, ext):
+        path = self.path(key, ext)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # l'horodatage sert d'ordre LRU pour l'éviction
+        except OSError:
+            pass
+        return data
+
+    def put_file(self, key, ext, writer):
+        """Écrit l'artefact en flux via writer(fichier binaire), puis le publie atomiquement"""
+        path = self.path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                writer(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+        return path
+
+    def put_bytes(self, key, ext, data):
+        return self.put_file(key, ext, lambda f: f.write(data))
+
+    def get_or_create_file(self, key, ext, writer):
+        """Chemin de l'artefact, écrit en flux par writer s'il n'est pas en cache ; (chemin, trouvé)"""
+        path = self.path(key, ext)
+        if os.path.exists(path):
+            try:
+                os.utime(path)
+                return path, True
+            except FileNotFoundError:
+                pass
+        return self.put_file(key, ext, writer), False
+
+    def get_or_create_bytes(self, key, ext, producer):
+        data = self.get_bytes(key, ext)
+        if data is None:
+            data = producer()
+            self.put_bytes(key, ext, data)
+        return data
+
+    # ----------------------
+    # Types d'artefacts
+    # ----------------------
+    def get_or_create_frame(self, key, producer):
+        """DataFrame stocké en Parquet"""
+        data = self.get_bytes(key, 'parquet')
+        if data is not None:
+            return pd.read_parquet(BytesIO(data))
+        df = producer()
+        buffer = BytesIO()
+        df.to_parquet(buffer, index=False)
+        self.put_bytes(key, 'parquet', buffer.getvalue())
+        return df
+
+    def get_or_create_json(self, key, producer):
+        """Chaîne JSON (ex: fig.to_json() d'une figure Plotly)"""
+        return self.get_or_create_bytes(key, 'json', lambda: producer().encode('utf-8')).decode('utf-8')
+
+    # ----------------------
+    # Éviction
+    # ----------------------
+    def _entries(self):
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name == LOCK_FILE:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.endswith('.tmp') and time.time() - stat.st_mtime < 3600:
+                    continue  # écriture en cours dans un autre processus
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Supprime les artefacts les moins récemment utilisés jusqu'à repasser sous max_bytes"""
+        with self._locked():
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+            return total
@@ -0,0 +1,299 @@
+# Rapports KPI par lots pour tous les hôtels, sans Streamlit
+# File: batch_report.py
+# Description: Calcule pour chaque hôtel et chaque période (jour, semaine, mois ou année) les cartes KPI,
+# les recommandations rapides, la répartition des revenus et le tableau par type de chambre d'app4.py,
+# puis écrit un dossier de rapport par hôtel (CSV, xlsx, HTML) et un sommaire du portefeuille ; en
+# option, les tableaux financiers d'analyse_app.py. Les données sont chargées une fois et placées en
+# mémoire partagée ; les hôtels sont répartis entre les processus d'un pool borné (--workers).
+# N'importe ni Streamlit ni Plotly : démarrage rapide pour un traitement de nuit.
+#
+# Usage :
+#   python batch_report.py hotel_data.csv --grain month --output reports
+#   python batch_report.py --hotels 50 --start-date 2024-01-01 --end-date 2024-12-31 --workers 4 --formats csv html
+
+import argparse
+import hashlib
+import html
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+
+import numpy as np
+import pandas as pd
+
+import data_generator
+import storage
+from hotel_kpi import AnalyseFinanciereAccor, dashboard_kpis, derive_ratios, quick_insights, revenue_breakdown
+from hotel_kpi.metrics import ADDITIVE_MEASURES, REVENUE_COLUMNS, wide_measures
+from hotel_kpi.periods import GRAINS, period_start
+from hotel_kpi.portfolio import SharedFrame, frame_from_spec
+
+DEFAULT_GRAIN = 'month'
+DEFAULT_OUTPUT = 'reports'
+FORMATS = ('csv', 'xlsx', 'html')
+TASKS_PER_WORKER = 2
+KEYS = ['hotel', 'date', 'room_type', 'channel']
+COLUMNS = KEYS + ADDITIVE_MEASURES + [c for c in REVENUE_COLUMNS if c not in ADDITIVE_MEASURES]
+# Colonnes du tableau "Performance par type de chambre" d'app4
+ROOM_COLUMNS = ['room_type', 'capacity', 'occupied', 'room_revenue', 'gop', 'occupancy', 'adr', 'revpar']
+PERCENT_COLUMNS = ('occupancy_rate', 'occupancy')
+# Dossiers écrits à la racine de --output en dehors des hôtels (voir write_accor_pack)
+RESERVED_DIRS = ('accor',)
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+  body {{ font-family: sans-serif; margin: 2rem; }}
+  h1, h2 {{ color: #1f77b4; }}
+  table {{ border-collapse: collapse; margin-bottom: 1.5rem; }}
+  th, td {{ border: 1px solid #ddd; padding: 0.25rem 0.5rem; text-align: right; }}
+  th {{ background-color: #f0f2f6; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{body}
+</body>
+</html>
+"""
+
+
+# ----------------------
+# Chargement partagé
+# ----------------------
+def load_frame(path=None, hotels=None, start_date=None, end_date=None, seed=42):
+    """Jeu complet chargé une fois : CSV (via le stockage Parquet partitionné) ou jeu synthétique"""
+    if path:
+        return storage.load_table(path, columns=COLUMNS)
+    return data_generator.generate_synthetic_hotel_data(start_date=start_date or '2024-01-01', end_date=end_date,
+                                                        hotels=hotels, seed=seed)
+
+
+def sorted_frame(df):
+    """Colonnes du rapport triées par (hotel, date), catégories pour le texte et mesures sur 64 bits"""
+    frame = df[COLUMNS].astype(wide_measures(df, ADDITIVE_MEASURES + REVENUE_COLUMNS))
+    for col in ('hotel', 'room_type', 'channel'):
+        if not isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].astype('category')
+    order = np.lexsort([frame['date'].to_numpy(), frame['hotel'].cat.codes.to_numpy()])
+    return frame.take(order).reset_index(drop=True)
+
+
+def hotel_bounds(frame):
+    """Plages de lignes [lo, hi) de chaque hôtel d'un frame trié par hôtel"""
+    codes = frame['hotel'].cat.codes.to_numpy()
+    edges = np.concatenate([[0], np.flatnonzero(codes[1:] != codes[:-1]) + 1, [len(frame)]])
+    return [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+
+# ----------------------
+# Rapport d'un hôtel
+# ----------------------
+def hotel_report(frame, grain=DEFAULT_GRAIN):
+    """Tables du rapport d'un hôtel, une entrée par période : kpis, insights, revenue, room_type
+
+    Les cartes KPI sont celles d'app4 au grain jour (moyenne des ratios journaliers, GOP cumulé) sur
+    chaque période ; le tableau par type de chambre reprend ses colonnes.
+    """
+    frame = frame.assign(period=period_start(frame['date'], grain).to_numpy())
+    daily = derive_ratios(frame.groupby(['period', 'date'], observed=True)[ADDITIVE_MEASURES].sum().reset_index())
+    rooms = derive_ratios(frame.groupby(['period', 'room_type'], observed=True)[ADDITIVE_MEASURES].sum().reset_index())
+    rooms = rooms.rename(columns={'occupancy_rate': 'occupancy'})[['period'] + ROOM_COLUMNS]
+    channels = frame.groupby(['period', 'channel'], observed=True).size()
+    top_channel = channels.groupby(level='period').idxmax().map(lambda key: key[1])
+
+    # Revenus par département, en colonnes libellées comme revenue_breakdown
+    revenue = frame.groupby('period')[REVENUE_COLUMNS].sum()
+    revenue = revenue.set_axis(revenue_breakdown(revenue)['department'].tolist(), axis=1).reset_index()
+
+    kpis, insights = [], []
+    room_groups = dict(list(rooms.groupby('period')))
+    for period, days in daily.groupby('period'):
+        period_kpis = dashboard_kpis(days)
+        messages = quick_insights(period_kpis, room_groups[period]['revpar'], top_channel[period])
+        kpis.append({'period': period, 'start': days['date'].min(), 'end': days['date'].max(),
+                     'days': len(days), **period_kpis, 'insights': len(messages)})
+        insights.extend({'period': period, 'insight': message} for message in messages)
+    return {
+        'kpis': pd.DataFrame(kpis),
+        'insights': pd.DataFrame(insights, columns=['period', 'insight']),
+        'revenue': revenue,
+        'room_type': rooms.reset_index(drop=True),
+    }
+
+
+# ----------------------
+# Écriture des rapports
+# ----------------------
+def slug(name):
+    """Nom de dossier sûr pour un hôtel (lettres, chiffres, - et _)"""
+    return re.sub(r'[^\w-]+', '_', str(name)).strip('_') or 'hotel'
+
+
+def hotel_dirs(names, reserved=RESERVED_DIRS):
+    """Dossier de chaque hôtel : son slug, suffixé d'une empreinte courte du nom brut quand plusieurs
+    noms donnent le même slug (casse ignorée, pour les systèmes de fichiers insensibles) ou un dossier réservé
+    """
+    names = list(dict.fromkeys(str(name) for name in names))
+    counts = Counter(slug(name).lower() for name in names)
+    used = {r.lower() for r in reserved}
+    dirs = {}
+    for name in names:
+        directory = slug(name)
+        if counts[directory.lower()] > 1 or directory.lower() in used:
+            directory = f"{directory}_{hashlib.blake2b(name.encode('utf-8'), digest_size=4).hexdigest()}"
+        # Cas extrême : le suffixe retombe sur le slug d'un autre hôtel
+        base, n = directory, 1
+        while directory.lower() in used:
+            n += 1
+            directory = f'{base}_{n}'
+        used.add(directory.lower())
+        dirs[name] = directory
+    return dirs
+
+
+def _html_table(df):
+    formatters = {col: '{:.1%}'.format for col in PERCENT_COLUMNS if col in df.columns}
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            formatters[col] = lambda value: f'{value:%Y-%m-%d}'
+    return df.to_html(index=False, formatters=formatters, float_format='{:,.2f}'.format, na_rep='', border=0)
+
+
+def render_html(title, tables):
+    body = []
+    for name, df in tables.items():
+        body.append(f'<h2>{html.escape(name)}</h2>')
+        body.append(_html_table(df) if not df.empty else '<p>Aucune donnée.</p>')
+    return HTML_TEMPLATE.format(title=html.escape(title), body='\n'.join(body))
+
+
+def write_pack(directory, title, tables, formats=FORMATS):
+    """Écrit les tables d'un rapport dans directory : un CSV par table, un classeur xlsx, une page HTML"""
+    os.makedirs(directory, exist_ok=True)
+    if 'csv' in formats:
+        for name, df in tables.items():
+            df.to_csv(os.path.join(directory, f'{name}.csv'), index=False)
+    if 'xlsx' in formats:
+        with pd.ExcelWriter(os.path.join(directory, 'report.xlsx'), engine='xlsxwriter',
+                            datetime_format='yyyy-mm-dd') as writer:
+            for name, df in tables.items():
+                df.to_excel(writer, sheet_name=name[:31], index=False)
+    if 'html' in formats:
+        with open(os.path.join(directory, 'report.html'), 'w', encoding='utf-8') as f:
+            f.write(render_html(title, tables))
+    return directory
+
+
+def report_hotels(frame, bounds, grain, output, formats, dirs=None):
+    """Rapports des hôtels des plages bounds ; renvoie les cartes KPI par période de chacun
+
+    dirs (nom -> dossier, voir hotel_dirs) doit couvrir tout le lot quand il est réparti entre processus.
+    """
+    dirs = dirs or hotel_dirs(frame['hotel'].iloc[lo] for lo, _ in bounds)
+    summaries = []
+    for lo, hi in bounds:
+        rows = frame.iloc[lo:hi]
+        hotel = rows['hotel'].iloc[0]
+        tables = hotel_report(rows, grain)
+        write_pack(os.path.join(output, dirs[str(hotel)]), f'Rapport KPI — {hotel}', tables, formats)
+        summaries.append(tables['kpis'].assign(hotel=hotel))
+    return summaries
+
+
+# ----------------------
+# Travail d'un worker
+# ----------------------
+_worker = {}
+
+
+def _init_worker(spec):
+    _worker['segments'] = []
+    _worker['frame'] = frame_from_spec(spec, _worker['segments'])
+
+
+def _run_task(bounds, grain, output, formats, dirs):
+    return report_hotels(_worker['frame'], bounds, grain, output, formats, dirs)
+
+
+# ----------------------
+# Lot complet
+# ----------------------
+def run_batch(df, grain=DEFAULT_GRAIN, output=DEFAULT_OUTPUT, formats=FORMATS, workers=None,
+              tasks_per_worker=TASKS_PER_WORKER, mp_context=None):
+    """Rapports de tous les hôtels de df et sommaire du portefeuille ; renvoie le sommaire
+
+    Avec workers > 1, les hôtels sont répartis en plages entre les processus, qui lisent les colonnes
+    en mémoire partagée (aucune copie des données par processus).
+    """
+    if grain not in GRAINS:
+        raise ValueError(f"Grain inconnu : {grain} (attendu {', '.join(GRAINS)})")
+    workers = workers or os.cpu_count() or 1
+    frame = sorted_frame(df)
+    bounds = hotel_bounds(frame)
+    # Dossiers attribués sur l'ensemble des hôtels : deux noms au même slug ne s'écrasent pas,
+    # même traités par des processus différents
+    dirs = hotel_dirs(frame['hotel'].iloc[lo] for lo, _ in bounds)
+    n_tasks = min(len(bounds), workers * tasks_per_worker)
+    tasks = [bounds[i * len(bounds) // n_tasks:(i + 1) * len(bounds) // n_tasks] for i in range(n_tasks)]
+
+    if workers <= 1 or len(tasks) <= 1:
+        summaries = [report_hotels(frame, part, grain, output, formats, dirs) for part in tasks]
+    else:
+        if mp_context is None:
+            mp_context = 'forkserver' if 'forkserver' in get_all_start_methods() else 'spawn'
+        with SharedFrame(frame, COLUMNS) as shared:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=get_context(mp_context),
+                                     initializer=_init_worker, initargs=(shared.spec,)) as pool:
+                summaries = list(pool.map(_run_task, tasks, [grain] * len(tasks), [output] * len(tasks),
+                                          [formats] * len(tasks), [dirs] * len(tasks)))
+
+    frames = [summary for part in summaries for summary in part]
+    summary = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['hotel', 'period'])
+    summary = summary[['hotel'] + [c for c in summary.columns if c != 'hotel']]
+    write_pack(output, f'Sommaire du portefeuille — {len(bounds)} hôtel(s), grain {grain}', {'summary': summary}, formats)
+    return summary
+
+
+def write_accor_pack(output, formats=FORMATS):
+    """Tableaux financiers d'analyse_app.py (compte de résultat, bilan, flux, secteurs, ratios)"""
+    analyse = AnalyseFinanciereAccor()
+    tables = {name: getattr(analyse, name) for name in (
+        'compte_resultat', 'bilan_actif', 'bilan_passif', 'flux_tresorerie', 'secteurs_ca',
+        'ratios_rentabilite', 'ratios_liquidite', 'ratios_endettement')}
+    return write_pack(os.path.join(output, 'accor'), 'Analyse financière Accor — S1 2025', tables, formats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rapports KPI par lots pour tous les hôtels (sans Streamlit)')
+    parser.add_argument('input', nargs='?', help='CSV au schéma de hotel_data.csv (défaut : jeu synthétique)')
+    parser.add_argument('--hotels', type=int, default=1, help="nombre d'hôtels du jeu synthétique")
+    parser.add_argument('--start-date', help='début du jeu synthétique (défaut : 2024-01-01)')
+    parser.add_argument('--end-date', help="fin du jeu synthétique (défaut : aujourd'hui)")
+    parser.add_argument('--grain', choices=list(GRAINS), default=DEFAULT_GRAIN, help='découpage en périodes')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='répertoire des rapports')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--workers', type=int, help='processus du pool (défaut : nombre de cœurs)')
+    parser.add_argument('--accor', action='store_true', help="ajoute les tableaux financiers d'analyse_app.py")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    df = load_frame(args.input, args.hotels, args.start_date, args.end_date)
+    loaded = time.perf_counter() - t0
+    summary = run_batch(df, args.grain, args.output, args.formats, args.workers)
+    if args.accor:
+        write_accor_pack(args.output, args.formats)
+    print(f"{summary['hotel'].nunique():,} hôtel(s), {len(summary):,} période(s), {len(df):,} lignes — "
+          f"chargement {loaded:.2f} s, total {time.perf_counter() - t0:.2f} s -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+# Banc de mesure des traitements de données des tableaux de bord
+# File: benchmark.py
+# Description: Exécute sans Streamlit les étapes de données d'app4.py (génération, chargement, filtre,
+# agrégats journaliers et par type de chambre, répartition des revenus, simulateur et grille de
+# scénarios, simulation Monte Carlo, exports CSV/Excel), les prévisions et leur backtest, et les ratios
+# financiers (moteur hotel_kpi) sur des jeux synthétiques mis à l'échelle (hôtels x années).
+# Rapporte temps, pic de RSS et lignes/s en JSON, avec comparaison à une référence enregistrée.
+#
+# Usage :
+#   python benchmark.py --hotels 1 10 100 --years 1 10 --output bench.json
+#   python benchmark.py --hotels 1 10 --years 1 --baseline bench.json --tolerance 0.2
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import data_generator
+import exports
+import filter_index
+import hotel_kpi
+import profiling
+import rollup
+import upload_parser
+
+END_DATE = '2024-12-31'
+DEFAULT_HOTELS = (1, 10, 100)
+DEFAULT_YEARS = (1, 10)
+RATIOS_REPEAT = 1000
+SAMPLE_INTERVAL = 0.005
+
+
+# ----------------------
+# Mesure : temps et pic de RSS
+# ----------------------
+class _RssSampler:
+    """Échantillonne le RSS dans un thread pendant une étape et retient le maximum"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, profiling.current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = profiling.current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, profiling.current_rss())
+
+
+def measure(func, repeat=1):
+    """Exécute func repeat fois ; renvoie (dernier résultat, meilleur temps en s, pic de RSS en octets)"""
+    best, peak, result = None, 0, None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        with _RssSampler() as sampler:
+            t0 = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+        peak = max(peak, sampler.peak)
+    return result, best, peak
+
+
+# ----------------------
+# Étapes d'app4.py (mêmes appels que le tableau de bord, sans interface)
+# ----------------------
+def _scale_dates(years):
+    end = pd.Timestamp(END_DATE)
+    start = end - pd.DateOffset(years=years) + pd.Timedelta(days=1)
+    return start.strftime('%Y-%m-%d'), END_DATE
+
+
+def _export(writer, df):
+    buf = BytesIO()
+    writer(df, buf)
+    return buf.getbuffer().nbytes
+
+
+def _accor_ratios():
+    analyse = hotel_kpi.AnalyseFinanciereAccor()
+
+    def run():
+        for _ in range(RATIOS_REPEAT):
+            analyse.calculer_ratios()
+        return analyse.ratios_endettement
+    return run
+
+
+def run_scale(hotels, years, repeat=1, steps=None, workdir=None):
+    """Mesure toutes les étapes pour un jeu de hotels hôtels x years années ; renvoie une liste de résultats"""
+    start_date, end_date = _scale_dates(years)
+    scale = f'{hotels}h_{years}y'
+    results = []
+
+    def record(step, func, rows, n_repeat=repeat):
+        if steps and step not in steps:
+            return None
+        value, seconds, peak = measure(func, n_repeat)
+        results.append({
+            'scale': scale, 'hotels': hotels, 'years': years, 'step': step, 'rows': int(rows),
+            'seconds': seconds, 'peak_rss_mb': peak / 1e6,
+            'rows_per_sec': rows / seconds if seconds > 0 else None,
+        })
+        return value
+
+    df = data_generator.generate_synthetic_hotel_data(start_date=start_date, end_date=end_date, hotels=hotels)
+    n = len(df)
+    record('generate', lambda: data_generator.generate_synthetic_hotel_data(
+        start_date=start_date, end_date=end_date, hotels=hotels), n)
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        csv_path = os.path.join(tmp, 'hotel_data.csv')
+        df.to_csv(csv_path, index=False)
+        loaded = record('load', lambda: upload_parser.parse_upload(csv_path), n)
+        record('stream_kpis', lambda: hotel_kpi.stream_kpis(csv_path, chunk_rows=100_000), n)
+    if loaded is not None:
+        df = loaded[0]
+
+    # Sélection type du tableau de bord : premier hôtel, toute la période, tous types et canaux
+    hotel = df['hotel'].iloc[0]
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    index = filter_index.FilterIndex(df)
+    record('filter_index', lambda: filter_index.FilterIndex(df), n)
+    dff = index.frame(hotel, start, end, None, None)
+    record('filter', lambda: index.frame(hotel, start, end, None, None), n)
+
+    cube = rollup.RollupCube(df)
+    record('rollup_build', lambda: rollup.RollupCube(df), n)
+    record('portfolio', lambda: hotel_kpi.aggregate_portfolio(df), n)
+    filters = dict(hotel=hotel, start_date=start, end_date=end, room_types=None, channels=None)
+    record('daily_agg', lambda: cube.query('day', **filters), len(dff))
+    record('room_type_agg', lambda: cube.query('day', by=['room_type'], **filters), len(dff))
+    record('revenue_breakdown', lambda: hotel_kpi.revenue_breakdown(dff), len(dff))
+    record('simulator', lambda: hotel_kpi.simulate_revenue(dff, adr_delta=10, occ_delta=5), len(dff))
+    record('monte_carlo', lambda: hotel_kpi.monte_carlo(df, days=30), n)
+    record('scenario_grid', lambda: hotel_kpi.scenario_grid(dff, range(0, 51, 5), range(0, 31, 3)), len(dff))
+    record('forecast', lambda: hotel_kpi.forecast_series(df, ['hotel', 'room_type', 'channel']), n)
+    record('backtest', lambda: hotel_kpi.rolling_backtest(df, ['hotel', 'room_type', 'channel'], clip=(0, 1)), n)
+    record('export_csv', lambda: _export(exports.write_csv, dff), len(dff))
+    record('export_xlsx', lambda: _export(exports.write_xlsx, dff), len(dff))
+    return results
+
+
+def run_suite(hotels=DEFAULT_HOTELS, years=DEFAULT_YEARS, repeat=1, steps=None, workdir=None):
+    """Exécute le banc complet ; renvoie le document JSON (métadonnées + résultats)"""
+    results = []
+    if not steps or 'accor_ratios' in steps:
+        _, seconds, peak = measure(_accor_ratios(), repeat)
+        results.append({'scale': 'accor', 'hotels': None, 'years': None, 'step': 'accor_ratios',
+                        'rows': RATIOS_REPEAT, 'seconds': seconds, 'peak_rss_mb': peak / 1e6,
+                        'rows_per_sec': RATIOS_REPEAT / seconds if seconds > 0 else None})
+    for h in hotels:
+        for y in years:
+            print(f'... {h} hôtel(s) x {y} an(s)', file=sys.stderr)
+            results.extend(run_scale(h, y, repeat, steps, workdir))
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+# ----------------------
+# Comparaison à une référence
+# ----------------------
+def compare(current, baseline, tolerance=0.2):
+    """Compare deux documents ; renvoie une ligne par (échelle, étape) commune, régressions signalées"""
+    base = {(r['scale'], r['step']): r for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        ref = base.get((r['scale'], r['step']))
+        if ref is None or not ref['seconds']:
+            continue
+        ratio = r['seconds'] / ref['seconds']
+        rows.append({
+            'scale': r['scale'], 'step': r['step'],
+            'baseline_s': ref['seconds'], 'current_s': r['seconds'], 'ratio': ratio,
+            'baseline_rss_mb': ref['peak_rss_mb'], 'current_rss_mb': r['peak_rss_mb'],
+            'regression': ratio > 1 + tolerance,
+        })
+    return rows
+
+
+def _print_table(results):
+    frame = pd.DataFrame(results)
+    with pd.option_context('display.width', 160, 'display.max_rows', None, 'display.float_format', '{:.4g}'.format):
+        print(frame.to_string(index=False), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Banc de mesure des traitements de données (sans Streamlit)')
+    parser.add_argument('--hotels', type=int, nargs='+', default=list(DEFAULT_HOTELS))
+    parser.add_argument('--years', type=int, nargs='+', default=list(DEFAULT_YEARS))
+    parser.add_argument('--repeat', type=int, default=3, help='répétitions par étape (meilleur temps retenu)')
+    parser.add_argument('--steps', nargs='+', help='sous-ensemble des étapes à mesurer')
+    parser.add_argument('--output', help='fichier JSON de sortie (défaut : sortie standard)')
+    parser.add_argument('--baseline', help='JSON de référence à comparer')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='ralentissement toléré (0.2 = +20 %%)')
+    args = parser.parse_args(argv)
+
+    document = run_suite(args.hotels, args.years, args.repeat, args.steps)
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            comparison = compare(document, json.load(f), args.tolerance)
+        document['comparison'] = comparison
+        _print_table(comparison)
+        exit_code = 1 if any(r['regression'] for r in comparison) else 0
+    else:
+        _print_table(document['results'])
+
+    payload = json.dumps(document, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
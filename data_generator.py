@@ -0,0 +1,163 @@
+# Générateur vectorisé de données hôtelières synthétiques
+# File: data_generator.py
+# Description: Génère le jeu hotel_data.csv (même schéma que app4.py) par tableaux NumPy entiers,
+# pour un nombre quelconque d'hôtels et de dates, avec sortie par blocs pour les très gros volumes.
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+import schema
+
+ROOM_TYPES = ['Single', 'Double', 'Deluxe', 'Suite']
+ROOM_CAPACITY = {'Single': 10, 'Double': 30, 'Deluxe': 15, 'Suite': 5}
+# (moyenne, écart-type) de l'ADR par type de chambre
+ROOM_ADR = {'Single': (60, 10), 'Double': (90, 12), 'Deluxe': (140, 20), 'Suite': (260, 40)}
+CHANNELS = ['Direct', 'OTA', 'Corporate', 'Agency']
+CHANNEL_WEIGHTS = [0.35, 0.4, 0.15, 0.1]
+
+COLUMNS = [
+    'hotel', 'date', 'room_type', 'capacity', 'occupied', 'adr',
+    'room_revenue', 'fnb_revenue', 'spa_revenue', 'other_revenue', 'total_revenue',
+    'rooms_cost', 'fnb_cost', 'spa_cost', 'other_cost', 'total_cost', 'channel',
+    'occupancy_rate', 'revpar', 'gop', 'goppar',
+]
+
+DEFAULT_CHUNK_DAYS = 366
+
+
+def _date_range(start_date, end_date):
+    if end_date is None:
+        end_date = datetime.today().strftime('%Y-%m-%d')
+    return pd.date_range(pd.to_datetime(start_date), pd.to_datetime(end_date), freq='D')
+
+
+def _hotel_names(hotels, hotel_name):
+    if hotels is None:
+        return [hotel_name]
+    if isinstance(hotels, int):
+        return [f'{hotel_name} #{i + 1}' for i in range(hotels)]
+    return list(hotels)
+
+
+def categorical_dtypes(hotel_names):
+    """Types catégoriels fixes de hotel, room_type et channel, communs à tous les blocs d'une génération
+
+    Des blocs aux catégories différentes (un seul hôtel ou canal par bloc) feraient retomber pd.concat
+    sur des chaînes ; catégories triées comme le ferait astype('category').
+    """
+    return {
+        'hotel': pd.CategoricalDtype(sorted(set(hotel_names))),
+        'room_type': pd.CategoricalDtype(sorted(ROOM_TYPES)),
+        'channel': pd.CategoricalDtype(sorted(CHANNELS)),
+    }
+
+
+def _categorical(dtype, labels, idx):
+    """Colonne catégorielle labels[idx] construite par codes, sans tableau de chaînes intermédiaire"""
+    return pd.Categorical.from_codes(dtype.categories.get_indexer(labels)[idx], dtype=dtype)
+
+
+def _generate_block(rng, hotel, dates, dtypes):
+    """Génère toutes les lignes (date x type de chambre) d'un hôtel pour un bloc de dates"""
+    n_dates, n_rt = len(dates), len(ROOM_TYPES)
+    n = n_dates * n_rt
+
+    # Ordre des lignes identique à la boucle historique : date puis type de chambre
+    rt_idx = np.tile(np.arange(n_rt), n_dates)
+    capacity = np.array([ROOM_CAPACITY[rt] for rt in ROOM_TYPES])[rt_idx]
+    doy = np.repeat(dates.dayofyear.to_numpy(), n_rt)
+    p = 0.6 + 0.15 * np.sin((doy / 365.0) * 2 * np.pi)
+    occupied = rng.binomial(capacity, p)
+
+    adr_mean = np.array([ROOM_ADR[rt][0] for rt in ROOM_TYPES], dtype=float)[rt_idx]
+    adr_std = np.array([ROOM_ADR[rt][1] for rt in ROOM_TYPES], dtype=float)[rt_idx]
+    adr = np.round(adr_mean + adr_std * rng.standard_normal(n), 2)
+
+    room_revenue = occupied * adr
+    fnb_revenue = np.round(room_revenue * rng.uniform(0.05, 0.25, n), 2)
+    spa_revenue = np.round(room_revenue * rng.uniform(0.0, 0.08, n), 2)
+    other_revenue = np.round(rng.uniform(50, 250, n), 2)
+    total_revenue = room_revenue + fnb_revenue + spa_revenue + other_revenue
+
+    # Coûts (approximation)
+    rooms_cost = np.round(room_revenue * rng.uniform(0.15, 0.30, n), 2)
+    fnb_cost = np.round(fnb_revenue * rng.uniform(0.25, 0.45, n), 2)
+    spa_cost = np.round(spa_revenue * rng.uniform(0.2, 0.4, n), 2)
+    other_cost = np.round(other_revenue * rng.uniform(0.3, 0.6, n), 2)
+    total_cost = rooms_cost + fnb_cost + spa_cost + other_cost
+
+    channel_idx = rng.choice(len(CHANNELS), size=n, p=CHANNEL_WEIGHTS)
+
+    df = pd.DataFrame({
+        'hotel': _categorical(dtypes['hotel'], [hotel], np.zeros(n, dtype=np.intp)),
+        'date': np.repeat(dates.to_numpy(), n_rt),
+        'room_type': _categorical(dtypes['room_type'], ROOM_TYPES, rt_idx),
+        'capacity': capacity,
+        'occupied': occupied.astype(int),
+        'adr': np.maximum(20, adr),
+        'room_revenue': np.round(room_revenue, 2),
+        'fnb_revenue': fnb_revenue,
+        'spa_revenue': spa_revenue,
+        'other_revenue': other_revenue,
+        'total_revenue': np.round(total_revenue, 2),
+        'rooms_cost': rooms_cost,
+        'fnb_cost': fnb_cost,
+        'spa_cost': spa_cost,
+        'other_cost': other_cost,
+        'total_cost': np.round(total_cost, 2),
+        'channel': _categorical(dtypes['channel'], CHANNELS, channel_idx),
+    })
+    # Calculs dérivés
+    df['occupancy_rate'] = df['occupied'] / df['capacity']
+    df['revpar'] = df['room_revenue'] / df['capacity']
+    df['gop'] = df['total_revenue'] - df['total_cost']
+    df['goppar'] = df['gop'] / df['capacity']
+    return schema.apply_schema(df)
+
+
+def iter_synthetic_hotel_data(start_date='2024-01-01', end_date=None, hotel_name='Hôtel des Îles',
+                              hotels=None, seed=42, chunk_days=DEFAULT_CHUNK_DAYS):
+    """Produit le jeu synthétique par blocs (un hôtel x chunk_days jours par bloc)
+
+    Chaque bloc a son propre générateur dérivé de (seed, hôtel, bloc) : le résultat est
+    reproductible pour un même seed et un même chunk_days, quelle que soit la consommation.
+    """
+    dates = _date_range(start_date, end_date)
+    names = _hotel_names(hotels, hotel_name)
+    dtypes = categorical_dtypes(names)
+    for h, hotel in enumerate(names):
+        for b, start in enumerate(range(0, len(dates), chunk_days)):
+            rng = np.random.default_rng([seed, h, b])
+            yield _generate_block(rng, hotel, dates[start:start + chunk_days], dtypes)
+
+
+def generate_synthetic_hotel_data(start_date='2024-01-01', end_date=None, hotel_name='Hôtel des Îles',
+                                  hotels=None, seed=42, chunk_days=DEFAULT_CHUNK_DAYS):
+    """Génère le jeu synthétique complet en mémoire
+
+    hotels peut être None (un seul hôtel hotel_name), un entier (n hôtels numérotés)
+    ou une liste de noms.
+    """
+    chunks = list(iter_synthetic_hotel_data(start_date, end_date, hotel_name, hotels, seed, chunk_days))
+    if not chunks:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.concat(chunks, ignore_index=True)
+    # Les blocs partagent les mêmes types catégoriels : un repli sur des chaînes serait une régression
+    lost = {c: str(df[c].dtype) for c, dtype in categorical_dtypes(_hotel_names(hotels, hotel_name)).items()
+            if df[c].dtype != dtype}
+    if lost:
+        raise TypeError(f"Types catégoriels perdus à la concaténation : {lost}")
+    return df
+
+
+def write_synthetic_csv(path, start_date='2024-01-01', end_date=None, hotel_name='Hôtel des Îles',
+                        hotels=None, seed=42, chunk_days=DEFAULT_CHUNK_DAYS):
+    """Écrit le jeu synthétique en CSV bloc par bloc (mémoire bornée) et renvoie le nombre de lignes"""
+    n_rows = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, chunk in enumerate(iter_synthetic_hotel_data(start_date, end_date, hotel_name,
+                                                             hotels, seed, chunk_days)):
+            chunk.to_csv(f, index=False, header=(i == 0))
+            n_rows += len(chunk)
+    return n_rows
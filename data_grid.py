@@ -0,0 +1,100 @@
+# Tableau de données paginé côté serveur
+# File: data_grid.py
+# Description: Sert un frame par pages triées et filtrées sans trier, copier ni sérialiser toutes ses
+# lignes à chaque rerun : l'ordre de tri d'une colonne est calculé une fois (à la première demande),
+# les vues filtrées (positions dans l'ordre d'affichage) sont gardées en cache, et une page ne lit
+# que ses page_size lignes.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_PAGE_SIZE = 50
+MAX_VIEWS = 16
+
+
+def page_count(n_rows, page_size=DEFAULT_PAGE_SIZE):
+    return max((n_rows + page_size - 1) // page_size, 1)
+
+
+def _filter_key(filters):
+    return tuple(sorted((col, tuple(v) if isinstance(v, (list, tuple)) else v) for col, v in (filters or {}).items()))
+
+
+class PagedGrid:
+    """Pages triées / filtrées d'un frame (référencé, non copié)
+
+    filters : {colonne: liste de valeurs} (appartenance) ou {colonne: (min, max)} pour une colonne
+    numérique ou de dates (bornes incluses, None pour ouvert).
+    Partagée entre sessions (st.cache_resource) : le cache des vues est protégé par un verrou.
+    """
+
+    def __init__(self, df, max_views=MAX_VIEWS):
+        self.df = df
+        self.max_views = max_views
+        self._orders = {}
+        self._values = {}
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def order(self, column, ascending=True):
+        """Positions des lignes triées par column (tri stable, valeurs manquantes à la fin), calculées une fois
+
+        En décroissant, les ex aequo gardent leur ordre d'origine et les valeurs manquantes restent à la fin.
+        """
+        key = (column, ascending)
+        if key not in self._orders:
+            values = self.df[column]
+            if values.is_monotonic_increasing if ascending else values.is_monotonic_decreasing:
+                self._orders[key] = np.arange(len(values))
+            else:
+                ranks = values.rank(method='first', ascending=ascending, na_option='bottom').to_numpy()
+                self._orders[key] = np.argsort(ranks, kind='stable')
+        return self._orders[key]
+
+    def values(self, column):
+        """Valeurs distinctes triées d'une colonne (choix d'un filtre par appartenance)"""
+        if column not in self._values:
+            self._values[column] = sorted(pd.unique(self.df[column].dropna()).tolist())
+        return self._values[column]
+
+    def _mask(self, filters):
+        mask = np.ones(len(self.df), dtype=bool)
+        for col, condition in filters.items():
+            values = self.df[col]
+            if isinstance(condition, tuple):
+                lo, hi = condition
+                if lo is not None:
+                    mask &= (values >= lo).to_numpy(dtype=bool, na_value=False)
+                if hi is not None:
+                    mask &= (values <= hi).to_numpy(dtype=bool, na_value=False)
+            else:
+                mask &= values.isin(list(condition)).to_numpy(dtype=bool, na_value=False)
+        return mask
+
+    def view(self, sort_by=None, ascending=True, filters=None):
+        """Positions des lignes retenues dans l'ordre d'affichage (mises en cache par tri et filtres)"""
+        key = (sort_by, ascending, _filter_key(filters))
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                return self._views[key]
+        positions = self.order(sort_by, ascending) if sort_by is not None else np.arange(len(self.df))
+        if filters:
+            positions = positions[self._mask(filters)[positions]]
+        with self._lock:
+            self._views[key] = positions
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+        return positions
+
+    def page(self, view, page=0, page_size=DEFAULT_PAGE_SIZE):
+        """Lignes de la page (numérotée à partir de 0) d'une vue ; seules ces lignes sont lues"""
+        start = page * page_size
+        return self.df.iloc[view[start:start + page_size]].reset_index(drop=True)
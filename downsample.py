@@ -0,0 +1,91 @@
+# Sous-échantillonnage des séries temporelles des graphiques
+# File: downsample.py
+# Description: Réduit une série à quelques points par pixel de largeur du graphique avant l'envoi au
+# navigateur : min/max par intervalle (pics et creux conservés exactement) ou LTTB (Largest Triangle
+# Three Buckets, forme visuelle conservée). Le détail est rechargé côté serveur pour une fenêtre de
+# zoom plus étroite.
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WIDTH_PX = 1200
+# Points envoyés par pixel : un minimum et un maximum par colonne de pixels
+POINTS_PER_PX = 2
+METHODS = ('minmax', 'lttb')
+
+
+def target_points(width_px=DEFAULT_WIDTH_PX):
+    return int(width_px * POINTS_PER_PX)
+
+
+def _numeric(values):
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]').astype('int64').astype('float64')
+    return values.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def minmax_indices(y, n_out):
+    """Indices du minimum et du maximum de chaque intervalle (n_out // 2 intervalles), premier et dernier point inclus"""
+    y = _numeric(y)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    n_buckets = max(n_out // 2, 1)
+    bucket = np.arange(n) * n_buckets // n
+    starts = np.searchsorted(bucket, np.arange(n_buckets))
+    counts = np.diff(np.append(starts, n))
+    keep = [[0, n - 1]]
+    for reduce in (np.fmin, np.fmax):
+        # Première position de chaque intervalle égale à son extrême (valeurs manquantes ignorées)
+        extreme = np.repeat(reduce.reduceat(y, starts), counts)
+        hits = np.flatnonzero(y == extreme)
+        keep.append(hits[np.unique(bucket[hits], return_index=True)[1]])
+    return np.unique(np.concatenate(keep))
+
+
+def lttb_indices(x, y, n_out):
+    """Indices retenus par LTTB : dans chaque intervalle, le point formant le plus grand triangle
+    avec le point retenu précédent et la moyenne de l'intervalle suivant"""
+    x, y = _numeric(x), _numeric(y)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    y = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype('int64')
+    selected = np.empty(n_out, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[previous] - cx) * (y[lo:hi] - y[previous]) - (x[previous] - x[lo:hi]) * (cy - y[previous]))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(df, x, y, width_px=DEFAULT_WIDTH_PX, method='minmax'):
+    """Lignes de df (triées sur x) à afficher pour les colonnes y sur width_px pixels
+
+    Avec plusieurs colonnes y, les points retenus pour chacune sont réunis (abscisse commune).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Méthode inconnue : {method} (attendu {', '.join(METHODS)})")
+    columns = [y] if isinstance(y, str) else list(y)
+    n_out = target_points(width_px)
+    if len(df) <= n_out:
+        return df
+    df = df.sort_values(x, kind='stable') if not df[x].is_monotonic_increasing else df
+    per_column = max(n_out // len(columns), 3)
+    if method == 'minmax':
+        keep = [minmax_indices(df[col], per_column) for col in columns]
+    else:
+        keep = [lttb_indices(df[x], df[col], per_column) for col in columns]
+    return df.iloc[np.unique(np.concatenate(keep))]
+
+
+def window(df, x, start, end):
+    """Fenêtre de zoom [start, end] sur x : rechargée côté serveur puis sous-échantillonnée à nouveau"""
+    return df[(df[x] >= start) & (df[x] <= end)]
@@ -0,0 +1,106 @@
+# Exports CSV / Excel générés à la demande
+# File: exports.py
+# Description: Les fichiers ne sont construits qu'au clic sur st.download_button (données différées),
+# écrits par blocs de lignes (classeur xlsx en mode constant_memory), réutilisés depuis le cache
+# d'artefacts pour une même sélection, avec mesure du temps de génération.
+
+import tempfile
+import time
+from collections import OrderedDict
+
+import numpy as np
+import xlsxwriter
+
+import schema
+
+DEFAULT_CHUNK_ROWS = 50_000
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+MIME_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Dernières mesures par clé d'export : {'format', 'rows', 'seconds', 'cached'}
+_timings = OrderedDict()
+_MAX_TIMINGS = 256
+
+
+def write_csv(df, f, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Écrit df en CSV UTF-8 dans le fichier binaire f, bloc par bloc"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        f.write(chunk.to_csv(index=False, header=(start == 0)).encode('utf-8'))
+
+
+def _float64(chunk):
+    """Colonnes float32 en float64 à leur valeur décimale stockée (96.52 et non 96.519997), montants au centime"""
+    narrow = [c for c in chunk.columns if chunk[c].dtype == np.float32]
+    if not narrow:
+        return chunk
+    # Représentation décimale la plus courte du float32, relue en float64
+    wide = {c: chunk[c].astype(str).astype('float64') for c in narrow}
+    wide.update({c: wide[c].round(schema.MONEY_DECIMALS) for c in narrow if c in schema.MONEY_COLUMNS})
+    return chunk.assign(**wide)
+
+
+def write_xlsx(df, f, chunk_rows=DEFAULT_CHUNK_ROWS, sheet_name='data'):
+    """Écrit df en xlsx dans le fichier binaire f ; les lignes sont écrites puis libérées (constant_memory)"""
+    workbook = xlsxwriter.Workbook(f, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd'})
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(c) for c in df.columns])
+    row = 1
+    for start in range(0, len(df), chunk_rows):
+        chunk = _float64(df.iloc[start:start + chunk_rows]).astype(object)
+        for values in chunk.where(chunk.notna(), None).to_numpy().tolist():
+            worksheet.write_row(row, 0, values)
+            row += 1
+    workbook.close()
+
+
+WRITERS = {'csv': write_csv, 'xlsx': write_xlsx}
+
+
+def last_timing(key):
+    """Mesure de la dernière génération pour cette clé d'export, ou None"""
+    return _timings.get(key)
+
+
+class LazyExport:
+    """Callable passé à st.download_button(data=...) : le fichier n'est produit qu'au téléchargement"""
+
+    def __init__(self, df, fmt, cache=None, key=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.df = df
+        self.fmt = fmt
+        self.cache = cache
+        self.key = key
+        self.chunk_rows = chunk_rows
+        self.mime = MIME_TYPES[fmt]
+
+    def _write(self, f):
+        WRITERS[self.fmt](self.df, f, chunk_rows=self.chunk_rows)
+
+    def _build_spooled(self):
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as f:
+            self._write(f)
+            f.seek(0)
+            return f.read()
+
+    def __call__(self):
+        t0 = time.perf_counter()
+        cached = False
+        if self.cache is not None and self.key is not None:
+            path, cached = self.cache.get_or_create_file(self.key, self.fmt, self._write)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:  # évincé entre-temps (artefact plus grand que le cache)
+                data, cached = self._build_spooled(), False
+        else:
+            data = self._build_spooled()
+        if self.key is not None:
+            _timings[self.key] = {'format': self.fmt, 'rows': len(self.df),
+                                  'seconds': time.perf_counter() - t0, 'cached': cached}
+            _timings.move_to_end(self.key)
+            while len(_timings) > _MAX_TIMINGS:
+                _timings.popitem(last=False)
+        return data
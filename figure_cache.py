@@ -0,0 +1,50 @@
+# Cache des figures Plotly partagé entre les reruns et les sessions
+# File: figure_cache.py
+# Description: Mémorise le JSON d'une figure par (section, version des données, sélection) : une
+# figure dont les entrées n'ont pas changé n'est ni reconstruite (px.*, go.Figure, make_subplots) ni
+# resérialisée ; seul le rendu Streamlit de la figure (validation et envoi) reste fait à chaque rerun.
+# Budget mémoire propre, distinct de celui du cache KPI.
+
+import json
+import threading
+
+import plotly.io as pio
+
+from kpi_cache import KpiCache
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class FigureCache:
+    """Figures sérialisées en JSON ; chaque lecture renvoie un nouveau dict, modifiable sans toucher au cache"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, persist_dir=None):
+        self._cache = KpiCache(max_bytes=max_bytes, persist_dir=persist_dir)
+
+    def get_or_build(self, section, data_version, selection, build, source='default'):
+        """Figure (dict Plotly, accepté par st.plotly_chart) de section pour la sélection, construite par build() si absente
+
+        Une nouvelle data_version pour une même source invalide les figures des versions antérieures.
+        """
+        text = self._cache.get_or_compute(section, selection, data_version,
+                                          lambda: pio.to_json(build(), validate=False), source=source)
+        return json.loads(text)
+
+    def invalidate(self, source, data_version=None):
+        self._cache.invalidate(source, data_version)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache(max_bytes=DEFAULT_MAX_BYTES, persist_dir=None):
+    """Instance unique du processus, partagée par toutes les sessions (paramètres pris au premier appel)"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = FigureCache(max_bytes=max_bytes, persist_dir=persist_dir)
+        return _shared_cache
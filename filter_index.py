@@ -0,0 +1,72 @@
+# Index de filtrage multi-critères pour les données hôtelières
+# File: filter_index.py
+# Description: Trie une fois les données par (hotel, date) pour résoudre les plages de dates par
+# recherche dichotomique, et pré-calcule des bitmaps de lignes par room_type et channel.
+# Une sélection renvoie une tranche (vue sans copie) ou un tableau de positions de lignes.
+
+import numpy as np
+import pandas as pd
+
+BITMAP_COLUMNS = ['room_type', 'channel']
+
+
+class FilterIndex:
+    def __init__(self, df, hotel_column='hotel', date_column='date', bitmap_columns=BITMAP_COLUMNS):
+        codes, hotels = pd.factorize(df[hotel_column], sort=True)
+        dates = df[date_column].to_numpy()
+        order = np.lexsort((dates, codes))
+
+        # Copie triée unique, faite à la construction ; les sélections n'en font plus
+        self.df = df.iloc[order].reset_index(drop=True)
+        self.dates = dates[order]
+        codes = codes[order]
+        starts = np.searchsorted(codes, np.arange(len(hotels)), side='left')
+        stops = np.searchsorted(codes, np.arange(len(hotels)), side='right')
+        self.hotel_bounds = {h: (int(a), int(b)) for h, a, b in zip(hotels, starts, stops)}
+
+        self.bitmaps = {}
+        for col in bitmap_columns:
+            values = self.df[col].to_numpy()
+            self.bitmaps[col] = {v: np.packbits(values == v) for v in pd.unique(values)}
+
+    def __len__(self):
+        return len(self.df)
+
+    def _bitmap_range(self, col, selected, lo, hi):
+        """OR des bitmaps des valeurs sélectionnées, restreint aux lignes [lo, hi)"""
+        first_byte, last_byte = lo // 8, (hi + 7) // 8
+        mask = np.zeros(hi - lo, dtype=bool)
+        for value in selected:
+            bits = self.bitmaps[col].get(value)
+            if bits is None:
+                continue
+            unpacked = np.unpackbits(bits[first_byte:last_byte], count=(last_byte - first_byte) * 8)
+            mask |= unpacked[lo - first_byte * 8:hi - first_byte * 8].astype(bool)
+        return mask
+
+    def select(self, hotel, start_date=None, end_date=None, room_types=None, channels=None):
+        """Lignes correspondant à la sélection : slice si seuls hôtel/dates filtrent, sinon positions
+
+        room_types et channels valent None pour « tous ».
+        """
+        lo, hi = self.hotel_bounds.get(hotel, (0, 0))
+        hotel_dates = self.dates[lo:hi]
+        if start_date is not None:
+            lo += int(np.searchsorted(hotel_dates, np.datetime64(pd.Timestamp(start_date)), side='left'))
+        if end_date is not None:
+            hi -= len(hotel_dates) - int(np.searchsorted(hotel_dates, np.datetime64(pd.Timestamp(end_date)),
+                                                         side='right'))
+        hi = max(lo, hi)
+        if room_types is None and channels is None:
+            return slice(lo, hi)
+
+        mask = np.ones(hi - lo, dtype=bool)
+        if room_types is not None:
+            mask &= self._bitmap_range('room_type', room_types, lo, hi)
+        if channels is not None:
+            mask &= self._bitmap_range('channel', channels, lo, hi)
+        return lo + np.flatnonzero(mask)
+
+    def frame(self, *args, **kwargs):
+        """Sous-ensemble des données triées pour la sélection (sans .copy())"""
+        return self.df.iloc[self.select(*args, **kwargs)]
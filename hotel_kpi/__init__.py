@@ -0,0 +1,34 @@
+# Moteur de calcul des KPI hôteliers
+# File: hotel_kpi/__init__.py
+# Description: Fonctions pures (sans Streamlit) appelées par les tableaux de bord, les traitements
+# par lots et les benchmarks.
+
+from .accor import AnalyseFinanciereAccor
+from .backtest import rolling_backtest
+from .finance import ratios_endettement, ratios_liquidite, ratios_rentabilite
+from .forecast import BatchForecaster, forecast_series
+from .metrics import (
+    ADDITIVE_MEASURES,
+    REVENUE_COLUMNS,
+    adr,
+    copar,
+    dashboard_kpis,
+    derive_ratios,
+    gop,
+    goppar,
+    occupancy_rate,
+    quick_insights,
+    revenue_breakdown,
+    revpar,
+    safe_divide,
+    simulate_revenue,
+    totals_kpis,
+    trevpar,
+    wide_measures,
+)
+from .periods import GRAINS, PERIOD_GRAINS, period_end, period_start
+from .montecarlo import monte_carlo, risk_summary
+from .portfolio import aggregate_portfolio
+from .scenarios import ScenarioGrid, scenario_grid
+from .sketches import build_sketch, merge_sketches, sketch_quantiles
+from .streaming import KpiAccumulator, stream_kpis
@@ -0,0 +1,126 @@
+# Données et ratios financiers Accor (S1 2024 / S1 2025)
+# File: hotel_kpi/accor.py
+# Description: Jeu de données financier codé en dur d'analyse_app.py et calcul des ratios via
+# hotel_kpi.finance, importable sans Streamlit (lots, benchmarks, cache KPI).
+
+import pandas as pd
+
+from .finance import ratios_endettement, ratios_liquidite, ratios_rentabilite
+
+# Valeurs de référence des ratios (capitaux propres, total actif, BFR, dette...) par période
+REFERENCES_RENTABILITE = {
+    'S1_2024': {'capitaux_propres': 5032, 'total_actif': 12057},
+    'S1_2025': {'capitaux_propres': 4350, 'total_actif': 11829},
+}
+REFERENCES_BILAN = {
+    'Dec_2024': {'actifs_courants': 2970, 'passifs_courants': 2819, 'stocks': 39, 'tresorerie': 1244,
+                 'dette_financiere': 3002, 'capitaux_propres': 5469, 'charges_financieres': 47},
+    'Juin_2025': {'actifs_courants': 3080, 'passifs_courants': 2753, 'stocks': 36, 'tresorerie': 1135,
+                  'dette_financiere': 3593, 'capitaux_propres': 4771, 'charges_financieres': 53},
+}
+# Période de résultat rapprochée de chaque date de bilan (endettement)
+PERIODE_RESULTAT = {'Dec_2024': 'S1_2024', 'Juin_2025': 'S1_2025'}
+
+
+def _frame(ratios, periodes):
+    """dict {ratio: valeurs par période} -> tableau Ratio x périodes affiché par analyse_app"""
+    columns = {p: [values[i] for values in ratios.values()] for i, p in enumerate(periodes)}
+    return pd.DataFrame({'Ratio': list(ratios), **columns})
+
+
+class AnalyseFinanciereAccor:
+    def __init__(self):
+        self.charger_donnees()
+
+    def charger_donnees(self):
+        """Charge les données financières d'Accor"""
+        # Compte de résultat
+        self.compte_resultat = pd.DataFrame({
+            'Poste': ['Chiffre d\'affaires', 'Charges d\'exploitation courantes',
+                     'Produits et charges non courants', 'Amortissements',
+                     'Résultat opérationnel', 'Quote-part sociétés mises en équivalence',
+                     'Résultat financier', 'Résultat avant impôts', 'Impôts sur les résultats',
+                     'Résultat net de la période', 'Part du Groupe', 'Part intérêts minoritaires'],
+            'S1_2024': [2677, -2173, -2, -159, 343, 49, -21, 372, -100, 272, 253, 19],
+            'S1_2025': [2745, -2193, 2, -155, 399, -19, -52, 328, -69, 258, 233, 25]
+        })
+
+        # État de la situation financière
+        self.bilan_actif = pd.DataFrame({
+            'Poste': ['Ecarts d\'acquisition', 'Immobilisations incorporelles',
+                     'Immobilisations corporelles', 'Droits d\'utilisation',
+                     'Titres mis en équivalence', 'Actifs financiers non courants',
+                     'Actifs d\'impôts différés', 'Actifs sur contrats non courants',
+                     'Stocks', 'Clients', 'Autres actifs courants',
+                     'Actifs sur contrats courants', 'Créances d\'impôt courant',
+                     'Autres actifs financiers courants', 'Trésorerie et équivalents',
+                     'Actifs destinés à être cédés'],
+            'Dec_2024': [2398, 3197, 372, 680, 1367, 373, 268, 431, 39, 803, 504, 38, 30, 158, 1244, 155],
+            'Juin_2025': [2332, 3023, 366, 612, 1325, 396, 253, 443, 36, 856, 553, 43, 68, 198, 1135, 192]
+        })
+
+        self.bilan_passif = pd.DataFrame({
+            'Poste': ['Capital', 'Primes et réserves', 'Résultat de l\'exercice',
+                     'Titres subordonnés à durée indéterminée', 'Intérêts minoritaires',
+                     'Dettes financières non courantes', 'Dettes de loyers non courantes',
+                     'Passifs d\'impôts différés', 'Provisions non courantes',
+                     'Engagements de retraites', 'Passifs sur contrats non courants',
+                     'Dettes financières courantes', 'Dettes de loyers courantes',
+                     'Provisions courantes', 'Fournisseurs', 'Autres passifs courants',
+                     'Passifs sur contrats courants', 'Passif programmes de fidélité',
+                     'Dettes d\'impôt courant', 'Passifs destinés à être cédés'],
+            'Dec_2024': [731, 2543, 610, 1148, 437, 2524, 627, 503, 36, 53, 27, 478, 128, 122, 557, 847, 96, 373, 144, 73],
+            'Juin_2025': [735, 2390, 233, 991, 421, 3128, 578, 484, 34, 53, 28, 465, 110, 117, 497, 862, 127, 405, 100, 71]
+        })
+
+        # Flux de trésorerie
+        self.flux_tresorerie = pd.DataFrame({
+            'Poste': ['Résultat opérationnel', 'Amortissements', 'Dépréciations d\'actifs',
+                     'Variation nette des provisions', 'Plus ou moins-values de cession',
+                     'Rémunération en actions', 'Autres éléments sans impact trésorerie',
+                     'Variation BFR', 'Variation actifs/passifs sur contrats',
+                     'Intérêts reçus/(payés)', 'Impôts sur les sociétés payés',
+                     'Flux activités opérationnelles', 'Flux d\'investissement',
+                     'Flux activités de financement', 'Variation nette trésorerie'],
+            'S1_2024': [343, 159, 30, -17, -65, 4, 17, -222, 60, -42, -108, 176, -143, -395, -362],
+            'S1_2025': [399, 155, 4, 1, -9, 22, -2, -199, 35, -37, -127, 240, -115, -200, -75]
+        })
+
+        # Information sectorielle
+        self.secteurs_ca = pd.DataFrame({
+            'Secteur': ['Premium, Mid. & Eco. - Management & Franchise',
+                       'Premium, Mid. & Eco. - Services aux Propriétaires',
+                       'Premium, Mid. & Eco. - Actifs Hôteliers & Autres',
+                       'Luxury & Lifestyle - Management & Franchise',
+                       'Luxury & Lifestyle - Services aux Propriétaires',
+                       'Luxury & Lifestyle - Actifs Hôteliers & Autres',
+                       'Holding & Intercos'],
+            'S1_2024': [431, 538, 505, 242, 716, 285, -39],
+            'S1_2025': [427, 557, 491, 244, 718, 351, -43]
+        })
+
+        # Données pour les ratios
+        self.calculer_ratios()
+
+    def calculer_ratios(self):
+        """Calcule les ratios financiers clés"""
+        # Ratios de rentabilité (colonnes de périodes du compte de résultat)
+        periodes = list(REFERENCES_RENTABILITE)
+        lignes = self.compte_resultat.set_index('Poste')
+        ca = lignes.loc['Chiffre d\'affaires', periodes].to_numpy()
+        resultat_net = lignes.loc['Résultat net de la période', periodes].to_numpy()
+        resultat_op = lignes.loc['Résultat opérationnel', periodes].to_numpy()
+        refs = pd.DataFrame(REFERENCES_RENTABILITE)
+        self.ratios_rentabilite = _frame(ratios_rentabilite(
+            ca, resultat_net, resultat_op, refs.loc['capitaux_propres'], refs.loc['total_actif']), periodes)
+
+        # Ratios de liquidité et d'endettement (dates de bilan)
+        dates = list(REFERENCES_BILAN)
+        bilan = pd.DataFrame(REFERENCES_BILAN)
+        self.ratios_liquidite = _frame(ratios_liquidite(
+            bilan.loc['actifs_courants'], bilan.loc['passifs_courants'], bilan.loc['stocks'],
+            bilan.loc['tresorerie']), dates)
+        resultat_op_bilan = lignes.loc['Résultat opérationnel', [PERIODE_RESULTAT[d] for d in dates]].to_numpy()
+        self.ratios_endettement = _frame(ratios_endettement(
+            bilan.loc['dette_financiere'], bilan.loc['tresorerie'], bilan.loc['capitaux_propres'],
+            resultat_op_bilan, bilan.loc['charges_financieres']), dates)
@@ -0,0 +1,148 @@
+# Évaluation des prévisions par origine glissante
+# File: hotel_kpi/backtest.py
+# Description: Rejoue la prévision de forecast.py à des origines successives de l'historique (fenêtre
+# d'apprentissage croissante, puis horizon de test) et mesure MAE et MAPE par horizon et par série.
+# Entre deux origines, les statistiques suffisantes (X'WX, X'Wy) sont complétées des seuls jours
+# ajoutés au lieu d'un réajustement complet ; les plages d'origines sont réparties entre les processus
+# d'un pool, le panel étant placé en mémoire partagée.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .forecast import DEFAULT_HORIZON, WEEKLY_ORDER, YEARLY_ORDER, daily_panel, design_matrix, normal_equations, solve
+from .portfolio import _attach
+
+DEFAULT_INITIAL = 365
+DEFAULT_STEP = 7
+# En dessous de ce volume (séries x origines), l'évaluation reste en processus
+PARALLEL_MIN_CELLS = 100_000
+TASKS_PER_WORKER = 2
+
+
+def fold_origins(n_days, horizon=DEFAULT_HORIZON, initial=DEFAULT_INITIAL, step=DEFAULT_STEP):
+    """Origines des plis : apprentissage sur les jours [0, origine), test sur [origine, origine + horizon)"""
+    return np.arange(initial, n_days - horizon + 1, step)
+
+
+def evaluate_folds(W, Y, X, origins, horizon=DEFAULT_HORIZON, clip=None):
+    """Sommes des erreurs absolues et relatives, et effectifs, par série et par horizon
+
+    origins doit être croissant : les équations normales sont prolongées d'une origine à la suivante.
+    Une série n'est évaluée qu'à partir d'autant de jours observés que de coefficients.
+    """
+    n_series, p = len(W), X.shape[1]
+    abs_err, pct_err = np.zeros((n_series, horizon)), np.zeros((n_series, horizon))
+    n_abs, n_pct = np.zeros((n_series, horizon)), np.zeros((n_series, horizon))
+    done = int(origins[0])
+    xtx, xty = normal_equations(W[:, :done], Y[:, :done], X[:done])
+    for origin in origins:
+        if origin > done:
+            add_xtx, add_xty = normal_equations(W[:, done:origin], Y[:, done:origin], X[done:origin])
+            xtx += add_xtx
+            xty += add_xty
+            done = int(origin)
+        window = slice(origin, origin + horizon)
+        forecast = solve(xtx, xty) @ X[window].T
+        if clip is not None:
+            forecast = np.clip(forecast, *clip)
+        actual = Y[:, window]
+        # xtx[:, 0, 0] = nombre de jours d'apprentissage observés (régresseur constant)
+        weight = W[:, window] * (xtx[:, 0, 0] >= p)[:, None]
+        err = np.abs(forecast - actual) * weight
+        relative = weight * (actual != 0)
+        abs_err += err
+        n_abs += weight
+        pct_err += np.divide(err, np.abs(actual), out=np.zeros_like(err), where=relative > 0)
+        n_pct += relative
+    return abs_err, pct_err, n_abs, n_pct
+
+
+# ----------------------
+# Travail d'un worker
+# ----------------------
+_worker = {}
+
+
+def _share(arrays):
+    segments, spec = [], {}
+    for name, values in arrays.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, values.dtype, buffer=shm.buf)[:] = values
+        segments.append(shm)
+        spec[name] = (shm.name, values.shape, values.dtype.str)
+    return segments, spec
+
+
+def _init_worker(spec):
+    _worker['segments'] = []
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = _attach(shm_name)
+        _worker['segments'].append(shm)
+        _worker[name] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+
+
+def _run_task(origins, horizon, orders, clip):
+    X = design_matrix(np.arange(_worker['W'].shape[1]), *orders)
+    return evaluate_folds(_worker['W'], _worker['Y'], X, origins, horizon, clip)
+
+
+# ----------------------
+# Évaluation complète
+# ----------------------
+def _summary(abs_err, pct_err, n_abs, n_pct, axis):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pd.DataFrame({
+            'mae': abs_err.sum(axis=axis) / n_abs.sum(axis=axis),
+            'mape': 100 * pct_err.sum(axis=axis) / n_pct.sum(axis=axis),
+            'count': n_abs.sum(axis=axis).astype('int64'),
+        })
+
+
+def rolling_backtest(frame, keys, value_col='occupancy_rate', date_col='date', horizon=DEFAULT_HORIZON,
+                     initial=None, step=DEFAULT_STEP, clip=None, workers=None,
+                     weekly_order=WEEKLY_ORDER, yearly_order=YEARLY_ORDER, tasks_per_worker=TASKS_PER_WORKER,
+                     min_parallel_cells=PARALLEL_MIN_CELLS, mp_context=None):
+    """MAE et MAPE (%) des prévisions sur des origines glissantes, par horizon et par série
+
+    Une origine tous les step jours, après initial jours d'apprentissage (par défaut DEFAULT_INITIAL,
+    ramené à la moitié d'un historique plus court). Renvoie
+    {'horizon': par horizon (1 = lendemain de l'origine), 'series': par combinaison de keys, 'folds': nombre d'origines}.
+    """
+    index, _, W, Y = daily_panel(frame, keys, date_col, value_col)
+    if initial is None:
+        initial = min(DEFAULT_INITIAL, W.shape[1] // 2)
+    origins = fold_origins(W.shape[1], horizon, initial, step)
+    if not len(origins):
+        raise ValueError(f"Historique trop court : {W.shape[1]} jours pour {initial} jours d'apprentissage "
+                         f"et {horizon} jours de test")
+    orders = (weekly_order, yearly_order)
+    workers = workers or os.cpu_count() or 1
+    tasks = [part for part in np.array_split(origins, min(len(origins), workers * tasks_per_worker)) if len(part)]
+
+    if workers <= 1 or len(tasks) <= 1 or len(W) * len(origins) < min_parallel_cells:
+        sums = evaluate_folds(W, Y, design_matrix(np.arange(W.shape[1]), *orders), origins, horizon, clip)
+    else:
+        if mp_context is None:
+            mp_context = 'forkserver' if 'forkserver' in get_all_start_methods() else 'spawn'
+        segments, spec = _share({'W': W, 'Y': Y})
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=get_context(mp_context),
+                                     initializer=_init_worker, initargs=(spec,)) as pool:
+                parts = list(pool.map(_run_task, tasks, [horizon] * len(tasks), [orders] * len(tasks),
+                                      [clip] * len(tasks)))
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+        sums = [sum(values) for values in zip(*parts)]
+
+    by_horizon = _summary(*sums, axis=0)
+    by_horizon.insert(0, 'horizon', np.arange(1, horizon + 1))
+    by_series = _summary(*sums, axis=1)
+    by_series.index = index
+    by_series = by_series.reset_index() if len(keys) else by_series
+    return {'horizon': by_horizon, 'series': by_series, 'folds': len(origins)}
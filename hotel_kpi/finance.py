@@ -0,0 +1,44 @@
+# Ratios financiers (rentabilité, liquidité, endettement)
+# File: hotel_kpi/finance.py
+# Description: Fonctions pures vectorisées : chaque argument est un scalaire ou une colonne de
+# valeurs par période, le résultat est un dict {libellé du ratio: valeur(s)}.
+
+import numpy as np
+
+from .metrics import safe_divide
+
+
+def _values(x):
+    return np.asarray(x, dtype='float64')
+
+
+def ratios_rentabilite(ca, resultat_net, resultat_op, capitaux_propres, total_actif):
+    """Marges nette et opérationnelle, ROE et ROA (en %)"""
+    ca, resultat_net, resultat_op = _values(ca), _values(resultat_net), _values(resultat_op)
+    return {
+        'Marge nette (%)': safe_divide(resultat_net, ca) * 100,
+        'Marge opérationnelle (%)': safe_divide(resultat_op, ca) * 100,
+        'ROE (%)': safe_divide(resultat_net, _values(capitaux_propres)) * 100,
+        'ROA (%)': safe_divide(resultat_net, _values(total_actif)) * 100,
+    }
+
+
+def ratios_liquidite(actifs_courants, passifs_courants, stocks, tresorerie):
+    """Current ratio, quick ratio (hors stocks) et trésorerie / passifs courants (en %)"""
+    actifs_courants, passifs_courants = _values(actifs_courants), _values(passifs_courants)
+    return {
+        'Current Ratio': safe_divide(actifs_courants, passifs_courants),
+        'Quick Ratio': safe_divide(actifs_courants - _values(stocks), passifs_courants),
+        'Trésorerie/Passifs courants (%)': safe_divide(_values(tresorerie), passifs_courants) * 100,
+    }
+
+
+def ratios_endettement(dette_financiere, tresorerie, capitaux_propres, resultat_op, charges_financieres):
+    """Dette nette / capitaux propres, dette nette / EBITDA et couverture des intérêts"""
+    dette_nette = _values(dette_financiere) - _values(tresorerie)
+    resultat_op = _values(resultat_op)
+    return {
+        'Dette Nette/Capitaux Propres': safe_divide(dette_nette, _values(capitaux_propres)),
+        'Dette Nette/EBITDA': safe_divide(dette_nette, resultat_op),
+        'Couverture des intérêts': safe_divide(resultat_op, _values(charges_financieres)),
+    }
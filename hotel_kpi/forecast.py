@@ -0,0 +1,142 @@
+# Prévisions vectorisées de nombreuses séries (tendance + saisonnalités)
+# File: hotel_kpi/forecast.py
+# Description: Ajuste en un seul lot un modèle linéaire par série (hotel x room_type x channel, par
+# exemple) : tendance, saisonnalité hebdomadaire et annuelle (termes de Fourier), résolu par moindres
+# carrés empilés dans NumPy (équations normales pondérées, jours manquants de poids nul), avec
+# intervalles de prédiction.
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+WEEKLY_ORDER = 3
+YEARLY_ORDER = 4
+DEFAULT_HORIZON = 30
+DEFAULT_LEVEL = 0.95
+RIDGE = 1e-6
+
+
+def z_score(level):
+    """Quantile de la loi normale pour un intervalle bilatéral de niveau level (ex: 0.95 -> 1.96)"""
+    if not 0 < level < 1:
+        raise ValueError(f"level doit être compris strictement entre 0 et 1 : {level!r}")
+    return NormalDist().inv_cdf(0.5 + level / 2)
+
+
+def design_matrix(days, weekly_order=WEEKLY_ORDER, yearly_order=YEARLY_ORDER):
+    """Régresseurs pour des jours (entiers depuis l'origine) : constante, tendance (années), Fourier"""
+    days = np.asarray(days, dtype='float64')
+    columns = [np.ones_like(days), days / 365.25]
+    for period, order in ((7.0, weekly_order), (365.25, yearly_order)):
+        for k in range(1, order + 1):
+            angle = 2 * np.pi * k * days / period
+            columns += [np.sin(angle), np.cos(angle)]
+    return np.column_stack(columns)
+
+
+def daily_panel(frame, keys, date_col='date', value_col='occupancy_rate'):
+    """Panel séries x jours : (index des séries, date d'origine, poids W, valeurs Y)
+
+    Y est la moyenne des observations d'un jour ; W vaut 1 pour les jours observés et 0 sinon.
+    """
+    keys = list(keys)
+    dates = pd.to_datetime(frame[date_col]).dt.normalize()
+    origin = dates.min()
+    day = ((dates - origin).dt.days).to_numpy()
+    n_days = int(day.max()) + 1
+    if keys:
+        groups = frame.groupby(keys, observed=True, sort=True)
+        code = groups.ngroup().to_numpy()
+        sizes = groups.size()
+        index = pd.MultiIndex.from_frame(sizes.reset_index()[keys]) if len(keys) > 1 else pd.Index(sizes.index)
+    else:
+        code = np.zeros(len(frame), dtype='int64')
+        index = pd.RangeIndex(1)
+    n_series = len(index)
+
+    values = frame[value_col].to_numpy(dtype='float64')
+    present = ~np.isnan(values)
+    cell = (code * n_days + day)[present]
+    total = np.bincount(cell, weights=values[present], minlength=n_series * n_days)
+    count = np.bincount(cell, minlength=n_series * n_days)
+    W = (count > 0).reshape(n_series, n_days).astype('float64')
+    Y = np.divide(total, count, out=np.zeros_like(total), where=count > 0).reshape(n_series, n_days)
+    return index, origin, W, Y
+
+
+def normal_equations(W, Y, X):
+    """Statistiques suffisantes (X' W_s X, X' W_s y_s) de chaque série, additives sur les jours"""
+    n_series, p = W.shape[0], X.shape[1]
+    # Produits extérieurs x_t x_t' aplatis : toutes les séries en un produit matriciel
+    outer = (X[:, :, None] * X[:, None, :]).reshape(len(X), p * p)
+    return (W @ outer).reshape(n_series, p, p), (W * Y) @ X
+
+
+def solve(xtx, xty):
+    """Coefficients de chaque série (faible régularisation pour les séries courtes)"""
+    return np.linalg.solve(xtx + RIDGE * np.eye(xtx.shape[-1]), xty[..., None])[..., 0]
+
+
+class BatchForecaster:
+    """Modèles linéaires d'un panel de séries journalières, ajustés et prolongés en bloc"""
+
+    def __init__(self, weekly_order=WEEKLY_ORDER, yearly_order=YEARLY_ORDER):
+        self.weekly_order = weekly_order
+        self.yearly_order = yearly_order
+        self.keys = None
+        self.index = None
+        self.origin = None
+        self.last_day = None
+        self.coef = None
+        self.cov = None
+        self.sigma = None
+        self.n_obs = None
+
+    def fit(self, frame, keys, date_col='date', value_col='occupancy_rate'):
+        """Ajuste une série par combinaison de keys (valeurs d'un même jour moyennées)"""
+        self.keys = list(keys)
+        self.index, self.origin, W, Y = daily_panel(frame, self.keys, date_col, value_col)
+        self.last_day = W.shape[1] - 1
+        X = design_matrix(np.arange(W.shape[1]), self.weekly_order, self.yearly_order)
+        xtx, xty = normal_equations(W, Y, X)
+        self.coef = solve(xtx, xty)
+        self.cov = np.linalg.inv(xtx + RIDGE * np.eye(X.shape[1]))
+        residuals = (Y - self.coef @ X.T) * W
+        self.n_obs = W.sum(axis=1)
+        dof = np.maximum(self.n_obs - X.shape[1], 1)
+        self.sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+        return self
+
+    def predict(self, horizon=DEFAULT_HORIZON, level=DEFAULT_LEVEL):
+        """Prévision des horizon jours suivant la dernière date, avec bornes d'intervalle (format long)"""
+        days = np.arange(self.last_day + 1, self.last_day + 1 + horizon)
+        X = design_matrix(days, self.weekly_order, self.yearly_order)
+        mean = self.coef @ X.T
+        # Variance de prédiction : sigma² (1 + x' (X'WX)^-1 x) par série et par jour
+        leverage = ((X @ self.cov) * X).sum(axis=2)
+        half = z_score(level) * self.sigma[:, None] * np.sqrt(1 + leverage)
+
+        dates = self.origin + pd.to_timedelta(days, unit='D')
+        out = pd.DataFrame({
+            'date': np.tile(dates.to_numpy(), len(self.index)),
+            'forecast': mean.ravel(),
+            'lower': (mean - half).ravel(),
+            'upper': (mean + half).ravel(),
+        })
+        if self.keys:
+            series = self.index.to_frame(index=False)
+            out = pd.concat([series.loc[series.index.repeat(horizon)].reset_index(drop=True), out], axis=1)
+        return out
+
+    def series_count(self):
+        return 0 if self.coef is None else len(self.coef)
+
+
+def forecast_series(frame, keys, value_col='occupancy_rate', date_col='date', horizon=DEFAULT_HORIZON,
+                    level=DEFAULT_LEVEL, clip=None):
+    """Ajuste et prolonge toutes les séries de frame ; clip=(min, max) borne prévision et intervalle"""
+    result = BatchForecaster().fit(frame, keys, date_col, value_col).predict(horizon, level)
+    if clip is not None:
+        result[['forecast', 'lower', 'upper']] = result[['forecast', 'lower', 'upper']].clip(*clip)
+    return result
@@ -0,0 +1,152 @@
+# KPI opérationnels hôteliers
+# File: hotel_kpi/metrics.py
+# Description: Fonctions pures sur des entrées en colonnes (scalaires, tableaux NumPy, séries ou
+# DataFrames) : occupation, ADR, RevPAR, TRevPAR, CoPAR, GOP, GOPPAR, répartition des revenus,
+# simulateur de scénario et recommandations rapides. Aucune dépendance à Streamlit.
+
+import numpy as np
+import pandas as pd
+
+REVENUE_COLUMNS = ['room_revenue', 'fnb_revenue', 'spa_revenue', 'other_revenue']
+# Mesures additives dont les ratios sont dérivés (sommables entre hôtels, périodes et partitions)
+ADDITIVE_MEASURES = ['capacity', 'occupied', 'room_revenue', 'total_revenue', 'total_cost', 'gop']
+# Seuils des recommandations rapides d'app4 (occupation, ADR, écart relatif de RevPAR entre types de chambre)
+INSIGHT_MIN_OCCUPANCY = 0.55
+INSIGHT_MIN_ADR = 80
+INSIGHT_MAX_REVPAR_SPREAD = 0.4
+
+
+def wide_measures(df, columns=ADDITIVE_MEASURES):
+    """Types 64 bits (int64 / float64) des mesures de df, pour des sommes exactes et sans débordement"""
+    return {c: 'int64' if pd.api.types.is_integer_dtype(df[c]) else 'float64' for c in columns if c in df.columns}
+
+
+def safe_divide(num, den, fill=np.nan):
+    """num / den, fill là où den vaut 0 (scalaires, tableaux ou séries)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.true_divide(num, den)
+    zero = np.asarray(den) == 0
+    if np.ndim(out) == 0:
+        return fill if zero else float(out)
+    if isinstance(out, pd.Series):
+        return out.mask(zero, fill)
+    return np.where(zero, fill, out)
+
+
+# ----------------------
+# Ratios unitaires
+# ----------------------
+def occupancy_rate(occupied, capacity, fill=np.nan):
+    return safe_divide(occupied, capacity, fill)
+
+
+def adr(room_revenue, occupied, fill=np.nan):
+    """Average Daily Rate : revenu hébergement par chambre vendue"""
+    return safe_divide(room_revenue, occupied, fill)
+
+
+def revpar(room_revenue, capacity, fill=np.nan):
+    """Revenu hébergement par chambre disponible"""
+    return safe_divide(room_revenue, capacity, fill)
+
+
+def trevpar(total_revenue, capacity, fill=np.nan):
+    """Revenu total par chambre disponible"""
+    return safe_divide(total_revenue, capacity, fill)
+
+
+def copar(total_cost, capacity, fill=np.nan):
+    """Coût par chambre disponible"""
+    return safe_divide(total_cost, capacity, fill)
+
+
+def gop(total_revenue, total_cost):
+    """Gross Operating Profit"""
+    return total_revenue - total_cost
+
+
+def goppar(gop_value, capacity, fill=np.nan):
+    """GOP par chambre disponible"""
+    return safe_divide(gop_value, capacity, fill)
+
+
+# ----------------------
+# Agrégats
+# ----------------------
+def derive_ratios(agg):
+    """Ajoute occupancy_rate, adr, revpar et goppar à partir des sommes additives"""
+    agg['occupancy_rate'] = occupancy_rate(agg['occupied'], agg['capacity'])
+    agg['adr'] = adr(agg['room_revenue'], agg['occupied'])
+    agg['revpar'] = revpar(agg['room_revenue'], agg['capacity'])
+    agg['goppar'] = goppar(agg['gop'], agg['capacity'])
+    return agg
+
+
+def dashboard_kpis(agg):
+    """Cartes KPI d'app4 à partir des agrégats par période (moyennes des ratios, GOP cumulé)"""
+    return {
+        'occupancy_rate': float(agg['occupancy_rate'].mean()),
+        'adr': float(agg['adr'].mean()),
+        'revpar': float(agg['revpar'].mean()),
+        'gop': float(agg['gop'].sum()),
+        'goppar': float(agg['goppar'].mean()),
+    }
+
+
+def _sum64(values):
+    return float(np.asarray(values, dtype='float64').sum())
+
+
+def totals_kpis(capacity, occupied, room_revenue, total_revenue=None, total_cost=None):
+    """KPI globaux à partir de colonnes brutes (sommées) ; 0 quand le dénominateur est nul"""
+    # Sommes sur 64 bits : des montants float32 cumulés en float32 perdent les centimes
+    capacity, occupied, room_revenue = _sum64(capacity), _sum64(occupied), _sum64(room_revenue)
+    total_revenue = room_revenue if total_revenue is None else _sum64(total_revenue)
+    total_cost = 0 if total_cost is None else _sum64(total_cost)
+    return {
+        'occupancy_rate': occupancy_rate(occupied, capacity, fill=0),
+        'adr': adr(room_revenue, occupied, fill=0),
+        'revpar': revpar(room_revenue, capacity, fill=0),
+        'trevpar': trevpar(total_revenue, capacity, fill=0),
+        'copar': copar(total_cost, capacity, fill=0),
+        'revenue': float(total_revenue),
+        'cost': float(total_cost),
+    }
+
+
+def revenue_breakdown(df, columns=REVENUE_COLUMNS):
+    """Revenus par département (libellé = nom de colonne sans _revenue, en majuscules)"""
+    rev_sum = df[columns].astype(wide_measures(df, columns)).sum().reset_index()
+    rev_sum.columns = ['department', 'amount']
+    rev_sum['department'] = rev_sum['department'].str.replace('_revenue', '').str.upper()
+    return rev_sum
+
+
+def simulate_revenue(df, adr_delta=0, occ_delta=0):
+    """Revenu total actuel et simulé pour une hausse d'ADR (%) et d'occupation (points) ; renvoie (actuel, simulé)
+
+    Les chambres vendues simulées restent comprises entre 0 et la capacité de chaque ligne.
+    """
+    capacity = df['capacity'].to_numpy(dtype='float64')
+    sim_adr = df['adr'].to_numpy(dtype='float64') * (1 + adr_delta / 100)
+    sim_occupied = np.clip(df['occupied'].to_numpy(dtype='float64') + capacity * occ_delta / 100, 0, capacity)
+    sums = df[['fnb_revenue', 'spa_revenue', 'other_revenue', 'total_revenue']].astype('float64').sum()
+    sim_total = (sim_adr * sim_occupied).sum() + sums['fnb_revenue'] + sums['spa_revenue'] + sums['other_revenue']
+    return float(sums['total_revenue']), float(sim_total)
+
+
+# ----------------------
+# Recommandations
+# ----------------------
+def quick_insights(kpis, room_revpar, top_channel):
+    """Recommandations rapides d'app4 : kpis de dashboard_kpis, RevPAR par type de chambre et canal majoritaire"""
+    insights = []
+    if kpis['occupancy_rate'] < INSIGHT_MIN_OCCUPANCY:
+        insights.append('Occupancy faible: envisager promotions mid-week ou offres packages.')
+    if kpis['adr'] < INSIGHT_MIN_ADR:
+        insights.append('ADR relativement bas: revoir segmentation tarifaire et canaux OTA.')
+    if (room_revpar.max() - room_revpar.min()) / (room_revpar.max() + 1e-9) > INSIGHT_MAX_REVPAR_SPREAD:
+        insights.append('Grande variance de RevPAR entre types de chambre: optimiser tarif et overbooking par segment.')
+    if top_channel == 'OTA':
+        insights.append('Forte dépendance aux OTA: renforcer canal direct (promos, fidélité).')
+    return insights
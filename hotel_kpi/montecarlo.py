@@ -0,0 +1,152 @@
+# Simulation Monte Carlo du revenu, des coûts et du GOP d'une période
+# File: hotel_kpi/montecarlo.py
+# Description: Ajuste sur l'historique, par hôtel et type de chambre, une loi Beta du taux d'occupation
+# moyen d'une période et une loi normale de l'ADR moyen, puis tire des scénarios de la période (100k
+# et plus) en tableaux NumPy (scénarios x segments) : revenus annexes et ratios de coûts tirés comme
+# dans data_generator.py.
+# Tirages par blocs de scénarios à graines dérivées (seed, bloc) : résultats reproductibles quel que
+# soit le nombre de processus. Percentiles et VaR par hôtel.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SCENARIOS = 100_000
+CHUNK_SCENARIOS = 25_000
+DEFAULT_SEED = 42
+QUANTILES = (0.01, 0.05, 0.5, 0.95, 0.99)
+VAR_LEVEL = 0.05
+ADR_FLOOR = 20
+# Bornes des tirages uniformes de data_generator.py : revenus annexes (ratio du revenu hébergement,
+# montant par type de chambre et par jour pour other) et coûts (ratio de chaque revenu)
+REVENUE_RATIOS = {'fnb_revenue': (0.05, 0.25), 'spa_revenue': (0.0, 0.08)}
+OTHER_REVENUE = (50, 250)
+COST_RATIOS = {'room_revenue': (0.15, 0.30), 'fnb_revenue': (0.25, 0.45), 'spa_revenue': (0.2, 0.4),
+               'other_revenue': (0.3, 0.6)}
+METRICS = ['revenue', 'cost', 'gop']
+
+
+def fit_segments(df, days, by=('hotel', 'room_type')):
+    """Paramètres par segment : capacité journalière, moyenne et variance des moyennes sur days jours
+    (fenêtres glissantes de l'historique) du taux d'occupation et de l'ADR
+
+    La variance des moyennes glissantes reprend saisonnalité et autocorrélation de l'historique ;
+    un historique plus court que days retombe sur la variance journalière divisée par days.
+    """
+    by = [c for c in by if c in df.columns]
+    daily = df.groupby(by + ['date'], observed=True, sort=True).agg(
+        capacity=('capacity', 'sum'), occupied=('occupied', 'sum'), adr=('adr', 'mean')).reset_index()
+    daily['rate'] = daily['occupied'].astype('float64') / daily['capacity'].astype('float64')
+    segments = daily.groupby(by, observed=True, sort=True) if by else daily.groupby(np.zeros(len(daily)))
+    rolling = segments[['rate', 'adr']].rolling(days).mean()
+    rolled = rolling.groupby(level=list(range(len(by))) if by else 0).var()
+    stats = segments.agg(capacity=('capacity', 'mean'), occ_mean=('rate', 'mean'), occ_var=('rate', 'var'),
+                         adr_mean=('adr', 'mean'), adr_var=('adr', 'var'), n_days=('date', 'size'))
+    short = (stats['n_days'] <= days).to_numpy()
+    stats['occ_var'] = np.where(short, stats['occ_var'] / days, rolled['rate'].reindex(stats.index).to_numpy())
+    stats['adr_std'] = np.sqrt(np.where(short, stats['adr_var'] / days, rolled['adr'].reindex(stats.index).to_numpy()))
+    stats = stats.drop(columns=['adr_var', 'n_days']).fillna({'occ_var': 0.0, 'adr_std': 0.0})
+    return stats.reset_index() if by else stats.reset_index(drop=True)
+
+
+def _period_mean(rng, lo, hi, days, size):
+    """Moyenne de days tirages uniformes [lo, hi] (approximation normale, bornée), en float32"""
+    values = rng.standard_normal(size, dtype=np.float32)
+    values *= (hi - lo) / np.sqrt(12 * days)
+    values += (lo + hi) / 2
+    return np.clip(values, lo, hi, out=values)
+
+
+def _beta_params(mean, var):
+    """Paramètres (a, b) d'une loi Beta de moyenne et variance données (variance ramenée dans l'intervalle admissible)"""
+    mean = np.clip(mean, 1e-6, 1 - 1e-6)
+    var = np.clip(var, 1e-9, mean * (1 - mean) * 0.999)
+    common = mean * (1 - mean) / var - 1
+    return mean * common, (1 - mean) * common
+
+
+def simulate_chunk(params, days, n, rng):
+    """Revenu, coût et GOP de la période pour n scénarios, par segment : tableaux (n, segments)
+
+    Occupation moyenne de la période ~ Beta et ADR moyen ~ normale (params de fit_segments) ; les
+    ratios de revenus annexes et de coûts, tirés chaque jour, sont moyennés sur la période.
+    """
+    size = (n, len(params))
+    a, b = _beta_params(params['occ_mean'].to_numpy(), params['occ_var'].to_numpy())
+    room_revenue = rng.beta(a, b, size)
+    room_revenue *= params['capacity'].to_numpy() * days
+    room_revenue *= np.maximum(ADR_FLOOR, rng.normal(params['adr_mean'].to_numpy(), params['adr_std'].to_numpy(), size))
+    revenue = {'room_revenue': room_revenue}
+    for col, (lo, hi) in REVENUE_RATIOS.items():
+        revenue[col] = room_revenue * _period_mean(rng, lo, hi, days, size)
+    revenue['other_revenue'] = _period_mean(rng, *OTHER_REVENUE, days, size) * days
+    total, cost = np.zeros(size), np.zeros(size)
+    for col, values in revenue.items():
+        total += values
+        cost += values * _period_mean(rng, *COST_RATIOS[col], days, size)
+    return {'revenue': total, 'cost': cost, 'gop': total - cost}
+
+
+def _run_chunk(params, days, n, seed, chunk, groups, n_groups):
+    draws = simulate_chunk(params, days, n, np.random.default_rng([seed, chunk]))
+    # Somme des segments d'un même hôtel
+    onehot = np.zeros((len(groups), n_groups))
+    onehot[np.arange(len(groups)), groups] = 1
+    return {metric: values @ onehot for metric, values in draws.items()}
+
+
+def simulate(df, days=None, scenarios=DEFAULT_SCENARIOS, seed=DEFAULT_SEED, workers=1,
+             chunk_scenarios=CHUNK_SCENARIOS, mp_context=None):
+    """Scénarios de la période par hôtel : {'hotels': noms, 'revenue' | 'cost' | 'gop': (scenarios, hôtels)}
+
+    days vaut par défaut le nombre de dates distinctes de df. Avec workers > 1, les blocs de
+    scénarios sont répartis entre processus (mêmes résultats qu'en séquentiel).
+    """
+    days = int(days or df['date'].nunique())
+    params = fit_segments(df, days)
+    if 'hotel' in params.columns:
+        # Axe des hôtels réduit aux hôtels présents : les catégories d'un df filtré gardent les autres
+        hotels = params['hotel'].astype('category').cat.remove_unused_categories()
+        names, groups = list(hotels.cat.categories), hotels.cat.codes.to_numpy()
+    else:
+        names, groups = ['Total'], np.zeros(len(params), dtype='int64')
+    sizes = [min(chunk_scenarios, scenarios - start) for start in range(0, scenarios, chunk_scenarios)]
+    args = [(params, days, n, seed, chunk, groups, len(names)) for chunk, n in enumerate(sizes)]
+
+    if workers <= 1 or len(args) <= 1:
+        parts = [_run_chunk(*a) for a in args]
+    else:
+        if mp_context is None:
+            mp_context = 'forkserver' if 'forkserver' in get_all_start_methods() else 'spawn'
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(args)),
+                                 mp_context=get_context(mp_context)) as pool:
+            parts = list(pool.map(_run_chunk, *zip(*args)))
+    result = {metric: np.concatenate([p[metric] for p in parts]) for metric in METRICS}
+    result['hotels'] = names
+    return result
+
+
+def risk_summary(result, quantiles=QUANTILES, level=VAR_LEVEL):
+    """Moyenne, percentiles et VaR (moyenne - percentile level) par hôtel et par métrique, plus le total"""
+    rows = []
+    for metric in METRICS:
+        values = result[metric]
+        if values.shape[1] > 1:
+            values = np.column_stack([values, values.sum(axis=1)])
+        names = result['hotels'] + (['TOTAL'] if values.shape[1] > len(result['hotels']) else [])
+        pct = np.quantile(values, list(quantiles) + [level], axis=0)
+        mean = values.mean(axis=0)
+        for i, name in enumerate(names):
+            row = {'hotel': name, 'metric': metric, 'mean': mean[i], 'std': values[:, i].std()}
+            row.update({f'p{q * 100:g}': pct[j, i] for j, q in enumerate(quantiles)})
+            row[f'var_{(1 - level) * 100:g}'] = mean[i] - pct[-1, i]
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def monte_carlo(df, days=None, scenarios=DEFAULT_SCENARIOS, seed=DEFAULT_SEED, workers=1):
+    """Résumé de risque des scénarios de df (voir simulate et risk_summary)"""
+    return risk_summary(simulate(df, days, scenarios, seed, workers))
@@ -0,0 +1,26 @@
+# Périodes d'agrégation (jour, semaine, mois, année)
+# File: hotel_kpi/periods.py
+# Description: Grains communs au cube d'agrégats, au calcul en flux et aux prévisions.
+
+import pandas as pd
+
+# Grain -> fréquence de période pandas (semaines du lundi au dimanche)
+GRAINS = {'day': 'D', 'week': 'W-SUN', 'month': 'M', 'year': 'Y'}
+# Libellés du sélecteur "Période" des applications
+PERIOD_GRAINS = {'Jour': 'day', 'Semaine': 'week', 'Mois': 'month', 'Année': 'year'}
+
+
+def period_start(dates, grain):
+    """Début de la période (au grain donné) de chaque date"""
+    dates = pd.to_datetime(pd.Series(dates))
+    if grain == 'day':
+        return dates.dt.normalize()
+    return dates.dt.to_period(GRAINS[grain]).dt.start_time
+
+
+def period_end(starts, grain):
+    """Dernier jour de la période commençant à chaque date de starts"""
+    starts = pd.to_datetime(pd.Series(starts))
+    if grain == 'day':
+        return starts
+    return starts.dt.to_period(GRAINS[grain]).dt.end_time.dt.normalize()
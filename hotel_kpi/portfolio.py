@@ -0,0 +1,197 @@
+# Agrégation parallèle des KPI d'un portefeuille d'hôtels
+# File: hotel_kpi/portfolio.py
+# Description: Découpe les données par hôtel (ou par période) en plages de lignes contiguës, place
+# les colonnes dans des segments de mémoire partagée (aucune copie ni sérialisation des données vers
+# les processus) et calcule dans un pool de processus les agrégats journaliers, par type de chambre et
+# par canal d'app4 pour toutes les propriétés, fusionnés en un classement du portefeuille.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .metrics import ADDITIVE_MEASURES, derive_ratios, trevpar, wide_measures
+
+DIMENSIONS = {'daily': 'date', 'room_type': 'room_type', 'channel': 'channel'}
+COLUMNS = ['hotel', 'date', 'room_type', 'channel'] + ADDITIVE_MEASURES
+PARALLEL_MIN_ROWS = 200_000
+TASKS_PER_WORKER = 4
+RANKING_METRIC = 'revpar'
+
+
+# ----------------------
+# Colonnes en mémoire partagée
+# ----------------------
+def _attach(name):
+    """Ouvre un segment existant ; seul le processus créateur le supprime (unlink)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 : le resource_tracker est partagé avec le processus parent
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrame:
+    """Colonnes d'un DataFrame copiées une fois dans des segments partagés ; spec transmise aux workers
+
+    Les catégories sont transmises par leurs codes (tableau partagé) et leurs libellés (petite liste).
+    """
+
+    def __init__(self, df, columns):
+        self.segments = []
+        self.spec = {'rows': len(df), 'columns': {}}
+        for col in columns:
+            series = df[col]
+            categories = None
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                categories = list(series.cat.categories)
+                values = series.cat.codes.to_numpy()
+            else:
+                values = series.to_numpy()
+            shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, values.dtype, buffer=shm.buf)[:] = values
+            self.segments.append(shm)
+            self.spec['columns'][col] = (shm.name, values.dtype.str, categories)
+
+    def close(self):
+        for shm in self.segments:
+            shm.close()
+            shm.unlink()
+        self.segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def frame_from_spec(spec, segments):
+    """Reconstruit un DataFrame dont les colonnes sont des vues sur les segments partagés"""
+    data = {}
+    for col, (name, dtype, categories) in spec['columns'].items():
+        shm = _attach(name)
+        segments.append(shm)
+        values = np.ndarray((spec['rows'],), np.dtype(dtype), buffer=shm.buf)
+        data[col] = pd.Categorical.from_codes(values, categories) if categories is not None else values
+    return pd.DataFrame(data, copy=False)
+
+
+# ----------------------
+# Travail d'un worker
+# ----------------------
+_worker = {}
+
+
+def _init_worker(spec):
+    _worker['segments'] = []
+    _worker['frame'] = frame_from_spec(spec, _worker['segments'])
+
+
+def filter_rows(df, start_date=None, end_date=None, hotels=None):
+    """Lignes des hôtels et de la période demandés (df lui-même si aucun filtre ne retire de ligne)"""
+    mask = np.ones(len(df), dtype=bool)
+    if hotels is not None:
+        mask &= df['hotel'].isin(list(hotels)).to_numpy()
+    if start_date is not None:
+        mask &= (df['date'] >= pd.Timestamp(start_date)).to_numpy()
+    if end_date is not None:
+        mask &= (df['date'] <= pd.Timestamp(end_date)).to_numpy()
+    return df if mask.all() else df[mask]
+
+
+def aggregate_rows(frame, start_date=None, end_date=None):
+    """Sommes additives par (hotel, dimension) pour chaque vue de DIMENSIONS"""
+    frame = filter_rows(frame, start_date, end_date)
+    return {view: frame.groupby(['hotel', dim], observed=True, sort=False)[ADDITIVE_MEASURES].sum().reset_index()
+            for view, dim in DIMENSIONS.items()}
+
+
+def _run_task(bounds):
+    # Les lignes partagées sont déjà filtrées : chaque tâche agrège sa plage telle quelle
+    lo, hi = bounds
+    return aggregate_rows(_worker['frame'].iloc[lo:hi])
+
+
+# ----------------------
+# Découpage, fusion et classement
+# ----------------------
+def _sorted_frame(df, split):
+    keys = ['hotel', 'date'] if split == 'hotel' else ['date', 'hotel']
+    codes = [df[k].cat.codes.to_numpy() if isinstance(df[k].dtype, pd.CategoricalDtype) else df[k].to_numpy()
+             for k in keys]
+    order = np.lexsort(codes[::-1])
+    # Sommes partielles sur 64 bits : la fusion des plages ne dépend pas du découpage
+    return df[COLUMNS].take(order).astype(wide_measures(df)).reset_index(drop=True)
+
+
+def _task_bounds(frame, split, n_tasks):
+    """Plages [lo, hi) de taille comparable, alignées sur les changements de clé de découpage"""
+    key = frame['hotel'].cat.codes.to_numpy() if split == 'hotel' else frame['date'].to_numpy()
+    changes = np.flatnonzero(key[1:] != key[:-1]) + 1
+    edges = np.concatenate([[0], changes, [len(frame)]])
+    targets = np.linspace(0, len(frame), n_tasks + 1)[1:-1]
+    cuts = np.unique(edges[np.searchsorted(edges, targets)])
+    cuts = np.concatenate([[0], cuts[(cuts > 0) & (cuts < len(frame))], [len(frame)]])
+    return [(int(lo), int(hi)) for lo, hi in zip(cuts[:-1], cuts[1:]) if hi > lo]
+
+
+def merge_parts(parts):
+    """Fusionne les agrégats partiels (une même clé peut venir de plusieurs plages) et dérive les ratios"""
+    merged = {}
+    for view, dim in DIMENSIONS.items():
+        frames = [p[view] for p in parts if not p[view].empty]
+        if not frames:
+            merged[view] = derive_ratios(pd.DataFrame(columns=['hotel', dim] + ADDITIVE_MEASURES))
+            continue
+        combined = pd.concat(frames, ignore_index=True)
+        for col in ('hotel', dim):
+            if combined[col].dtype == object and col != 'date':
+                combined[col] = combined[col].astype('category')
+        combined = combined.groupby(['hotel', dim], observed=True)[ADDITIVE_MEASURES].sum().reset_index()
+        merged[view] = derive_ratios(combined)
+    return merged
+
+
+def ranking(room_type_table, metric=RANKING_METRIC):
+    """Classement des hôtels : totaux du portefeuille et ratios, trié par metric décroissant"""
+    totals = room_type_table.groupby('hotel', observed=True)[ADDITIVE_MEASURES].sum().reset_index()
+    totals = derive_ratios(totals)
+    totals['trevpar'] = trevpar(totals['total_revenue'], totals['capacity'])
+    totals = totals.sort_values(metric, ascending=False, ignore_index=True)
+    totals.insert(0, 'rank', np.arange(1, len(totals) + 1))
+    return totals
+
+
+def aggregate_portfolio(df, start_date=None, end_date=None, workers=None, split='hotel',
+                        tasks_per_worker=TASKS_PER_WORKER, min_parallel_rows=PARALLEL_MIN_ROWS, mp_context=None,
+                        hotels=None):
+    """Agrégats journaliers, par type de chambre et par canal des hôtels (tous par défaut), et classement
+
+    split='hotel' répartit les hôtels entre les processus, split='date' les périodes (utile pour
+    peu d'hôtels sur un long historique). En dessous de min_parallel_rows, le calcul reste en
+    processus. Renvoie {'daily', 'room_type', 'channel', 'ranking'}.
+    """
+    if split not in ('hotel', 'date'):
+        raise ValueError(f"split inconnu : {split} (attendu 'hotel' ou 'date')")
+    workers = workers or os.cpu_count() or 1
+    # Filtre appliqué avant le tri et la copie en mémoire partagée : seules les lignes utiles sont traitées
+    frame = _sorted_frame(filter_rows(df, start_date, end_date, hotels), split)
+    if not isinstance(frame['hotel'].dtype, pd.CategoricalDtype):
+        frame['hotel'] = frame['hotel'].astype('category')
+    bounds = _task_bounds(frame, split, workers * tasks_per_worker) if len(frame) else []
+
+    if workers <= 1 or len(frame) < min_parallel_rows or len(bounds) <= 1:
+        parts = [aggregate_rows(frame)]
+    else:
+        if mp_context is None:
+            mp_context = 'forkserver' if 'forkserver' in get_all_start_methods() else 'spawn'
+        with SharedFrame(frame, COLUMNS) as shared:
+            with ProcessPoolExecutor(max_workers=min(workers, len(bounds)), mp_context=get_context(mp_context),
+                                     initializer=_init_worker, initargs=(shared.spec,)) as pool:
+                parts = list(pool.map(_run_task, bounds))
+
+    result = merge_parts(parts)
+    result['ranking'] = ranking(result['room_type'])
+    return result
@@ -0,0 +1,126 @@
+# Grille de scénarios du simulateur de revenu
+# File: hotel_kpi/scenarios.py
+# Description: Évalue en un seul calcul NumPy (diffusion) toute une grille de hausses d'ADR (%) x
+# variations d'occupation (points), avec des ajustements par type de chambre et par canal. Les
+# chambres vendues restent bornées par la capacité (et par zéro) ligne à ligne ; ces bornes sont
+# calculées à partir de sommes cumulées pré-agrégées par segment, sans copier ni reparcourir le frame.
+
+import numpy as np
+import pandas as pd
+
+from .metrics import occupancy_rate, revpar
+
+SEGMENTS = ['room_type', 'channel']
+ADR_STEPS = np.arange(0, 51, 5)
+OCC_STEPS = np.arange(0, 31, 3)
+# Écart entre segments dans la clé de tri : les ratios (dans [0, 1]) d'un segment ne chevauchent pas le suivant
+_BAND = 3.0
+
+
+class _SortedRatios:
+    """Ratios r_i triés par segment et sommes cumulées de w_i et w_i r_i, sommées ensuite sur {r_i < x}"""
+
+    def __init__(self, segment, ratio, weights):
+        key = segment * _BAND + np.clip(ratio, 0, 1)
+        order = np.argsort(key, kind='stable')
+        self.key = key[order]
+        self.ratio = np.clip(ratio, 0, 1)[order]
+        self.cum_weights = [np.concatenate([[0.0], np.cumsum(w[order])]) for w in weights]
+        self.cum_moments = [np.concatenate([[0.0], np.cumsum(w[order] * self.ratio)]) for w in weights]
+
+    def below(self, segments, x):
+        """(poids, moments) par poids, sommés sur les lignes du segment de ratio < x ; x de forme (S, D)"""
+        lo = np.searchsorted(self.key, segments[:, None] * _BAND)
+        hi = np.searchsorted(self.key, segments[:, None] * _BAND + np.clip(x, -0.5, 1.5))
+        return [(cw[hi] - cw[lo], cm[hi] - cm[lo]) for cw, cm in zip(self.cum_weights, self.cum_moments)]
+
+
+class ScenarioGrid:
+    """Statistiques d'une sélection, calculées une fois, puis évaluation de grilles de scénarios
+
+    Pour une ligne de capacité c, occupation o et ADR p, le scénario (a %, d points) donne
+    p (1 + a/100) min(max(o + c d/100, 0), c) : fonction affine par morceaux de d, dont la somme
+    par segment s'obtient à partir des ratios de marge (1 - o/c) et d'occupation (o/c) triés.
+    """
+
+    def __init__(self, df, by=SEGMENTS):
+        self.by = [c for c in by if c in df.columns]
+        if self.by:
+            groups = df.groupby(self.by, observed=True, sort=True)
+            segment = groups.ngroup().to_numpy()
+            self.segments = groups.size().reset_index()[self.by]
+        else:
+            segment = np.zeros(len(df), dtype='int64')
+            self.segments = pd.DataFrame(index=[0])
+        n_segments = len(self.segments)
+        capacity = df['capacity'].to_numpy(dtype='float64')
+        occupied = df['occupied'].to_numpy(dtype='float64')
+        price = np.nan_to_num(df['adr'].to_numpy(dtype='float64'))
+        rate = occupancy_rate(occupied, capacity, fill=0)
+
+        # Deux jeux de poids : chiffre d'affaires hébergement (p c) et chambres (c)
+        weights = [price * capacity, capacity]
+        self.base = [np.bincount(segment, weights=w * rate, minlength=n_segments) for w in weights]
+        self.slope = [np.bincount(segment, weights=w, minlength=n_segments) for w in weights]
+        self.slack = _SortedRatios(segment, 1 - rate, weights)
+        self.fill = _SortedRatios(segment, rate, weights)
+        self.capacity = float(capacity.sum())
+        # Montants cumulés sur 64 bits (colonnes float32 du schéma)
+        self.other_revenue = float(df[['fnb_revenue', 'spa_revenue', 'other_revenue']].astype('float64').sum().sum())
+        self.actual_revenue = float(df['total_revenue'].astype('float64').sum())
+
+    def _segment_deltas(self, deltas):
+        """Ajustements additionnels par segment : {colonne: {valeur: delta}}, cumulés sur les colonnes"""
+        extra = np.zeros(len(self.segments))
+        for col, values in (deltas or {}).items():
+            if col in self.segments.columns:
+                extra += self.segments[col].map(values).astype('float64').fillna(0).to_numpy()
+        return extra
+
+    def _segment_totals(self, x):
+        """Par poids, somme sur les lignes de w min(max(o/c + x, 0), 1) par segment ; x de forme (S, D)"""
+        segments = np.arange(len(self.segments))
+        over = self.slack.below(segments, x)
+        under = self.fill.below(segments, -x)
+        totals = []
+        for base, slope, (w_over, m_over), (w_under, m_under) in zip(self.base, self.slope, over, under):
+            # Lignes plafonnées (marge < x) et lignes ramenées à zéro (occupation < -x)
+            totals.append(base[:, None] + x * slope[:, None] - (x * w_over - m_over) + (-x * w_under - m_under))
+        return totals
+
+    def evaluate(self, adr_deltas=ADR_STEPS, occ_points=OCC_STEPS, adr_by=None, occ_by=None):
+        """Revenu total, chambres vendues et ratios simulés pour la grille adr_deltas x occ_points
+
+        adr_by / occ_by ajoutent des deltas par segment, par exemple {'room_type': {'Suite': 5}}.
+        Renvoie un dict de tableaux (len(adr_deltas), len(occ_points)).
+        """
+        adr_deltas = np.asarray(adr_deltas, dtype='float64')
+        occ_points = np.asarray(occ_points, dtype='float64')
+        x = (occ_points[None, :] + self._segment_deltas(occ_by)[:, None]) / 100
+        room_revenue, rooms = self._segment_totals(x)
+        price_factor = 1 + (adr_deltas[:, None, None] + self._segment_deltas(adr_by)[None, :, None]) / 100
+        sim_room_revenue = (price_factor * room_revenue[None, :, :]).sum(axis=1)
+        sim_rooms = np.broadcast_to(rooms.sum(axis=0), sim_room_revenue.shape)
+        total = sim_room_revenue + self.other_revenue
+        return {
+            'total_revenue': total,
+            'delta': total - self.actual_revenue,
+            'room_revenue': sim_room_revenue,
+            'occupied': sim_rooms,
+            'occupancy_rate': occupancy_rate(sim_rooms, self.capacity),
+            'revpar': revpar(sim_room_revenue, self.capacity),
+        }
+
+    def table(self, adr_deltas=ADR_STEPS, occ_points=OCC_STEPS, adr_by=None, occ_by=None):
+        """Grille au format long : une ligne par (adr_delta, occ_points)"""
+        result = self.evaluate(adr_deltas, occ_points, adr_by, occ_by)
+        adr_grid, occ_grid = np.meshgrid(np.asarray(adr_deltas), np.asarray(occ_points), indexing='ij')
+        out = pd.DataFrame({'adr_delta': adr_grid.ravel(), 'occ_points': occ_grid.ravel()})
+        for name, values in result.items():
+            out[name] = values.ravel()
+        return out
+
+
+def scenario_grid(df, adr_deltas=ADR_STEPS, occ_points=OCC_STEPS, adr_by=None, occ_by=None, by=SEGMENTS):
+    """Table longue des scénarios de df (voir ScenarioGrid.table)"""
+    return ScenarioGrid(df, by).table(adr_deltas, occ_points, adr_by, occ_by)
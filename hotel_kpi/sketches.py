@@ -0,0 +1,95 @@
+# Percentiles approchés par sketches de quantiles fusionnables
+# File: hotel_kpi/sketches.py
+# Description: Sketch à erreur relative bornée (buckets logarithmiques, type DDSketch) stocké sous
+# forme de table longue (dimensions, métrique, signe, bucket, effectif). Deux sketches se fusionnent
+# en additionnant les effectifs d'un même bucket : les sketches par partition ou par jour se
+# combinent sans relire les lignes brutes, puis donnent p50 / p90 / p99 par groupe.
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ALPHA = 0.01
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+# Métriques opérationnelles asymétriques de hotel_data_extended.csv
+SERVICE_METRICS = ['wait_time', 'clean_time', 'satisfaction', 'booking_lead_time']
+# En dessous de ce seuil (en valeur absolue), une valeur compte dans le bucket zéro
+MIN_INDEXABLE = 1e-9
+
+
+def _gamma(alpha):
+    return (1 + alpha) / (1 - alpha)
+
+
+def bucket_keys(values, alpha=DEFAULT_ALPHA):
+    """(signe, bucket) de chaque valeur : |x| dans ]gamma^(k-1), gamma^k]"""
+    values = np.asarray(values, dtype='float64')
+    sign = np.sign(values).astype('int8')
+    magnitude = np.abs(values)
+    sign[magnitude < MIN_INDEXABLE] = 0
+    with np.errstate(divide='ignore'):
+        keys = np.ceil(np.log(np.where(sign != 0, magnitude, 1.0)) / np.log(_gamma(alpha)))
+    return sign, np.where(sign != 0, keys, 0).astype('int32')
+
+
+def bucket_values(sign, keys, alpha=DEFAULT_ALPHA):
+    """Valeur représentative d'un bucket (erreur relative <= alpha)"""
+    gamma = _gamma(alpha)
+    return np.asarray(sign) * 2 * np.power(gamma, np.asarray(keys, dtype='float64')) / (gamma + 1)
+
+
+def build_sketch(df, by, metrics=SERVICE_METRICS, alpha=DEFAULT_ALPHA):
+    """Table de sketches de df : une ligne par (by..., metric, sign, key) avec son effectif
+
+    Les valeurs manquantes sont ignorées. Les colonnes de by peuvent inclure 'date' pour
+    des sketches journaliers, fusionnés ensuite sur n'importe quelle période.
+    """
+    by = list(by)
+    parts = []
+    for metric in metrics:
+        values = df[metric].to_numpy(dtype='float64', na_value=np.nan)
+        present = ~np.isnan(values)
+        sign, keys = bucket_keys(values[present], alpha)
+        part = df.loc[present, by].reset_index(drop=True)
+        part['metric'] = metric
+        part['sign'] = sign
+        part['key'] = keys
+        parts.append(part.groupby(by + ['metric', 'sign', 'key'], observed=True).size().rename('count'))
+    table = pd.concat(parts).reset_index()
+    table.attrs['alpha'] = alpha
+    return table
+
+
+def merge_sketches(tables, by):
+    """Fusionne des tables de sketches (mêmes alpha) au niveau des dimensions by"""
+    tables = list(tables)
+    alpha = tables[0].attrs.get('alpha', DEFAULT_ALPHA) if tables else DEFAULT_ALPHA
+    merged = (pd.concat(tables, ignore_index=True)
+              .groupby(list(by) + ['metric', 'sign', 'key'], observed=True)['count'].sum().reset_index())
+    merged.attrs['alpha'] = alpha
+    return merged
+
+
+def sketch_quantiles(table, by, quantiles=DEFAULT_QUANTILES):
+    """Percentiles par (by..., metric) à partir d'une table de sketches, plus l'effectif
+
+    Les dimensions absentes de by sont fusionnées au préalable.
+    """
+    by = list(by)
+    alpha = table.attrs.get('alpha', DEFAULT_ALPHA)
+    groups = by + ['metric']
+    table = merge_sketches([table], by)
+    # Ordre croissant des valeurs : négatifs (grands buckets d'abord), zéro, positifs
+    table['order'] = table['sign'].astype('int64') * table['key'].astype('int64')
+    table = table.sort_values(groups + ['sign', 'order'], kind='stable', ignore_index=True)
+    table['cum'] = table.groupby(groups, observed=True)['count'].cumsum()
+    total = table.groupby(groups, observed=True)['count'].transform('sum')
+    values = bucket_values(table['sign'], table['key'], alpha)
+
+    out = table.groupby(groups, observed=True)['count'].sum().rename('count').to_frame()
+    for q in quantiles:
+        # Premier bucket dont l'effectif cumulé dépasse le rang q * (n - 1)
+        reached = table['cum'].to_numpy() > np.floor(q * (total.to_numpy() - 1))
+        first = table[reached].groupby(groups, observed=True).head(1).index
+        out[f'p{q * 100:g}'] = pd.Series(values[first], index=pd.MultiIndex.from_frame(table.loc[first, groups])
+                                         if len(groups) > 1 else pd.Index(table.loc[first, groups[0]]))
+    return out.reset_index()
@@ -0,0 +1,109 @@
+# Calcul des KPI en flux pour les jeux de données plus grands que la mémoire
+# File: hotel_kpi/streaming.py
+# Description: Lit les données bloc par bloc et ne conserve que des accumulateurs additifs (sommes
+# de capacity, occupied, revenus, coûts, GOP par clé de groupe) ; les ratios (occupation, ADR,
+# RevPAR, GOPPAR) sont dérivés à la fin, comme dans le cube d'app4. Mémoire bornée par la taille
+# d'un bloc et le nombre de groupes, avec rappel de progression.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import schema
+
+from .metrics import ADDITIVE_MEASURES, dashboard_kpis, derive_ratios, wide_measures
+from .periods import period_start
+
+DEFAULT_CHUNK_ROWS = 500_000
+# Vues calculées en une passe : nom -> dimensions de regroupement (comme cube.query(by=...))
+VIEWS = {'daily': ('date',), 'by_room': ('room_type',)}
+
+
+class KpiAccumulator:
+    """Sommes additives par clé de groupe, alimentées bloc par bloc (mêmes filtres que cube.query)"""
+
+    def __init__(self, by=('date',), grain='day', hotel=None, start_date=None, end_date=None,
+                 room_types=None, channels=None):
+        self.by = list(by)
+        self.grain = grain
+        self.hotels = None if hotel is None else list(hotel) if isinstance(hotel, (list, tuple, set)) else [hotel]
+        self.start = pd.Timestamp(start_date) if start_date is not None else None
+        self.end = pd.Timestamp(end_date) if end_date is not None else None
+        self.room_types = room_types
+        self.channels = channels
+        self.sums = None
+        self.rows = 0
+
+    def _mask(self, chunk):
+        mask = np.ones(len(chunk), dtype=bool)
+        if self.hotels is not None:
+            mask &= chunk['hotel'].isin(self.hotels).to_numpy()
+        if self.start is not None or self.end is not None:
+            day = chunk['date'].dt.normalize()
+            if self.start is not None:
+                mask &= (day >= self.start).to_numpy()
+            if self.end is not None:
+                mask &= (day <= self.end).to_numpy()
+        if self.room_types is not None:
+            mask &= chunk['room_type'].isin(self.room_types).to_numpy()
+        if self.channels is not None:
+            mask &= chunk['channel'].isin(self.channels).to_numpy()
+        return mask
+
+    def update(self, chunk):
+        """Ajoute un bloc de lignes brutes aux accumulateurs ; renvoie le nombre de lignes retenues"""
+        chunk = chunk[self._mask(chunk)]
+        if chunk.empty:
+            return 0
+        keys = [period_start(chunk['date'], self.grain).to_numpy() if col == 'date' else np.asarray(chunk[col])
+                for col in self.by]
+        measures = chunk[ADDITIVE_MEASURES].astype(wide_measures(chunk))
+        part = measures.groupby(keys).sum()
+        part.index.names = self.by
+        # concat + groupby (plutôt que add) : les sommes entières restent entières
+        self.sums = part if self.sums is None else pd.concat([self.sums, part]).groupby(level=self.by).sum()
+        self.rows += len(chunk)
+        return len(chunk)
+
+    def result(self):
+        """Agrégats par groupe avec ratios dérivés (colonnes identiques à cube.query)"""
+        if self.sums is None:
+            empty = pd.DataFrame({c: pd.Series(dtype='float64') for c in self.by + ADDITIVE_MEASURES})
+            return derive_ratios(empty)
+        return derive_ratios(self.sums.sort_index().reset_index())
+
+
+def iter_chunks(source, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """(bloc, octets lus, octets totaux) depuis un chemin CSV ou un itérable de DataFrames"""
+    if isinstance(source, (str, os.PathLike)):
+        total = os.path.getsize(source)
+        with open(source, 'rb') as f:
+            for chunk in schema.iter_csv(f, chunk_rows):
+                yield chunk, f.tell(), total
+    else:
+        for chunk in source:
+            yield schema.apply_schema(chunk), None, None
+
+
+def stream_kpis(source, grain='day', hotel=None, start_date=None, end_date=None, room_types=None,
+                channels=None, views=VIEWS, chunk_rows=DEFAULT_CHUNK_ROWS, progress=None):
+    """KPI d'app4 calculés en une passe sur source (chemin CSV ou itérable de DataFrames)
+
+    progress(lignes_lues, octets_lus, octets_totaux) est appelé après chaque bloc (octets None pour
+    un itérable). Renvoie {vue: agrégats, ..., 'kpis': cartes KPI (si vue 'daily'), 'rows_read'}.
+    """
+    accumulators = {name: KpiAccumulator(by, grain, hotel, start_date, end_date, room_types, channels)
+                    for name, by in views.items()}
+    rows_read = 0
+    for chunk, bytes_read, total_bytes in iter_chunks(source, chunk_rows):
+        for acc in accumulators.values():
+            acc.update(chunk)
+        rows_read += len(chunk)
+        if progress is not None:
+            progress(rows_read, bytes_read, total_bytes)
+    result = {name: acc.result() for name, acc in accumulators.items()}
+    if 'daily' in result:
+        result['kpis'] = dashboard_kpis(result['daily'])
+    result['rows_read'] = rows_read
+    return result
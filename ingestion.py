@@ -0,0 +1,237 @@
+# Ingestion incrémentale des fichiers CSV alimentés en ajout (flux night audit)
+# File: ingestion.py
+# Description: Suit un high-water mark par fichier (taille, offset consommé, empreinte, dernière date
+# par hôtel), ne parse que les lignes ajoutées depuis le dernier passage et les fusionne dans le
+# DataFrame en cache ainsi que dans les agrégats dérivés abonnés.
+
+import hashlib
+import os
+import threading
+from io import BufferedReader, BytesIO, RawIOBase
+
+import pandas as pd
+
+import schema
+
+FINGERPRINT_BYTES = 4096
+SCAN_BLOCK = 65536
+
+UNCHANGED = 'unchanged'
+APPENDED = 'appended'
+REWRITTEN = 'rewritten'
+
+
+def _header(path):
+    with open(path, 'rb') as f:
+        return f.readline()
+
+
+def _last_complete_offset(path, size):
+    """Offset juste après le dernier saut de ligne (les lignes en cours d'écriture sont ignorées)"""
+    with open(path, 'rb') as f:
+        pos = size
+        while pos > 0:
+            start = max(0, pos - SCAN_BLOCK)
+            f.seek(start)
+            block = f.read(pos - start)
+            idx = block.rfind(b'\n')
+            if idx >= 0:
+                return start + idx + 1
+            pos = start
+    return 0
+
+
+def _fingerprint(path, offset):
+    """Empreinte de l'en-tête et des derniers octets consommés, pour détecter une réécriture"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        h.update(f.readline())
+        f.seek(max(0, offset - FINGERPRINT_BYTES))
+        h.update(f.read(min(offset, FINGERPRINT_BYTES)))
+    return h.hexdigest()
+
+
+class _Prefix(RawIOBase):
+    """Lecture bornée aux offset premiers octets d'un fichier ouvert en binaire"""
+
+    def __init__(self, f, offset):
+        self._f = f
+        self._left = offset
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self._f.readinto(memoryview(buffer)[:min(len(buffer), self._left)])
+        self._left -= n
+        return n
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+def open_prefix(path, offset):
+    """Flux binaire des octets [0, offset) de path : les lignes ajoutées pendant la lecture sont ignorées"""
+    return BufferedReader(_Prefix(open(path, 'rb'), offset))
+
+
+def file_watermark(path, offset=None):
+    """High-water mark d'un fichier lu jusqu'à offset (par défaut : dernière ligne complète)"""
+    stat = os.stat(path)
+    if offset is None:
+        offset = _last_complete_offset(path, stat.st_size)
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'offset': offset,
+        'fingerprint': _fingerprint(path, offset),
+    }
+
+
+def detect_change(path, watermark):
+    """Compare le fichier à son high-water mark : UNCHANGED, APPENDED ou REWRITTEN"""
+    if watermark is None:
+        return REWRITTEN
+    stat = os.stat(path)
+    if stat.st_size == watermark['size'] and stat.st_mtime == watermark['mtime']:
+        return UNCHANGED
+    if stat.st_size < watermark['offset'] or _fingerprint(path, watermark['offset']) != watermark['fingerprint']:
+        return REWRITTEN
+    if _last_complete_offset(path, stat.st_size) == watermark['offset']:
+        return UNCHANGED
+    return APPENDED
+
+
+def read_appended(path, watermark, **read_kwargs):
+    """Parse uniquement les lignes complètes ajoutées après watermark['offset']
+
+    Renvoie (nouvelles lignes, nouveau high-water mark).
+    """
+    stat = os.stat(path)
+    end = _last_complete_offset(path, stat.st_size)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(watermark['offset'])
+        tail = f.read(end - watermark['offset'])
+    rows = pd.read_csv(BytesIO(header + tail), **read_kwargs)
+    return rows, file_watermark(path, end)
+
+
+def concat_frames(frame, rows):
+    """Concatène en conservant les colonnes catégorielles (union des catégories), sans modifier frame"""
+    rows = rows.copy()
+    widened = {}
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype) and col in rows.columns:
+            categories = frame[col].cat.categories
+            new = pd.Index(rows[col].dropna().unique()).difference(categories)
+            if len(new):
+                categories = categories.append(new)
+                widened[col] = frame[col].cat.set_categories(categories)
+            rows[col] = pd.Categorical(rows[col], categories=categories)
+    # frame peut être partagé (cache, autres sessions) : les catégories élargies vont dans une copie
+    if widened:
+        frame = frame.assign(**widened)
+    return pd.concat([frame, rows], ignore_index=True)
+
+
+class IncrementalCsvLoader:
+    """DataFrame maintenu à jour à partir d'un CSV alimenté en ajout
+
+    initial_loader(path) sert au chargement complet et renvoie (frame, high-water mark auquel il
+    correspond), ex: storage.load_table_with_watermark ; sinon pd.read_csv borné à file_watermark.
+    Les abonnés (subscribe) reçoivent (nouvelles_lignes, full_reload) à chaque changement.
+    Partagé entre sessions : les rafraîchissements sont sérialisés et le frame publié est remplacé,
+    jamais modifié, donc un frame obtenu par load() reste cohérent.
+    """
+
+    def __init__(self, path, initial_loader=None, date_column='date', hotel_column='hotel'):
+        self.path = path
+        self.initial_loader = initial_loader
+        self.date_column = date_column
+        self.hotel_column = hotel_column
+        self.frame = None
+        self.watermark = None
+        self.last_dates = {}
+        self.version = 0
+        self.late_rows = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, replay=False):
+        """Abonne callback ; avec replay, il reçoit d'abord le frame courant (full_reload=True)
+
+        L'abonnement et le rejeu se font sous le verrou du chargeur : aucun changement n'est perdu entre les deux.
+        """
+        with self._lock:
+            if replay:
+                self._refresh()
+                callback(self.frame, True)
+            self._subscribers.append(callback)
+
+    def _read_kwargs(self):
+        header = _header(self.path).decode('utf-8')
+        return {'parse_dates': [self.date_column]} if self.date_column in header.strip().split(',') else {}
+
+    def _update_last_dates(self, rows, last_dates):
+        """Met à jour last_dates (hôtel -> dernière date) ; renvoie le nombre de lignes arrivées en retard"""
+        if self.date_column not in rows.columns or rows.empty:
+            return 0
+        if self.hotel_column in rows.columns:
+            latest = rows.groupby(self.hotel_column, observed=True)[self.date_column].max()
+        else:
+            latest = pd.Series({None: rows[self.date_column].max()})
+        late = 0
+        for hotel, last in latest.items():
+            previous = last_dates.get(hotel)
+            if previous is not None:
+                hotel_rows = rows if hotel is None else rows[rows[self.hotel_column] == hotel]
+                late += int((hotel_rows[self.date_column] < previous).sum())
+            if previous is None or last > previous:
+                last_dates[hotel] = last
+        return late
+
+    def _refresh(self):
+        # Appelé sous self._lock ; l'état (frame, watermark, dates, version) est remplacé d'un bloc
+        change = detect_change(self.path, self.watermark) if self.frame is not None else REWRITTEN
+        if change == UNCHANGED:
+            return self.frame.iloc[0:0]
+        if change == REWRITTEN:
+            # Le frame et le high-water mark portent sur les mêmes octets : une ligne ajoutée pendant
+            # la lecture sera lue par le prochain ajout, pas deux fois
+            if self.initial_loader is not None:
+                frame, watermark = self.initial_loader(self.path)
+            else:
+                watermark = file_watermark(self.path)
+                with open_prefix(self.path, watermark['offset']) as f:
+                    frame = schema.apply_schema(pd.read_csv(f, **self._read_kwargs()))
+            rows, full_reload = frame, True
+            last_dates, late_rows = {}, 0
+        else:
+            rows, watermark = read_appended(self.path, self.watermark, **self._read_kwargs())
+            rows = schema.apply_schema(rows)
+            frame = concat_frames(self.frame, rows)
+            full_reload = False
+            last_dates, late_rows = dict(self.last_dates), self.late_rows
+        late_rows += self._update_last_dates(rows, last_dates)
+        self.frame, self.watermark, self.last_dates, self.late_rows = frame, watermark, last_dates, late_rows
+        self.version += 1
+        for callback in self._subscribers:
+            callback(rows, full_reload)
+        return rows
+
+    def refresh(self):
+        """Intègre les changements du fichier ; renvoie les lignes nouvellement chargées"""
+        with self._lock:
+            return self._refresh()
+
+    def load(self):
+        """Frame courant, rafraîchi au préalable"""
+        return self.snapshot()[0]
+
+    def snapshot(self):
+        """(frame, version) cohérents, rafraîchis au préalable : la version sert de clé de cache du frame"""
+        with self._lock:
+            self._refresh()
+            return self.frame, self.version
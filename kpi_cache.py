@@ -0,0 +1,206 @@
+# Cache de résultats KPI partagé entre les sessions Streamlit
+# File: kpi_cache.py
+# Description: Cache LRU à l'échelle du processus, indexé par un hash canonique de la sélection
+# (hotel, période, room_type, canaux) et par la version des données, avec plafond mémoire,
+# compteurs hit/miss et persistance disque optionnelle pour redémarrer « à chaud ».
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Versions remplacées mémorisées par source : une session encore sur l'une d'elles n'invalide rien
+MAX_RETIRED_VERSIONS = 256
+
+
+def canonical_value(value):
+    """Forme JSON stable d'une valeur de sélection (dates ISO, ensembles triés)"""
+    if isinstance(value, (list, tuple, set)):
+        return sorted(canonical_value(v) for v in value) if isinstance(value, set) else [canonical_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): canonical_value(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if hasattr(value, 'isoformat'):
+        return pd.Timestamp(value).isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def selection_key(name, selection, data_version):
+    """Hash canonique d'un calcul : même sélection => même clé, quel que soit l'ordre des canaux"""
+    selection = dict(selection)
+    for field in ('room_types', 'channels'):
+        if selection.get(field) is not None:
+            selection[field] = sorted(str(v) for v in selection[field])
+    payload = json.dumps([name, canonical_value(selection), canonical_value(data_version)], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _version_tag(value):
+    return hashlib.sha256(json.dumps(canonical_value(value)).encode('utf-8')).hexdigest()[:16]
+
+
+def estimate_size(value):
+    """Taille approximative en octets d'un résultat mis en cache"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum()) if isinstance(value, pd.DataFrame) \
+            else int(value.memory_usage(deep=True))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class KpiCache:
+    """Cache LRU thread-safe ; les valeurs sont partagées entre sessions et doivent rester en lecture seule"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, persist_dir=None):
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.versions = {}
+        self._retired = {}
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    # ----------------------
+    # Persistance disque
+    # ----------------------
+    def _disk_path(self, key, source, data_version):
+        return os.path.join(self.persist_dir, _version_tag(source), _version_tag(data_version), key + '.pkl')
+
+    def _load_from_disk(self, key, source, data_version):
+        if not self.persist_dir:
+            return None
+        try:
+            with open(self._disk_path(key, source, data_version), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Fichier illisible ou classe déplacée depuis l'écriture : recalcul
+            return None
+
+    def _save_to_disk(self, key, source, data_version, value):
+        if not self.persist_dir:
+            return
+        path = self._disk_path(key, source, data_version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # ----------------------
+    # Cache mémoire
+    # ----------------------
+    def invalidate(self, source, data_version=None):
+        """Supprime les résultats d'une source de données, sauf ceux de data_version (mémoire et disque)"""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e[2] == source and e[3] != data_version]:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if source in self.versions and self.versions[source] != data_version:
+                retired = self._retired.setdefault(source, OrderedDict())
+                retired[_version_tag(self.versions[source])] = True
+                while len(retired) > MAX_RETIRED_VERSIONS:
+                    retired.popitem(last=False)
+            self.versions[source] = data_version
+        source_dir = os.path.join(self.persist_dir, _version_tag(source)) if self.persist_dir else None
+        if source_dir and os.path.isdir(source_dir):
+            keep = _version_tag(data_version) if data_version is not None else None
+            for name in os.listdir(source_dir):
+                if name != keep:
+                    shutil.rmtree(os.path.join(source_dir, name), ignore_errors=True)
+
+    def _store(self, key, value, source, data_version):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size, source, data_version)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted[1]
+                self.evictions += 1
+
+    def _is_new_version(self, source, data_version):
+        with self._lock:
+            if source in self.versions and self.versions[source] == data_version:
+                return False
+            return _version_tag(data_version) not in self._retired.get(source, ())
+
+    def get_or_compute(self, name, selection, data_version, compute, source='default'):
+        """Renvoie le résultat en cache pour (name, sélection, version), sinon le calcule et le stocke
+
+        Une data_version jamais vue pour une source devient la plus récente et invalide les résultats
+        des versions antérieures ; une session encore sur une version remplacée est servie par le LRU
+        sans rien invalider (deux sessions sur deux versions ne se vident pas mutuellement le cache).
+        """
+        if self._is_new_version(source, data_version):
+            self.invalidate(source, data_version)
+        key = selection_key(name, selection, data_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        value = self._load_from_disk(key, source, data_version)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+        else:
+            with self._lock:
+                self.misses += 1
+            value = compute()
+            self._save_to_disk(key, source, data_version, value)
+        self._store(key, value, source, data_version)
+        return value
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache(max_bytes=DEFAULT_MAX_BYTES, persist_dir=None):
+    """Instance unique du processus, partagée par toutes les sessions (paramètres pris au premier appel)"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = KpiCache(max_bytes=max_bytes, persist_dir=persist_dir)
+        return _shared_cache
@@ -0,0 +1,172 @@
+# Instrumentation légère des étapes d'un rerun Streamlit
+# File: profiling.py
+# Description: Gestionnaires de contexte / décorateurs mesurant, par étape (chargement, filtre,
+# agrégats, figures, tableaux, exports), le temps, les lignes en entrée/sortie et la variation de RSS.
+# Un Profiler par rerun : résumé affichable dans la sidebar et une ligne JSON par rerun dans un
+# journal tournant. Coût par étape : deux lectures d'horloge et de /proc, négligeable en production.
+
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+
+PROFILE_LOG_PATH = os.environ.get('PROFILE_LOG_PATH', 'logs/profile.jsonl')
+PROFILE_LOG_MAX_BYTES = 5 * 1024 * 1024
+PROFILE_LOG_BACKUPS = 3
+ENABLED = os.environ.get('PROFILING', '1') != '0'
+
+_logger = logging.getLogger('hotel_kpi.profile')
+_logger.propagate = False
+_handler_lock = threading.Lock()
+
+
+def current_rss():
+    """RSS courant en octets (Linux : /proc/self/statm, sinon pic du processus)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _rows(value):
+    if value is None:
+        return None
+    try:
+        return len(value)
+    except TypeError:
+        return int(value)
+
+
+def _log():
+    """Logger du journal tournant, configuré au premier usage"""
+    if not _logger.handlers:
+        with _handler_lock:
+            if not _logger.handlers:
+                directory = os.path.dirname(PROFILE_LOG_PATH)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(PROFILE_LOG_PATH, maxBytes=PROFILE_LOG_MAX_BYTES,
+                                              backupCount=PROFILE_LOG_BACKUPS, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                _logger.addHandler(handler)
+                _logger.setLevel(logging.INFO)
+    return _logger
+
+
+class Stage:
+    """Mesure d'une étape ; rows_out peut être renseigné dans le bloc with"""
+
+    __slots__ = ('name', 'rows_in', 'rows_out', 'seconds', 'rss_delta', 'error')
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = _rows(rows_in)
+        self.rows_out = None
+        self.seconds = None
+        self.rss_delta = None
+        self.error = None
+
+    def set_rows_out(self, value):
+        self.rows_out = _rows(value)
+        return value
+
+    def as_dict(self):
+        return {'stage': self.name, 'seconds': self.seconds, 'rows_in': self.rows_in,
+                'rows_out': self.rows_out, 'rss_delta_mb': None if self.rss_delta is None else self.rss_delta / 1e6,
+                'error': self.error}
+
+
+class Profiler:
+    """Profil d'un rerun : liste ordonnée d'étapes mesurées"""
+
+    def __init__(self, app, enabled=ENABLED):
+        self.app = app
+        self.enabled = enabled
+        self.stages = []
+        self.started = time.perf_counter()
+        self.rss_start = current_rss() if enabled else None
+        self.finished = False
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        record = Stage(name, rows_in)
+        if not self.enabled:
+            yield record
+            return
+        rss = current_rss()
+        t0 = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.seconds = time.perf_counter() - t0
+            record.rss_delta = current_rss() - rss
+            self.stages.append(record)
+
+    def profiled(self, name=None, rows_in=None):
+        """Décorateur : mesure chaque appel ; rows_out = len(résultat) si applicable"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__, rows_in) as record:
+                    result = func(*args, **kwargs)
+                    if hasattr(result, '__len__'):
+                        record.set_rows_out(result)
+                    return result
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """DataFrame des étapes (une ligne par étape, plus TOTAL)"""
+        frame = pd.DataFrame([s.as_dict() for s in self.stages],
+                             columns=['stage', 'seconds', 'rows_in', 'rows_out', 'rss_delta_mb', 'error'])
+        total = time.perf_counter() - self.started
+        rss = None if self.rss_start is None else (current_rss() - self.rss_start) / 1e6
+        frame.loc[len(frame)] = ['TOTAL', total, None, None, rss, None]
+        return frame.set_index('stage')
+
+    def finish(self):
+        """Écrit le profil du rerun dans le journal tournant (une fois) ; renvoie le résumé"""
+        summary = self.summary()
+        if self.enabled and not self.finished:
+            self.finished = True
+            try:
+                _log().info(json.dumps({
+                    'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+                    'app': self.app,
+                    'total_seconds': summary.loc['TOTAL', 'seconds'],
+                    'stages': [s.as_dict() for s in self.stages],
+                }, ensure_ascii=False, default=str))
+            except OSError:
+                pass  # journal non inscriptible : le profil reste affiché
+        return summary
+
+
+def read_log(path=PROFILE_LOG_PATH, app=None, last=None):
+    """Relit le journal courant : une ligne par (rerun, étape)"""
+    rows = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        lines = []
+    for line in lines[-last:] if last else lines:
+        entry = json.loads(line)
+        if app is not None and entry['app'] != app:
+            continue
+        for s in entry['stages']:
+            rows.append({'timestamp': entry['timestamp'], 'app': entry['app'], **s})
+    return pd.DataFrame(rows)
@@ -0,0 +1,144 @@
+# Cube d'agrégats pré-calculés pour les KPI hôteliers
+# File: rollup.py
+# Description: Matérialise les mesures additives (capacity, occupied, room_revenue, total_revenue,
+# total_cost, gop) par (hotel, période, room_type, channel) aux grains jour / semaine / mois / année.
+# Les ratios (occupation, ADR, RevPAR, GOPPAR) sont dérivés des sommes au moment de la requête.
+
+import numpy as np
+import pandas as pd
+
+from hotel_kpi.metrics import ADDITIVE_MEASURES, derive_ratios, wide_measures
+from hotel_kpi.periods import GRAINS, PERIOD_GRAINS, period_end, period_start
+from ingestion import concat_frames
+
+MEASURES = ADDITIVE_MEASURES
+KEYS = ['hotel', 'date', 'room_type', 'channel']
+
+
+class RollupCube:
+    """Sommes de measures par keys (dont 'date') à chaque grain
+
+    Sans df, le cube reste vide jusqu'au premier on_ingest (abonnement avec rejeu à un chargeur).
+    Chaque mise à jour remplace self.tables d'un bloc : une requête concurrente voit l'état avant ou après.
+    """
+
+    def __init__(self, df=None, keys=KEYS, measures=MEASURES):
+        self.keys = list(keys)
+        self.measures = list(measures)
+        self.tables = {}
+        if df is not None:
+            self.build(df)
+
+    def build(self, df):
+        """Matérialise le cube à tous les grains à partir des lignes brutes"""
+        day = self._day_rows(df)
+        tables = {'day': day}
+        for grain in GRAINS:
+            if grain != 'day':
+                tables[grain] = self._rollup(day, grain)
+        self.tables = tables
+
+    def append(self, rows):
+        """Fusionne de nouvelles lignes brutes dans chaque grain sans reconstruire le cube"""
+        if rows.empty:
+            return
+        delta = self._day_rows(rows)
+        tables = {'day': self._merge(self.tables['day'], delta)}
+        for grain in GRAINS:
+            if grain != 'day':
+                tables[grain] = self._merge(self.tables[grain], self._rollup(delta, grain))
+        self.tables = tables
+
+    def on_ingest(self, rows, full_reload):
+        """Abonné pour ingestion.IncrementalCsvLoader"""
+        if full_reload:
+            self.build(rows)
+        else:
+            self.append(rows)
+
+    def _day_rows(self, df):
+        # Les mesures compactes du schéma (int16, float32) sont cumulées sur 64 bits dans le cube
+        df = df[self.keys + self.measures].astype(wide_measures(df, self.measures))
+        day = df.groupby(self.keys, observed=True, sort=False)[self.measures].sum().reset_index()
+        day['date'] = pd.to_datetime(day['date']).dt.normalize()
+        return day
+
+    def _rollup(self, day, grain):
+        rolled = day.assign(date=period_start(day['date'], grain).to_numpy())
+        return rolled.groupby(self.keys, observed=True, sort=False)[self.measures].sum().reset_index()
+
+    def _merge(self, table, delta):
+        # Seules les lignes des périodes touchées par le delta sont ré-agrégées
+        touched = table['date'].isin(delta['date'].unique()).to_numpy()
+        merged = concat_frames(table[touched], delta)
+        merged = merged.groupby(self.keys, observed=True, sort=False)[self.measures].sum().reset_index()
+        return concat_frames(table[~touched], merged)
+
+    @staticmethod
+    def _select(table, hotel=None, room_types=None, channels=None):
+        mask = np.ones(len(table), dtype=bool)
+        if hotel is not None:
+            mask &= table['hotel'].isin(hotel if isinstance(hotel, (list, tuple, set)) else [hotel]).to_numpy()
+        if room_types is not None:
+            mask &= table['room_type'].isin(room_types).to_numpy()
+        if channels is not None:
+            mask &= table['channel'].isin(channels).to_numpy()
+        return table[mask]
+
+    def query(self, grain='day', hotel=None, start_date=None, end_date=None, room_types=None, channels=None,
+              by=('date',)):
+        """Agrège le cube au grain demandé, groupé par les dimensions de by, avec ratios dérivés
+
+        Les périodes entièrement comprises dans [start_date, end_date] sont lues dans la table
+        du grain ; les périodes partielles en bordure sont complétées depuis la table journalière.
+        """
+        tables = self.tables
+        table = self._select(tables[grain], hotel, room_types, channels)
+        start = pd.Timestamp(start_date) if start_date is not None else None
+        end = pd.Timestamp(end_date) if end_date is not None else None
+
+        if grain == 'day' or (start is None and end is None):
+            rows = self._clip(table, start, end)
+        else:
+            # Périodes complètes : [first_full, last_full]
+            one_day = pd.Timedelta(days=1)
+            first_full, last_full = None, None
+            edges = []
+            if start is not None:
+                first_start = period_start([start], grain).iloc[0]
+                first_full = first_start
+                if first_start < start:
+                    first_full = period_end([first_start], grain).iloc[0] + one_day
+                    edge_end = first_full - one_day if end is None else min(first_full - one_day, end)
+                    edges.append((start, edge_end))
+            if end is not None:
+                last_start = period_start([end], grain).iloc[0]
+                last_full = last_start
+                if period_end([last_start], grain).iloc[0] > end:
+                    last_full = last_start - one_day
+                    edge_start = last_start if not edges else max(last_start, edges[0][1] + one_day)
+                    if edge_start <= end:
+                        edges.append((edge_start, end))
+            parts = [self._clip(table, first_full, last_full)]
+
+            # Bordures : jours des périodes partiellement couvertes, relus dans la table journalière
+            day = self._select(tables['day'], hotel, room_types, channels)
+            for edge_start, edge_end in edges:
+                edge = self._clip(day, edge_start, edge_end)
+                parts.append(edge.assign(date=period_start(edge['date'], grain).to_numpy()))
+            rows = pd.concat(parts, ignore_index=True)
+        by = list(by)
+        agg = (rows.groupby(by, observed=True)[self.measures].sum().reset_index() if by
+               else rows[self.measures].sum().to_frame().T)
+        # Ratios hôteliers seulement si le cube porte les mesures dont ils dérivent
+        return derive_ratios(agg) if set(MEASURES) <= set(self.measures) else agg
+
+    @staticmethod
+    def _clip(table, start, end):
+        mask = np.ones(len(table), dtype=bool)
+        if start is not None:
+            mask &= (table['date'] >= start).to_numpy()
+        if end is not None:
+            mask &= (table['date'] <= end).to_numpy()
+        return table[mask]
+
@@ -0,0 +1,150 @@
+# Schéma et types compacts des jeux de données hôteliers
+# File: schema.py
+# Description: Types explicites pour hotel_data.csv et hotel_data_extended.csv (catégories pour le
+# texte répété, int16 pour les petits entiers, float32 pour les mesures, datetime64 pour la date),
+# utilisés par toutes les applications au chargement, avec un rapport mémoire avant/après.
+
+import io
+
+import numpy as np
+import pandas as pd
+
+DATE_COLUMN = 'date'
+
+HOTEL_DATA_DTYPES = {
+    'hotel': 'category',
+    'date': 'datetime64[ns]',
+    'room_type': 'category',
+    'capacity': 'int16',
+    'occupied': 'int16',
+    'adr': 'float32',
+    'room_revenue': 'float32',
+    'fnb_revenue': 'float32',
+    'spa_revenue': 'float32',
+    'other_revenue': 'float32',
+    'total_revenue': 'float32',
+    'rooms_cost': 'float32',
+    'fnb_cost': 'float32',
+    'spa_cost': 'float32',
+    'other_cost': 'float32',
+    'total_cost': 'float32',
+    'channel': 'category',
+    'occupancy_rate': 'float32',
+    'revpar': 'float32',
+    'gop': 'float32',
+    'goppar': 'float32',
+}
+
+EXTENDED_DTYPES = {
+    'date': 'datetime64[ns]',
+    'department': 'category',
+    'room_type': 'category',
+    'channel': 'category',
+    'segment': 'category',
+    'shift': 'category',
+    'building': 'category',
+    'cost': 'float32',
+    'revenue': 'float32',
+    'satisfaction': 'float32',
+    'wait_time': 'float32',
+    'rev_per_cust': 'float32',
+    'food_cost': 'float32',
+    'clean_time': 'float32',
+    'adr': 'float32',
+    'booking_lead_time': 'int16',
+    'labor_cost': 'float32',
+    'productivity': 'float32',
+    'profit_margin': 'float32',
+    'revpar_estimate': 'float32',
+    'occupancy_rate': 'float32',
+}
+
+# Union des deux schémas (room_type, channel, adr... ont le même type dans les deux)
+DTYPES = {**EXTENDED_DTYPES, **HOTEL_DATA_DTYPES}
+
+# Montants au centime de hotel_data.csv (float32 en mémoire : arrondis en float64 à l'export)
+MONEY_COLUMNS = ['adr', 'room_revenue', 'fnb_revenue', 'spa_revenue', 'other_revenue', 'total_revenue',
+                 'rooms_cost', 'fnb_cost', 'spa_cost', 'other_cost', 'total_cost', 'gop']
+MONEY_DECIMALS = 2
+
+
+def dtypes_for(columns):
+    """Types du schéma applicables à une liste de colonnes (colonnes inconnues ignorées)"""
+    return {c: DTYPES[c] for c in columns if c in DTYPES}
+
+
+def kind(dtype):
+    """Type logique d'un dtype du schéma : 'category', 'datetime', 'int' ou 'float'"""
+    dtype = str(dtype)
+    if dtype == 'category':
+        return 'category'
+    if dtype.startswith('datetime'):
+        return 'datetime'
+    return 'int' if dtype.startswith('int') else 'float'
+
+
+def int_bounds(dtype):
+    """Bornes (min, max) d'un type entier du schéma"""
+    info = np.iinfo(np.dtype(dtype))
+    return info.min, info.max
+
+
+def read_csv(path_or_buffer, **kwargs):
+    """pd.read_csv avec les types compacts du schéma (date parsée en datetime64)"""
+    header = pd.read_csv(path_or_buffer, nrows=0, **kwargs).columns
+    if hasattr(path_or_buffer, 'seek'):
+        path_or_buffer.seek(0)
+    dtypes = dtypes_for(header)
+    parse_dates = [c for c, t in dtypes.items() if kind(t) == 'datetime']
+    csv_dtypes = {c: t for c, t in dtypes.items() if c not in parse_dates}
+    df = pd.read_csv(path_or_buffer, dtype=csv_dtypes, parse_dates=parse_dates, **kwargs)
+    return apply_schema(df)
+
+
+def iter_csv(path_or_buffer, chunk_rows, **kwargs):
+    """Lecture par blocs de chunk_rows lignes, chaque bloc aux types du schéma"""
+    header = pd.read_csv(path_or_buffer, nrows=0, **kwargs).columns
+    if hasattr(path_or_buffer, 'seek'):
+        path_or_buffer.seek(0)
+    dtypes = dtypes_for(header)
+    parse_dates = [c for c, t in dtypes.items() if kind(t) == 'datetime']
+    csv_dtypes = {c: t for c, t in dtypes.items() if c not in parse_dates}
+    with pd.read_csv(path_or_buffer, dtype=csv_dtypes, parse_dates=parse_dates, chunksize=chunk_rows,
+                     **kwargs) as reader:
+        for chunk in reader:
+            yield apply_schema(chunk)
+
+
+def apply_schema(df):
+    """Convertit en place les colonnes connues vers les types du schéma ; renvoie df"""
+    for col, dtype in dtypes_for(df.columns).items():
+        if kind(dtype) == 'datetime':
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col])
+        elif str(df[col].dtype) != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def _default_read(df):
+    """df relu par un pd.read_csv sans options (types réellement obtenus par défaut pour ces données)"""
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)))
+
+
+def memory_report(df, before=None, source=None):
+    """Mémoire par colonne avant/après (octets)
+
+    before par défaut : pd.read_csv(source) sans options si source (chemin ou fichier) est donné,
+    sinon df écrit en CSV puis relu de la même façon.
+    """
+    if before is None:
+        before = pd.read_csv(source) if source is not None else _default_read(df)
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': before.memory_usage(deep=True, index=False),
+        'dtype_after': df.dtypes.astype(str),
+        'bytes_after': df.memory_usage(deep=True, index=False),
+    })
+    report.loc['TOTAL', ['bytes_before', 'bytes_after']] = [report['bytes_before'].sum(), report['bytes_after'].sum()]
+    report['ratio'] = report['bytes_before'] / report['bytes_after']
+    return report
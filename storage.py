@@ -0,0 +1,237 @@
+# Stockage colonnaire partitionné des données hôtelières
+# File: storage.py
+# Description: Convertit hotel_data.csv / hotel_data_extended.csv en jeux Parquet partitionnés
+# (par hôtel et par mois) avec encodage catégoriel, puis charge uniquement les colonnes
+# et partitions nécessaires à une sélection de filtres (predicate pushdown).
+
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+import ingestion
+import schema
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus, le remplacement du jeu reste atomique
+    fcntl = None
+
+PARTITION_COLUMNS = ['hotel', 'month']
+SOURCE_MARKER = '_source.json'
+DEFAULT_CHUNKSIZE = 500_000
+
+
+def dataset_path(csv_path):
+    """Répertoire Parquet associé à un fichier CSV (ex: hotel_data.csv -> hotel_data_parquet/)"""
+    return os.path.splitext(csv_path)[0] + '_parquet'
+
+
+def _read_marker(dataset_dir):
+    try:
+        with open(os.path.join(dataset_dir, SOURCE_MARKER)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_marker(dataset_dir, marker):
+    tmp_path = os.path.join(dataset_dir, SOURCE_MARKER + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(marker, f)
+    os.replace(tmp_path, os.path.join(dataset_dir, SOURCE_MARKER))
+
+
+def _write_parts(table, dataset_dir, part):
+    ds.write_dataset(
+        table, dataset_dir, format='parquet',
+        partitioning=_partitioning(table.column_names),
+        basename_template=f'part-{part}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+    )
+
+
+@contextmanager
+def _locked(dataset_dir, shared=False):
+    """Verrou inter-processus (fichier voisin du jeu) : exclusif pour une conversion ou un ajout,
+    partagé pour une lecture (aucune écriture du jeu pendant le scan)"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(dataset_dir)), exist_ok=True)
+    with open(dataset_dir + '.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _partitioning(columns):
+    fields = [pa.field(c, pa.string()) for c in PARTITION_COLUMNS if c in columns]
+    return ds.partitioning(pa.schema(fields), flavor='hive')
+
+
+def _prepare_chunk(chunk):
+    # Types compacts du schéma (catégories -> encodage dictionnaire Parquet, int16, float32)
+    chunk = schema.apply_schema(chunk)
+    if 'date' in chunk.columns:
+        chunk['month'] = chunk['date'].dt.strftime('%Y-%m')
+    return pa.Table.from_pandas(chunk, preserve_index=False)
+
+
+def convert_csv(csv_path, dataset_dir=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Convertit un CSV en jeu Parquet partitionné, bloc par bloc (mémoire bornée)
+
+    L'écriture se fait dans un répertoire temporaire propre à l'appel, renommé à la place du jeu
+    précédent une fois la conversion terminée ; appeler sous _locked (voir ensure_dataset).
+    """
+    dataset_dir = dataset_dir or dataset_path(csv_path)
+    parent = os.path.dirname(os.path.abspath(dataset_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=os.path.basename(dataset_dir) + '.', suffix='.tmp')
+    try:
+        # Seules les lignes complètes jusqu'au high-water mark sont converties : une ligne ajoutée
+        # pendant la conversion sera lue par le prochain append_csv_tail, pas deux fois
+        marker = {'watermark': ingestion.file_watermark(csv_path), 'columns': None, 'next_part': 0}
+        with ingestion.open_prefix(csv_path, marker['watermark']['offset']) as f:
+            for chunk in pd.read_csv(f, chunksize=chunksize):
+                marker['columns'] = marker['columns'] or chunk.columns.tolist()
+                _write_parts(_prepare_chunk(chunk), tmp_dir, marker['next_part'])
+                marker['next_part'] += 1
+        _write_marker(tmp_dir, marker)
+
+        # Remplacement du jeu précédent une fois la conversion terminée
+        old_dir = None
+        if os.path.exists(dataset_dir):
+            old_dir = tmp_dir + '.old'
+            os.replace(dataset_dir, old_dir)
+        os.replace(tmp_dir, dataset_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    return dataset_dir
+
+
+def append_csv_tail(csv_path, dataset_dir, marker):
+    """Ajoute au jeu Parquet les seules lignes ajoutées au CSV depuis la dernière conversion
+
+    Les fichiers sont écrits hors du jeu puis renommés à leur place : un fichier Parquet n'y est
+    jamais visible à moitié écrit. Appeler sous _locked (voir ensure_dataset).
+    """
+    rows, marker['watermark'] = ingestion.read_appended(csv_path, marker['watermark'])
+    if not rows.empty:
+        parent = os.path.dirname(os.path.abspath(dataset_dir))
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix=os.path.basename(dataset_dir) + '.', suffix='.tmp')
+        try:
+            _write_parts(_prepare_chunk(rows), tmp_dir, marker['next_part'])
+            for root, _, files in os.walk(tmp_dir):
+                target = os.path.join(dataset_dir, os.path.relpath(root, tmp_dir))
+                os.makedirs(target, exist_ok=True)
+                for name in files:
+                    os.replace(os.path.join(root, name), os.path.join(target, name))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        marker['next_part'] += 1
+    _write_marker(dataset_dir, marker)
+    return dataset_dir
+
+
+def is_up_to_date(csv_path, dataset_dir=None):
+    marker = _read_marker(dataset_dir or dataset_path(csv_path))
+    return marker is not None and ingestion.detect_change(csv_path, marker['watermark']) == ingestion.UNCHANGED
+
+
+def ensure_dataset(csv_path, dataset_dir=None):
+    """Renvoie le répertoire Parquet du CSV, mis à jour par ajout ou reconverti si le CSV a changé"""
+    dataset_dir = dataset_dir or dataset_path(csv_path)
+    # Vérification et mise à jour sous le même verrou : deux processus ne convertissent pas en parallèle
+    with _locked(dataset_dir):
+        marker = _read_marker(dataset_dir)
+        change = ingestion.detect_change(csv_path, marker['watermark']) if marker else ingestion.REWRITTEN
+        if change == ingestion.APPENDED:
+            append_csv_tail(csv_path, dataset_dir, marker)
+        elif change == ingestion.REWRITTEN:
+            convert_csv(csv_path, dataset_dir)
+    return dataset_dir
+
+
+@contextmanager
+def open_dataset(csv_path):
+    """Jeu Parquet à jour du CSV ; produit (dataset, colonnes du CSV d'origine, high-water mark)
+
+    Le scan doit se faire dans le bloc with : le verrou partagé y empêche conversion et ajout,
+    le jeu lu correspond donc exactement au high-water mark produit.
+    """
+    dataset_dir = ensure_dataset(csv_path)
+    with _locked(dataset_dir, shared=True):
+        marker = _read_marker(dataset_dir)
+        columns = marker['columns'] or []
+        dataset = ds.dataset(dataset_dir, format='parquet', partitioning=_partitioning(columns + ['month']))
+        yield dataset, columns, marker['watermark']
+
+
+def _as_list(value):
+    if value is None or isinstance(value, (list, tuple, set)):
+        return value
+    return [value]
+
+
+def build_filter(schema_names, hotel=None, start_date=None, end_date=None, room_types=None, channels=None):
+    """Expression pyarrow pour une sélection ; les filtres sur des colonnes absentes sont ignorés"""
+    expr = None
+
+    def _and(e):
+        return e if expr is None else expr & e
+
+    if hotel is not None and 'hotel' in schema_names:
+        expr = _and(ds.field('hotel').isin(_as_list(hotel)))
+    if start_date is not None and 'date' in schema_names:
+        start_date = pd.Timestamp(start_date)
+        if 'month' in schema_names:
+            expr = _and(ds.field('month') >= start_date.strftime('%Y-%m'))
+        expr = _and(ds.field('date') >= pa.scalar(start_date))
+    if end_date is not None and 'date' in schema_names:
+        end_date = pd.Timestamp(end_date)
+        if 'month' in schema_names:
+            expr = _and(ds.field('month') <= end_date.strftime('%Y-%m'))
+        expr = _and(ds.field('date') <= pa.scalar(end_date))
+    if room_types is not None and 'room_type' in schema_names:
+        expr = _and(ds.field('room_type').isin(_as_list(room_types)))
+    if channels is not None and 'channel' in schema_names:
+        expr = _and(ds.field('channel').isin(_as_list(channels)))
+    return expr
+
+
+def load_slice(csv_path, hotel=None, start_date=None, end_date=None, room_types=None, channels=None,
+               columns=None):
+    """Charge uniquement les colonnes et partitions correspondant à la sélection
+
+    Les valeurs None désactivent le filtre correspondant ; hotel, room_types et channels
+    acceptent une valeur ou une liste.
+    """
+    return _load(csv_path, columns, hotel, start_date, end_date, room_types, channels)[0]
+
+
+def _load(csv_path, columns=None, *filters):
+    with open_dataset(csv_path) as (dataset, csv_columns, watermark):
+        expr = build_filter(dataset.schema.names, *filters)
+        table = dataset.to_table(columns=list(csv_columns if columns is None else columns), filter=expr)
+    return schema.apply_schema(table.to_pandas()), watermark
+
+
+def load_table(csv_path, columns=None):
+    """Charge le jeu complet (ou quelques colonnes) depuis le stockage colonnaire"""
+    return load_slice(csv_path, columns=columns)
+
+
+def load_table_with_watermark(csv_path, columns=None):
+    """Comme load_table ; renvoie aussi le high-water mark du CSV auquel correspond le jeu lu"""
+    return _load(csv_path, columns)
@@ -0,0 +1,134 @@
+# Lecture par blocs et validation des CSV téléversés
+# File: upload_parser.py
+# Description: Lit un fichier téléversé (hotel_data.csv) bloc par bloc, le valide contre le schéma
+# attendu (colonnes, types, capacity >= 0, occupied <= capacity), convertit vers les types compacts
+# de schema.py et encode les colonnes texte en catégories au fil de la lecture. Renvoie un DataFrame compact et un
+# rapport d'erreurs ligne par ligne ; la mémoire de travail reste bornée par la taille des blocs.
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import schema
+
+DEFAULT_CHUNK_ROWS = 200_000
+MAX_REPORTED_ERRORS = 10_000
+
+# Colonnes dérivées, recalculées à partir des colonnes validées
+DERIVED_COLUMNS = {
+    'occupancy_rate': lambda df: df['occupied'] / df['capacity'],
+    'revpar': lambda df: df['room_revenue'] / df['capacity'],
+    'gop': lambda df: df['total_revenue'] - df['total_cost'],
+    'goppar': lambda df: df['gop'] / df['capacity'],
+}
+# Colonnes attendues -> type logique (d'après schema.HOTEL_DATA_DTYPES)
+EXPECTED_COLUMNS = {c: schema.kind(t) for c, t in schema.HOTEL_DATA_DTYPES.items() if c not in DERIVED_COLUMNS}
+ERROR_COLUMNS = ['row', 'column', 'value', 'error']
+
+
+class SchemaError(ValueError):
+    """Le fichier ne peut pas être lu avec le schéma attendu (colonnes manquantes)"""
+
+
+def _coerce(chunk, col, kind):
+    """Convertit une colonne ; renvoie (série convertie, masque des valeurs invalides)"""
+    raw = chunk[col]
+    if kind == 'datetime':
+        values = pd.to_datetime(raw, errors='coerce')
+    elif kind in ('int', 'float'):
+        values = pd.to_numeric(raw, errors='coerce')
+    else:
+        return raw.astype('string'), raw.isna().to_numpy()
+    invalid = values.isna().to_numpy()
+    if kind == 'int':
+        low, high = schema.int_bounds(schema.HOTEL_DATA_DTYPES[col])
+        numbers = values.fillna(0).to_numpy(dtype=float)
+        invalid = invalid | ~np.isclose(numbers % 1, 0) | (numbers < low) | (numbers > high)
+    return values, invalid
+
+
+def _errors(rows, column, values, message):
+    return pd.DataFrame({'row': rows, 'column': column, 'value': values.astype(str), 'error': message})
+
+
+def _validate_chunk(chunk, first_row):
+    """Convertit et valide un bloc ; renvoie (lignes valides, rapport d'erreurs du bloc)"""
+    rows = np.arange(first_row, first_row + len(chunk)) + 2  # numéro de ligne du fichier (en-tête = 1)
+    bad = np.zeros(len(chunk), dtype=bool)
+    reports = []
+    converted = {}
+    for col, kind in EXPECTED_COLUMNS.items():
+        values, invalid = _coerce(chunk, col, kind)
+        if invalid.any():
+            message = f'valeur manquante ou non {kind}'
+            if kind == 'int':
+                message += f' ou hors des bornes {schema.HOTEL_DATA_DTYPES[col]}'
+            reports.append(_errors(rows[invalid], col, chunk[col][invalid], message))
+        bad |= invalid
+        converted[col] = values
+
+    df = pd.DataFrame(converted)
+    for col, message, invalid in [
+        ('capacity', 'capacity négative', (df['capacity'] < 0).to_numpy()),
+        ('occupied', 'occupied négatif', (df['occupied'] < 0).to_numpy()),
+        ('occupied', 'occupied > capacity', (df['occupied'] > df['capacity']).to_numpy()),
+    ]:
+        invalid = invalid & ~bad
+        if invalid.any():
+            reports.append(_errors(rows[invalid], col, chunk[col][invalid], message))
+        bad |= invalid
+
+    df = schema.apply_schema(df[~bad].copy())
+    if not reports:
+        return df, pd.DataFrame(columns=ERROR_COLUMNS)
+    return df, pd.concat(reports, ignore_index=True).sort_values('row', kind='stable', ignore_index=True)
+
+
+def _combine(chunks):
+    """Assemble les blocs validés en unifiant les catégories (sans repasser par des chaînes)"""
+    if not chunks:
+        # Aucun bloc : frame vide, mais aux types compacts du schéma comme un résultat non vide
+        empty = {c: pd.Series(dtype='float64' if kind in ('int', 'float', 'datetime') else 'string')
+                 for c, kind in EXPECTED_COLUMNS.items()}
+        return schema.apply_schema(pd.DataFrame(empty))
+    combined = {}
+    for col, kind in EXPECTED_COLUMNS.items():
+        parts = [c[col] for c in chunks]
+        if kind == 'category':
+            combined[col] = pd.Series(union_categoricals([p.values for p in parts]))
+        else:
+            combined[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(combined)
+
+
+def parse_upload(source, chunk_rows=DEFAULT_CHUNK_ROWS, max_errors=MAX_REPORTED_ERRORS):
+    """Lit et valide source (chemin ou fichier) bloc par bloc
+
+    Renvoie (DataFrame compact des lignes valides, rapport d'erreurs, nombre de lignes invalides).
+    Le rapport est limité à max_errors entrées ; le compte de lignes invalides reste exact.
+    Lève SchemaError si des colonnes attendues manquent.
+    """
+    reader = pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=True)
+    chunks, reports = [], []
+    n_reported, n_invalid, first_row = 0, 0, 0
+    for chunk in reader:
+        missing = [c for c in EXPECTED_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise SchemaError(f"Colonnes manquantes : {', '.join(missing)}")
+        valid, report = _validate_chunk(chunk, first_row)
+        n_invalid += len(chunk) - len(valid)
+        if n_reported < max_errors and not report.empty:
+            report = report.iloc[:max_errors - n_reported]
+            reports.append(report)
+            n_reported += len(report)
+        chunks.append(valid)
+        first_row += len(chunk)
+
+    df = _combine(chunks)
+    for col, derive in DERIVED_COLUMNS.items():
+        df[col] = derive(df).astype(schema.HOTEL_DATA_DTYPES[col])
+    if df.empty:
+        # Aucune ligne valide : types garantis par le schéma (catégories comprises)
+        df = schema.apply_schema(df)
+    errors = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=ERROR_COLUMNS)
+    return df, errors, n_invalid